@@ -1,102 +1,103 @@
-import aiosqlite
+import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator, List
+
+import aiosqlite
+
+from .migrations import migrate
+
+# Общие настройки всех соединений: ожидание блокировки, 20 MB кэша страниц
+# на соединение, чтение файла БД через mmap и проверка внешних ключей
+# (без неё ON DELETE CASCADE у report_media и send_jobs не срабатывает)
+CONNECTION_PRAGMAS = (
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA cache_size = -20000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+)
 
 
 class Database:
-    """Менеджер подключения к SQLite"""
+    """Менеджер подключений к SQLite: один пишущий и пул читающих (WAL)"""
 
-    def __init__(self, db_path: Path):
+    def __init__(self, db_path: Path, read_pool_size: int = 4):
         self.db_path = db_path
+        self.read_pool_size = read_pool_size
         self._connection: aiosqlite.Connection | None = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._reader_queue: asyncio.Queue | None = None
+        self._write_lock = asyncio.Lock()
 
     async def connect(self):
-        """Подключение к БД и создание таблиц"""
+        """Подключение к БД, миграции и открытие пула чтения"""
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._connection = await aiosqlite.connect(self.db_path)
         self._connection.row_factory = aiosqlite.Row
+        # WAL: читатели не блокируют писателя и друг друга;
+        # synchronous=NORMAL в WAL не теряет целостность при сбое ОС
+        await self._connection.execute("PRAGMA journal_mode = WAL")
+        await self._connection.execute("PRAGMA synchronous = NORMAL")
+        for pragma in CONNECTION_PRAGMAS:
+            await self._connection.execute(pragma)
         await self._init_schema()
 
+        if self.read_pool_size > 0:
+            self._reader_queue = asyncio.Queue()
+            uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+            for _ in range(self.read_pool_size):
+                reader = await aiosqlite.connect(uri, uri=True)
+                reader.row_factory = aiosqlite.Row
+                for pragma in CONNECTION_PRAGMAS:
+                    await reader.execute(pragma)
+                await reader.execute("PRAGMA query_only = 1")
+                self._readers.append(reader)
+                self._reader_queue.put_nowait(reader)
+
     async def disconnect(self):
-        """Закрытие подключения"""
+        """Закрытие всех подключений"""
+        for reader in self._readers:
+            await reader.close()
+        self._readers = []
+        self._reader_queue = None
         if self._connection:
             await self._connection.close()
             self._connection = None
 
     async def _init_schema(self):
-        """Создание таблиц"""
-        await self._connection.executescript("""
-            CREATE TABLE IF NOT EXISTS bug_reports (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                report_number INTEGER NOT NULL,
-                chat_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                username TEXT,
-                user_login TEXT NOT NULL,
-                platform TEXT NOT NULL,
-                platform_version TEXT,
-                error_time TEXT NOT NULL,
-                server TEXT NOT NULL,
-                subscriber_info TEXT,
-                description TEXT NOT NULL,
-                media_file_id TEXT,
-                media_type TEXT,
-                message_id INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(chat_id, report_number)
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_reports_chat
-            ON bug_reports(chat_id);
-
-            CREATE INDEX IF NOT EXISTS idx_reports_user
-            ON bug_reports(user_id);
-        """)
-        await self._connection.commit()
-
-        await self._migrate()
-
-        await self._connection.execute("""
-            CREATE INDEX IF NOT EXISTS idx_reports_status
-            ON bug_reports(status)
-        """)
-        await self._connection.commit()
-
-    async def _migrate(self):
-        """Миграция: добавление новых колонок"""
-        cursor = await self._connection.execute("PRAGMA table_info(bug_reports)")
-        columns = [row[1] for row in await cursor.fetchall()]
-
-        if "tracking_id" not in columns:
-            await self._connection.execute("ALTER TABLE bug_reports ADD COLUMN tracking_id TEXT")
-
-        if "status" not in columns:
-            await self._connection.execute("ALTER TABLE bug_reports ADD COLUMN status TEXT DEFAULT 'new'")
-
-        if "status_comment" not in columns:
-            await self._connection.execute("ALTER TABLE bug_reports ADD COLUMN status_comment TEXT")
-
-        if "status_changed_by" not in columns:
-            await self._connection.execute("ALTER TABLE bug_reports ADD COLUMN status_changed_by INTEGER")
-
-        await self._connection.execute("""
-            UPDATE bug_reports SET status = 'new'
-            WHERE status IS NULL OR status = 'open'
-        """)
-        await self._connection.execute("""
-            UPDATE bug_reports SET status = 'completed'
-            WHERE status = 'resolved'
-        """)
-        await self._connection.execute("""
-            UPDATE bug_reports SET status = 'trash'
-            WHERE status = 'closed'
-        """)
-
-        await self._connection.commit()
+        """Применение недостающих миграций схемы"""
+        await migrate(self._connection)
 
     @property
     def connection(self) -> aiosqlite.Connection:
-        """Получить подключение к БД"""
+        """Пишущее подключение к БД"""
         if self._connection is None:
             raise RuntimeError("База данных не подключена")
         return self._connection
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Взять соединение из пула чтения (без пула — пишущее соединение)"""
+        if self._reader_queue is None:
+            yield self.connection
+            return
+
+        conn = await self._reader_queue.get()
+        try:
+            yield conn
+        finally:
+            self._reader_queue.put_nowait(conn)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Транзакция на пишущем соединении; записи выполняются по очереди"""
+        async with self._write_lock:
+            conn = self.connection
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                await conn.rollback()
+                raise
+            await conn.commit()
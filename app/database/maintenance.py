@@ -0,0 +1,47 @@
+"""Проверка материализованных счётчиков chat_stats.
+
+Счётчики ведут триггеры, но ручная правка базы в обход них (или
+восстановление из старой копии) может их рассинхронизировать:
+    python -m app.database.maintenance --db data/bug_reports.db
+    python -m app.database.maintenance --db data/bug_reports.db --repair
+"""
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from .connection import Database
+from .repository import BugReportRepository
+
+
+async def _main(db_path: Path, repair: bool) -> int:
+    if not db_path.exists():
+        print(f"База не найдена: {db_path}")
+        return 1
+
+    db = Database(db_path)
+    await db.connect()
+    try:
+        mismatches = await BugReportRepository(db).check_chat_stats(repair=repair)
+    finally:
+        await db.disconnect()
+
+    if not mismatches:
+        print("Счётчики chat_stats совпадают с bug_reports")
+        return 0
+    for chat_id, status, stored, actual in mismatches:
+        print(f"  чат {chat_id}, {status}: в счётчике {stored}, на самом деле {actual}")
+    if repair:
+        print(f"Счётчики пересобраны, расхождений было: {len(mismatches)}")
+        return 0
+    print(f"Расхождений: {len(mismatches)} (запустите с --repair)")
+    return 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Проверка счётчиков chat_stats")
+    parser.add_argument("--db", type=Path, default=Path(os.getenv("DB_PATH", "data/bug_reports.db")))
+    parser.add_argument("--repair", action="store_true", help="пересобрать счётчики с нуля")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(args.db, args.repair)))
@@ -0,0 +1,372 @@
+"""Версионные миграции схемы по PRAGMA user_version.
+
+Каждый шаг выполняется один раз в своей транзакции вместе с обновлением
+user_version. Шаги идемпотентны, поэтому база, созданная старым кодом
+(user_version = 0), приводится к актуальной схеме без ошибок.
+
+Просмотр запланированных шагов без применения:
+    python -m app.database.migrations --db data/bug_reports.db --dry-run
+"""
+import argparse
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """Шаг миграции схемы"""
+    version: int
+    description: str
+    apply: Callable[[aiosqlite.Connection], Awaitable[None]]
+
+
+async def _create_base_schema(conn: aiosqlite.Connection) -> None:
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS bug_reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_number INTEGER NOT NULL,
+            chat_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            username TEXT,
+            user_login TEXT NOT NULL,
+            platform TEXT NOT NULL,
+            platform_version TEXT,
+            error_time TEXT NOT NULL,
+            server TEXT NOT NULL,
+            subscriber_info TEXT,
+            description TEXT NOT NULL,
+            media_file_id TEXT,
+            media_type TEXT,
+            message_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(chat_id, report_number)
+        )
+    """)
+
+
+async def _add_status_columns(conn: aiosqlite.Connection) -> None:
+    cursor = await conn.execute("PRAGMA table_info(bug_reports)")
+    columns = {row[1] for row in await cursor.fetchall()}
+    await cursor.close()
+
+    new_columns = [
+        ("tracking_id", "TEXT"),
+        ("status", "TEXT DEFAULT 'new'"),
+        ("status_comment", "TEXT"),
+        ("status_changed_by", "INTEGER"),
+    ]
+    for name, definition in new_columns:
+        if name not in columns:
+            await conn.execute(f"ALTER TABLE bug_reports ADD COLUMN {name} {definition}")
+
+
+async def _normalize_legacy_statuses(conn: aiosqlite.Connection) -> None:
+    await conn.execute("""
+        UPDATE bug_reports SET status = 'new'
+        WHERE status IS NULL OR status = 'open'
+    """)
+    await conn.execute("UPDATE bug_reports SET status = 'completed' WHERE status = 'resolved'")
+    await conn.execute("UPDATE bug_reports SET status = 'trash' WHERE status = 'closed'")
+
+
+async def _create_query_indexes(conn: aiosqlite.Connection) -> None:
+    # Индексы под списки чата (с фильтром по статусу и без) и списки пользователя.
+    # rowid входит в ключ индекса, поэтому ORDER BY created_at, id тоже покрыт.
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reports_chat_status_created
+        ON bug_reports(chat_id, status, created_at)
+    """)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reports_chat_created
+        ON bug_reports(chat_id, created_at)
+    """)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reports_user_chat_created
+        ON bug_reports(user_id, chat_id, created_at)
+    """)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reports_user_created
+        ON bug_reports(user_id, created_at)
+    """)
+    # Покрываются индексами выше или не используются запросами
+    await conn.execute("DROP INDEX IF EXISTS idx_reports_chat")
+    await conn.execute("DROP INDEX IF EXISTS idx_reports_user")
+    await conn.execute("DROP INDEX IF EXISTS idx_reports_status")
+
+
+async def _create_fts_index(conn: aiosqlite.Connection) -> None:
+    # External-content FTS5: текст хранится только в bug_reports, индекс
+    # синхронизируется триггерами. unicode61 приводит к нижнему регистру
+    # любые буквы Unicode, в том числе кириллицу.
+    await conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS bug_reports_fts USING fts5(
+            description, user_login, subscriber_info, tracking_id,
+            content='bug_reports', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS bug_reports_fts_ai AFTER INSERT ON bug_reports BEGIN
+            INSERT INTO bug_reports_fts(rowid, description, user_login, subscriber_info, tracking_id)
+            VALUES (new.id, new.description, new.user_login, new.subscriber_info, new.tracking_id);
+        END
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS bug_reports_fts_ad AFTER DELETE ON bug_reports BEGIN
+            INSERT INTO bug_reports_fts(bug_reports_fts, rowid, description, user_login, subscriber_info, tracking_id)
+            VALUES ('delete', old.id, old.description, old.user_login, old.subscriber_info, old.tracking_id);
+        END
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS bug_reports_fts_au
+        AFTER UPDATE OF description, user_login, subscriber_info, tracking_id ON bug_reports BEGIN
+            INSERT INTO bug_reports_fts(bug_reports_fts, rowid, description, user_login, subscriber_info, tracking_id)
+            VALUES ('delete', old.id, old.description, old.user_login, old.subscriber_info, old.tracking_id);
+            INSERT INTO bug_reports_fts(rowid, description, user_login, subscriber_info, tracking_id)
+            VALUES (new.id, new.description, new.user_login, new.subscriber_info, new.tracking_id);
+        END
+    """)
+    await conn.execute("INSERT INTO bug_reports_fts(bug_reports_fts) VALUES ('rebuild')")
+
+
+async def _create_chat_counters(conn: aiosqlite.Connection) -> None:
+    # Последний выданный номер репорта в чате. Триггер обновляет счётчик в той же
+    # транзакции, что и INSERT, поэтому номер занимает O(1) и не переиспользуется
+    # после удаления репортов.
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS chat_counters (
+            chat_id INTEGER PRIMARY KEY,
+            last_number INTEGER NOT NULL
+        )
+    """)
+    await conn.execute("""
+        INSERT INTO chat_counters (chat_id, last_number)
+        SELECT chat_id, MAX(report_number) FROM bug_reports WHERE true GROUP BY chat_id
+        ON CONFLICT(chat_id) DO UPDATE SET last_number = MAX(last_number, excluded.last_number)
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS bug_reports_counter_ai AFTER INSERT ON bug_reports BEGIN
+            INSERT INTO chat_counters (chat_id, last_number)
+            VALUES (new.chat_id, new.report_number)
+            ON CONFLICT(chat_id) DO UPDATE SET last_number = MAX(last_number, excluded.last_number);
+        END
+    """)
+
+
+async def _create_send_jobs(conn: aiosqlite.Connection) -> None:
+    """Очередь отправки репортов в Telegram, переживающая перезапуск"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS send_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_id INTEGER NOT NULL REFERENCES bug_reports(id) ON DELETE CASCADE,
+            payload TEXT NOT NULL DEFAULT '{}',
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_send_jobs_status_due
+        ON send_jobs(status, next_attempt_at, id)
+    """)
+
+
+async def _create_media_blobs(conn: aiosqlite.Connection) -> None:
+    """Соответствие содержимого файла (sha256) и file_id в Telegram"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS media_blobs (
+            sha256 TEXT NOT NULL,
+            media_type TEXT NOT NULL,
+            file_id TEXT NOT NULL,
+            file_unique_id TEXT,
+            size INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (sha256, media_type)
+        ) WITHOUT ROWID
+    """)
+
+
+async def _create_report_media(conn: aiosqlite.Connection) -> None:
+    """Все вложения репорта с file_id в порядке отправки"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS report_media (
+            report_id INTEGER NOT NULL REFERENCES bug_reports(id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            media_type TEXT NOT NULL,
+            file_id TEXT NOT NULL,
+            file_unique_id TEXT,
+            size INTEGER,
+            sha256 TEXT,
+            message_id INTEGER,
+            PRIMARY KEY (report_id, position)
+        ) WITHOUT ROWID
+    """)
+    await conn.execute("""
+        INSERT OR IGNORE INTO report_media (report_id, position, media_type, file_id)
+        SELECT id, 0, COALESCE(media_type, 'document'), media_file_id
+        FROM bug_reports WHERE media_file_id IS NOT NULL
+    """)
+
+
+async def _create_chat_stats(conn: aiosqlite.Connection) -> None:
+    """Число репортов чата по статусам, поддерживаемое триггерами"""
+    # Статус NULL у старых строк считается 'new', как и в выборках
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS chat_stats (
+            chat_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (chat_id, status)
+        ) WITHOUT ROWID
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS bug_reports_stats_ai AFTER INSERT ON bug_reports BEGIN
+            INSERT INTO chat_stats (chat_id, status, count)
+            VALUES (new.chat_id, COALESCE(new.status, 'new'), 1)
+            ON CONFLICT(chat_id, status) DO UPDATE SET count = count + 1;
+        END
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS bug_reports_stats_ad AFTER DELETE ON bug_reports BEGIN
+            UPDATE chat_stats SET count = count - 1
+            WHERE chat_id = old.chat_id AND status = COALESCE(old.status, 'new');
+        END
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS bug_reports_stats_au AFTER UPDATE OF chat_id, status ON bug_reports
+        WHEN old.chat_id IS NOT new.chat_id OR COALESCE(old.status, 'new') IS NOT COALESCE(new.status, 'new')
+        BEGIN
+            UPDATE chat_stats SET count = count - 1
+            WHERE chat_id = old.chat_id AND status = COALESCE(old.status, 'new');
+            INSERT INTO chat_stats (chat_id, status, count)
+            VALUES (new.chat_id, COALESCE(new.status, 'new'), 1)
+            ON CONFLICT(chat_id, status) DO UPDATE SET count = count + 1;
+        END
+    """)
+    await conn.execute("DELETE FROM chat_stats")
+    await conn.execute("""
+        INSERT INTO chat_stats (chat_id, status, count)
+        SELECT chat_id, COALESCE(status, 'new'), COUNT(*) FROM bug_reports GROUP BY 1, 2
+    """)
+
+
+async def _create_list_versions(conn: aiosqlite.Connection) -> None:
+    """Версии списков репортов чата и пользователя для ETag"""
+    # Любая запись в bug_reports увеличивает версию списков, где строка видна.
+    # report_media меняется только вместе с UPDATE bug_reports (SendJobRepository.complete),
+    # поэтому отдельный триггер на неё не нужен. При смене chat_id/user_id
+    # версии повышаются и у старых, и у новых списков.
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS list_versions (
+            scope TEXT NOT NULL,
+            scope_id INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            PRIMARY KEY (scope, scope_id)
+        ) WITHOUT ROWID
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS bug_reports_version_ai AFTER INSERT ON bug_reports BEGIN
+            INSERT INTO list_versions (scope, scope_id, version)
+            VALUES ('chat', new.chat_id, 1), ('user', new.user_id, 1)
+            ON CONFLICT(scope, scope_id) DO UPDATE SET version = version + 1;
+        END
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS bug_reports_version_au AFTER UPDATE ON bug_reports BEGIN
+            INSERT INTO list_versions (scope, scope_id, version)
+            VALUES ('chat', old.chat_id, 1), ('user', old.user_id, 1),
+                   ('chat', new.chat_id, 1), ('user', new.user_id, 1)
+            ON CONFLICT(scope, scope_id) DO UPDATE SET version = version + 1;
+        END
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS bug_reports_version_ad AFTER DELETE ON bug_reports BEGIN
+            INSERT INTO list_versions (scope, scope_id, version)
+            VALUES ('chat', old.chat_id, 1), ('user', old.user_id, 1)
+            ON CONFLICT(scope, scope_id) DO UPDATE SET version = version + 1;
+        END
+    """)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Базовая таблица bug_reports", _create_base_schema),
+    Migration(2, "Колонки tracking_id, status, status_comment, status_changed_by", _add_status_columns),
+    Migration(3, "Перевод старых статусов open/resolved/closed", _normalize_legacy_statuses),
+    Migration(4, "Составные индексы для списков чата и пользователя", _create_query_indexes),
+    Migration(5, "Полнотекстовый индекс FTS5 для поиска", _create_fts_index),
+    Migration(6, "Счётчики номеров репортов по чатам", _create_chat_counters),
+    Migration(7, "Очередь отправки send_jobs", _create_send_jobs),
+    Migration(8, "Таблица media_blobs для повторного использования file_id", _create_media_blobs),
+    Migration(9, "Вложения репортов report_media", _create_report_media),
+    Migration(10, "Счётчики репортов чата по статусам chat_stats", _create_chat_stats),
+    Migration(11, "Версии списков репортов list_versions для ETag", _create_list_versions),
+]
+
+
+async def get_schema_version(conn: aiosqlite.Connection) -> int:
+    """Текущая версия схемы"""
+    cursor = await conn.execute("PRAGMA user_version")
+    row = await cursor.fetchone()
+    await cursor.close()
+    return row[0]
+
+
+async def migrate(conn: aiosqlite.Connection, dry_run: bool = False) -> List[Migration]:
+    """Применить недостающие миграции, вернуть список выполненных (или запланированных) шагов"""
+    current = await get_schema_version(conn)
+    pending = [m for m in MIGRATIONS if m.version > current]
+
+    if dry_run:
+        return pending
+
+    for migration in pending:
+        await conn.execute("BEGIN IMMEDIATE")
+        try:
+            await migration.apply(conn)
+            await conn.execute(f"PRAGMA user_version = {migration.version}")
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+        logger.info(f"Миграция {migration.version} применена: {migration.description}")
+
+    return pending
+
+
+async def _main(db_path: Path, dry_run: bool) -> None:
+    if dry_run and not db_path.exists():
+        steps = MIGRATIONS
+        current = 0
+    else:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        async with aiosqlite.connect(db_path) as conn:
+            current = await get_schema_version(conn)
+            steps = await migrate(conn, dry_run=dry_run)
+
+    print(f"Версия схемы: {current}")
+    if not steps:
+        print("Схема актуальна")
+    for migration in steps:
+        prefix = "будет применена" if dry_run else "применена"
+        print(f"  {migration.version}: {migration.description} ({prefix})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Миграции схемы БД")
+    parser.add_argument("--db", type=Path, default=Path(os.getenv("DB_PATH", "data/bug_reports.db")))
+    parser.add_argument("--dry-run", action="store_true", help="только показать шаги")
+    args = parser.parse_args()
+    asyncio.run(_main(args.db, args.dry_run))
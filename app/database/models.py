@@ -1,11 +1,19 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
+STATUS_LABELS = {
+    'new': 'Новая',
+    'revision': 'Доработка',
+    'in_progress': 'В работе',
+    'completed': 'Завершена',
+    'trash': 'Отказ',
+}
 
-@dataclass
+
+@dataclass(slots=True)
 class BugReport:
-    """Модель баг-репорта"""
+    """Модель баг-репорта (со __slots__: в списках их сотни на ответ)"""
     id: Optional[int]
     report_number: int
     chat_id: int
@@ -45,8 +53,94 @@ class BugReport:
             "status": self.status,
             "status_comment": self.status_comment,
             "created_at": self.created_at.isoformat() if isinstance(self.created_at, datetime) else self.created_at,
+            "updated_at": self.updated_at.isoformat() if isinstance(self.updated_at, datetime) else self.updated_at,
         }
         if include_admin_fields:
             data["user_id"] = self.user_id
             data["username"] = self.username
         return data
+
+
+@dataclass
+class SpooledFile:
+    """Файл вложения, сохранённый на диск до отправки в Telegram"""
+    path: str
+    filename: Optional[str]
+    content_type: str
+    sha256: Optional[str] = None
+    size: Optional[int] = None
+    # Исходник пережатого фото; в задание не сохраняется
+    source: Optional["SpooledFile"] = field(default=None, repr=False, compare=False)
+
+    @property
+    def media_type(self) -> str:
+        """Тип медиа для Bot API по Content-Type"""
+        if self.content_type.startswith("image/"):
+            return "photo"
+        if self.content_type.startswith("video/"):
+            return "video"
+        return "document"
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "filename": self.filename,
+            "content_type": self.content_type,
+            "sha256": self.sha256,
+            "size": self.size,
+        }
+
+
+@dataclass
+class SentMedia:
+    """Вложение, загруженное в Telegram"""
+    sha256: Optional[str]
+    media_type: str
+    file_id: str
+    file_unique_id: Optional[str] = None
+    size: Optional[int] = None
+    position: int = 0
+    message_id: Optional[int] = None
+
+
+@dataclass
+class ReportMedia:
+    """Вложение репорта (таблица report_media)"""
+    report_id: int
+    position: int
+    media_type: str
+    file_id: str
+    file_unique_id: Optional[str] = None
+    size: Optional[int] = None
+    sha256: Optional[str] = None
+    message_id: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        """Сериализация в словарь для API"""
+        return {
+            "position": self.position,
+            "media_type": self.media_type,
+            "file_id": self.file_id,
+            "size": self.size,
+        }
+
+
+@dataclass
+class ReportPage:
+    """Страница списка репортов, закодированная в JSON на стороне SQLite"""
+    reports_json: str
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+
+@dataclass
+class SendJob:
+    """Задание очереди отправки репорта в Telegram"""
+    id: int
+    report_id: int
+    files: List[SpooledFile] = field(default_factory=list)
+    cleanup_files: bool = True
+    status: str = "pending"
+    attempts: int = 0
+    next_attempt_at: float = 0
+    last_error: Optional[str] = None
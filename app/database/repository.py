@@ -1,6 +1,13 @@
-from typing import Optional, List
+import base64
+import json
+import re
+import time
+from dataclasses import MISSING, fields
+from typing import AsyncIterator, Dict, Iterable, Optional, List, Sequence, Tuple
+
+from app.utils.metrics import DB_QUERY_SECONDS, instrument_methods
 from .connection import Database
-from .models import BugReport
+from .models import BugReport, ReportMedia, ReportPage, SendJob, SentMedia, SpooledFile, STATUS_LABELS
 
 ALLOWED_UPDATE_FIELDS = frozenset({
     "user_login", "platform", "platform_version", "error_time",
@@ -10,6 +17,123 @@ ALLOWED_UPDATE_FIELDS = frozenset({
 })
 
 
+# Миллисекунды, чтобы две правки в одну секунду различались по updated_at
+UPDATED_AT_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+class StaleReportError(Exception):
+    """Репорт изменён после чтения (не совпал updated_at)"""
+
+    def __init__(self, report_id: int):
+        super().__init__(f"Репорт {report_id} изменён другим пользователем")
+        self.report_id = report_id
+
+
+# Поля BugReport в порядке конструктора и их значения по умолчанию
+_REPORT_FIELDS = tuple(
+    (f.name, None if f.default is MISSING else f.default) for f in fields(BugReport)
+)
+
+
+def report_columns(keys: Sequence[str]) -> Tuple[Tuple[Optional[int], object], ...]:
+    """Карта колонок выборки для BugReport: (индекс колонки или None, значение по умолчанию).
+
+    Строится один раз на выборку, а не через row.keys() на каждой строке.
+    Лишние колонки (search_rank и т.п.) пропускаются, отсутствующие
+    получают значение по умолчанию.
+    """
+    index = {name: i for i, name in enumerate(keys)}
+    return tuple((index.get(name), default) for name, default in _REPORT_FIELDS)
+
+
+def rows_to_reports(rows: Sequence) -> List[BugReport]:
+    """Строки bug_reports в список BugReport"""
+    if not rows:
+        return []
+    columns = report_columns(rows[0].keys())
+    return [
+        BugReport(*[default if i is None else row[i] for i, default in columns])
+        for row in rows
+    ]
+
+
+# Поля BugReport.to_dict() в том же порядке, для json_object в SQLite
+_REPORT_JSON_FIELDS = (
+    "id", "report_number", "chat_id", "user_login", "platform", "platform_version",
+    "error_time", "server", "subscriber_info", "description", "tracking_id", "status",
+    "status_comment", "created_at", "updated_at",
+)
+_REPORT_JSON_ADMIN_FIELDS = ("user_id", "username")
+# Вложения как ReportMedia.to_dict(); json() возвращает подзапросу JSON-подтип,
+# иначе массив попал бы в объект строкой
+_REPORT_MEDIA_JSON = (
+    "json((SELECT json_group_array(json_object("
+    "'position', position, 'media_type', media_type, 'file_id', file_id, 'size', size)) "
+    "FROM report_media WHERE report_id = shown.id))"
+)
+
+
+# Краткая форма для карточек списка: без вложений и редко нужных полей,
+# описание обрезается до summary_chars символов
+_REPORT_SUMMARY_FIELDS = (
+    "id", "report_number", "chat_id", "user_login", "platform", "platform_version",
+    "server", "tracking_id", "status", "created_at", "updated_at",
+)
+
+
+def _report_json_object(include_admin_fields: bool, summary_chars: Optional[int] = None) -> str:
+    admin_fields = _REPORT_JSON_ADMIN_FIELDS if include_admin_fields else ()
+    if summary_chars is None:
+        pairs = [f"'{name}', {name}" for name in _REPORT_JSON_FIELDS + admin_fields]
+        pairs.append(f"'media', {_REPORT_MEDIA_JSON}")
+    else:
+        chars = int(summary_chars)
+        pairs = [f"'{name}', {name}" for name in _REPORT_SUMMARY_FIELDS + admin_fields]
+        # substr и length считают символы, а не байты UTF-8
+        pairs.append(f"'description', substr(description, 1, {chars})")
+        pairs.append(
+            f"'description_truncated', "
+            f"json(CASE WHEN length(description) > {chars} THEN 'true' ELSE 'false' END)"
+        )
+    return f"json_object({', '.join(pairs)})"
+
+
+def encode_cursor(report: BugReport) -> str:
+    """Непрозрачный курсор страницы по (created_at, id)"""
+    return _encode_cursor(report.created_at, report.id)
+
+
+def _encode_cursor(created_at, report_id: int) -> str:
+    raw = f"{created_at}|{report_id}".encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Разобрать курсор, ValueError при некорректном значении"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, report_id = raw.rsplit("|", 1)
+        return created_at, int(report_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Некорректный курсор: {cursor!r}") from e
+
+
+def build_fts_query(query: str) -> Optional[str]:
+    """Преобразовать пользовательский ввод в выражение FTS5 MATCH.
+
+    Каждое слово становится фразой с поиском по префиксу, слова объединяются
+    через AND. Кавычки экранируются, поэтому синтаксис FTS5 из ввода не
+    интерпретируется.
+    """
+    terms = [
+        '"' + word.replace('"', '""') + '"*'
+        for word in query.split()
+        if re.search(r"\w", word)
+    ]
+    return " ".join(terms) if terms else None
+
+
+@instrument_methods(DB_QUERY_SECONDS)
 class BugReportRepository:
     """Репозиторий для CRUD операций с баг-репортами"""
 
@@ -18,167 +142,367 @@ class BugReportRepository:
 
     async def get_next_report_number(self, chat_id: int) -> int:
         """Получить следующий номер репорта для чата"""
-        cursor = await self.db.connection.execute(
-            "SELECT MAX(report_number) FROM bug_reports WHERE chat_id = ?",
+        result = await self._fetch_one(
+            "SELECT last_number FROM chat_counters WHERE chat_id = ?",
             (chat_id,)
         )
-        result = await cursor.fetchone()
-        await cursor.close()
-        max_num = result[0] if result[0] else 0
-        return max_num + 1
+        return (result[0] if result else 0) + 1
 
     async def create(self, report: BugReport) -> int:
-        """Создать новый баг-репорт с атомарным присвоением номера"""
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                cursor = await self.db.connection.execute(
-                    """
-                    INSERT INTO bug_reports
-                    (report_number, chat_id, user_id, username, user_login, platform,
-                     platform_version, error_time, server, subscriber_info,
-                     description, media_file_id, media_type, message_id, tracking_id, status)
-                    VALUES (
-                        (SELECT COALESCE(MAX(report_number), 0) + 1 FROM bug_reports WHERE chat_id = ?),
-                        ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
-                    )
-                    """,
-                    (
-                        report.chat_id,
-                        report.chat_id, report.user_id,
-                        report.username, report.user_login, report.platform,
-                        report.platform_version, report.error_time, report.server,
-                        report.subscriber_info, report.description,
-                        report.media_file_id, report.media_type, report.message_id,
-                        report.tracking_id, report.status
-                    )
-                )
-                await self.db.connection.commit()
-                report_id = cursor.lastrowid
-                await cursor.close()
+        """Создать новый баг-репорт с атомарным присвоением номера.
+
+        Номер берётся из chat_counters одним INSERT ... RETURNING; счётчик
+        сдвигает триггер в той же транзакции, записи сериализованы, поэтому
+        повторы при конфликте не нужны.
+        """
+        async with self.db.transaction() as conn:
+            return await self._insert(conn, report)
+
+    async def create_with_send_job(
+        self, report: BugReport, files: List[SpooledFile], cleanup_files: bool = True
+    ) -> Tuple[int, int]:
+        """Создать репорт и задание на его отправку в одной транзакции.
+
+        Возвращает (report_id, job_id).
+        """
+        payload = json.dumps({
+            "files": [f.to_dict() for f in files],
+            "cleanup": cleanup_files,
+        }, ensure_ascii=False)
+
+        async with self.db.transaction() as conn:
+            report_id = await self._insert(conn, report)
+            cursor = await conn.execute(
+                "INSERT INTO send_jobs (report_id, payload) VALUES (?, ?) RETURNING id",
+                (report_id, payload)
+            )
+            job_id = (await cursor.fetchone())[0]
+            await cursor.close()
 
-                created = await self.get_by_id(report_id)
-                if created:
-                    report.report_number = created.report_number
+        return report_id, job_id
 
-                return report_id
-            except Exception as e:
-                if "UNIQUE constraint failed" in str(e) and attempt < max_retries - 1:
-                    continue
-                raise
+    async def _insert(self, conn, report: BugReport) -> int:
+        cursor = await conn.execute(
+            """
+            INSERT INTO bug_reports
+            (report_number, chat_id, user_id, username, user_login, platform,
+             platform_version, error_time, server, subscriber_info,
+             description, media_file_id, media_type, message_id, tracking_id, status)
+            VALUES (
+                COALESCE((SELECT last_number FROM chat_counters WHERE chat_id = ?), 0) + 1,
+                ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+            )
+            RETURNING id, report_number
+            """,
+            (
+                report.chat_id,
+                report.chat_id, report.user_id,
+                report.username, report.user_login, report.platform,
+                report.platform_version, report.error_time, report.server,
+                report.subscriber_info, report.description,
+                report.media_file_id, report.media_type, report.message_id,
+                report.tracking_id, report.status
+            )
+        )
+        report_id, report.report_number = await cursor.fetchone()
+        await cursor.close()
+        report.id = report_id
+        return report_id
 
     async def get_by_id(self, report_id: int) -> Optional[BugReport]:
         """Получить репорт по ID"""
-        cursor = await self.db.connection.execute(
+        row = await self._fetch_one(
             "SELECT * FROM bug_reports WHERE id = ?", (report_id,)
         )
-        row = await cursor.fetchone()
-        await cursor.close()
         if row:
-            return self._row_to_report(row)
+            return rows_to_reports([row])[0]
         return None
 
     async def get_by_chat_and_number(
         self, chat_id: int, report_number: int
     ) -> Optional[BugReport]:
         """Получить репорт по ID чата и номеру репорта"""
-        cursor = await self.db.connection.execute(
+        row = await self._fetch_one(
             "SELECT * FROM bug_reports WHERE chat_id = ? AND report_number = ?",
             (chat_id, report_number)
         )
-        row = await cursor.fetchone()
-        await cursor.close()
         if row:
-            return self._row_to_report(row)
+            return rows_to_reports([row])[0]
         return None
 
+    async def get_many(self, report_ids: Iterable[int]) -> List[BugReport]:
+        """Получить репорты по списку ID одним запросом (в порядке ID в списке)"""
+        ids = list(dict.fromkeys(report_ids))
+        if not ids:
+            return []
+        placeholders = ", ".join("?" * len(ids))
+        rows = await self._fetch_all(
+            f"SELECT * FROM bug_reports WHERE id IN ({placeholders})", ids
+        )
+        by_id = {report.id: report for report in rows_to_reports(rows)}
+        return [by_id[report_id] for report_id in ids if report_id in by_id]
+
     async def get_by_user(
         self, user_id: int, chat_id: Optional[int] = None,
-        limit: int = 100, offset: int = 0
+        limit: int = 100, offset: int = 0, cursor: Optional[str] = None
     ) -> List[BugReport]:
-        """Получить репорты пользователя с пагинацией"""
+        """Получить репорты пользователя с пагинацией (offset или курсор)"""
+        conditions = ["user_id = ?"]
+        params = [user_id]
         if chat_id:
-            cursor = await self.db.connection.execute(
-                "SELECT * FROM bug_reports WHERE user_id = ? AND chat_id = ? "
-                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
-                (user_id, chat_id, limit, offset)
-            )
-        else:
-            cursor = await self.db.connection.execute(
-                "SELECT * FROM bug_reports WHERE user_id = ? "
-                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
-                (user_id, limit, offset)
-            )
-        rows = await cursor.fetchall()
-        await cursor.close()
-        return [self._row_to_report(row) for row in rows]
+            conditions.append("chat_id = ?")
+            params.append(chat_id)
+        return await self._fetch_page(conditions, params, limit, offset, cursor)
 
     async def get_by_chat(
         self, chat_id: int, status: Optional[str] = None,
-        limit: int = 200, offset: int = 0
+        limit: int = 200, offset: int = 0, cursor: Optional[str] = None
     ) -> List[BugReport]:
         """Получить репорты чата с фильтрацией по статусу и пагинацией"""
+        conditions = ["chat_id = ?"]
+        params = [chat_id]
         if status:
-            cursor = await self.db.connection.execute(
-                "SELECT * FROM bug_reports WHERE chat_id = ? AND status = ? "
-                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
-                (chat_id, status, limit, offset)
-            )
-        else:
-            cursor = await self.db.connection.execute(
-                "SELECT * FROM bug_reports WHERE chat_id = ? "
-                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
-                (chat_id, limit, offset)
-            )
-        rows = await cursor.fetchall()
-        await cursor.close()
-        return [self._row_to_report(row) for row in rows]
+            conditions.append("status = ?")
+            params.append(status)
+        return await self._fetch_page(conditions, params, limit, offset, cursor)
+
+    async def get_by_user_json(
+        self, user_id: int, chat_id: Optional[int] = None,
+        limit: int = 100, offset: int = 0, cursor: Optional[str] = None,
+        include_admin_fields: bool = False, summary_chars: Optional[int] = None
+    ) -> ReportPage:
+        """Как get_by_user, но страница сразу в JSON.
+
+        С summary_chars — краткая форма для списка (см. _REPORT_SUMMARY_FIELDS),
+        иначе полная, с вложениями.
+        """
+        conditions = ["user_id = ?"]
+        params = [user_id]
+        if chat_id:
+            conditions.append("chat_id = ?")
+            params.append(chat_id)
+        return await self._fetch_page_json(
+            conditions, params, limit, offset, cursor, include_admin_fields, summary_chars
+        )
+
+    async def get_by_chat_json(
+        self, chat_id: int, status: Optional[str] = None,
+        limit: int = 200, offset: int = 0, cursor: Optional[str] = None,
+        include_admin_fields: bool = True, summary_chars: Optional[int] = None
+    ) -> ReportPage:
+        """Как get_by_chat, но страница сразу в JSON (краткая или полная форма)"""
+        conditions = ["chat_id = ?"]
+        params = [chat_id]
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        return await self._fetch_page_json(
+            conditions, params, limit, offset, cursor, include_admin_fields, summary_chars
+        )
+
+    async def _fetch_page_json(
+        self, conditions: List[str], params: list,
+        limit: int, offset: int, cursor: Optional[str],
+        include_admin_fields: bool, summary_chars: Optional[int] = None
+    ) -> ReportPage:
+        """Страница по (created_at DESC, id DESC), собранная в JSON-массив в SQLite.
+
+        Строки не превращаются в Row/BugReport/dict: SQLite отдаёт одну строку
+        с массивом объектов в формате BugReport.to_dict() и ReportMedia.to_dict().
+        Выбирается limit + 1 строк, лишняя только показывает, есть ли продолжение.
+        """
+        params = list(params)
+        if cursor:
+            created_at, report_id = decode_cursor(cursor)
+            conditions = conditions + ["(created_at, id) < (?, ?)"]
+            params += [created_at, report_id]
+            offset = 0
+
+        # json_group_array собирает элементы в порядке строк подзапроса shown
+        row = await self._fetch_one(
+            f"""
+            WITH page AS MATERIALIZED (
+                SELECT * FROM bug_reports WHERE {' AND '.join(conditions)}
+                ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?
+            ),
+            shown AS (
+                SELECT * FROM page ORDER BY created_at DESC, id DESC LIMIT ?
+            )
+            SELECT
+                (SELECT json_group_array({_report_json_object(include_admin_fields, summary_chars)}) FROM shown),
+                (SELECT COUNT(*) FROM page),
+                (SELECT created_at FROM shown ORDER BY created_at, id LIMIT 1),
+                (SELECT id FROM shown ORDER BY created_at, id LIMIT 1)
+            """,
+            params + [limit + 1, offset, limit]
+        )
+        reports_json, fetched, last_created_at, last_id = row
+        has_more = fetched > limit
+        return ReportPage(
+            reports_json=reports_json,
+            has_more=has_more,
+            next_cursor=_encode_cursor(last_created_at, last_id) if has_more else None,
+        )
+
+    async def _fetch_page(
+        self, conditions: List[str], params: list,
+        limit: int, offset: int, cursor: Optional[str]
+    ) -> List[BugReport]:
+        """Страница по (created_at DESC, id DESC).
+
+        С курсором выборка начинается сразу после последней строки предыдущей
+        страницы по индексу, без пропуска offset строк.
+        """
+        params = list(params)
+        if cursor:
+            created_at, report_id = decode_cursor(cursor)
+            conditions = conditions + ["(created_at, id) < (?, ?)"]
+            params += [created_at, report_id]
+            offset = 0
+
+        rows = await self._fetch_all(
+            f"SELECT * FROM bug_reports WHERE {' AND '.join(conditions)} "
+            "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        )
+        return rows_to_reports(rows)
 
     async def get_stats(self, chat_id: int) -> dict:
-        """Получить статистику репортов чата"""
-        cursor = await self.db.connection.execute(
-            """SELECT
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'new' OR status IS NULL THEN 1 ELSE 0 END) as new,
-                SUM(CASE WHEN status = 'in_progress' THEN 1 ELSE 0 END) as in_progress,
-                SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed
-            FROM bug_reports WHERE chat_id = ?""",
-            (chat_id,)
+        """Статистика репортов чата по всем статусам из счётчиков chat_stats"""
+        rows = await self._fetch_all(
+            "SELECT status, count FROM chat_stats WHERE chat_id = ?", (chat_id,)
         )
-        row = await cursor.fetchone()
-        await cursor.close()
-        return {
-            "total": row[0] or 0,
-            "new": row[1] or 0,
-            "in_progress": row[2] or 0,
-            "completed": row[3] or 0
-        }
+        stats = {"total": 0, **{status: 0 for status in STATUS_LABELS}}
+        for status, count in rows:
+            stats[status] = stats.get(status, 0) + count
+            stats["total"] += count
+        return stats
+
+    async def get_list_version(self, scope: str, scope_id: int) -> int:
+        """Версия списка репортов ('chat' или 'user'), растёт при каждой записи"""
+        row = await self._fetch_one(
+            "SELECT version FROM list_versions WHERE scope = ? AND scope_id = ?",
+            (scope, scope_id)
+        )
+        return row[0] if row else 0
+
+    async def check_chat_stats(self, repair: bool = False) -> List[Tuple[int, str, int, int]]:
+        """Сверить chat_stats с bug_reports.
+
+        Возвращает расхождения (chat_id, status, в счётчике, на самом деле).
+        С repair=True счётчики пересобираются с нуля в той же транзакции.
+        """
+        async with self.db.transaction() as conn:
+            cursor = await conn.execute(
+                "SELECT chat_id, COALESCE(status, 'new'), COUNT(*) FROM bug_reports GROUP BY 1, 2"
+            )
+            actual = {(row[0], row[1]): row[2] for row in await cursor.fetchall()}
+            cursor = await conn.execute("SELECT chat_id, status, count FROM chat_stats")
+            stored = {(row[0], row[1]): row[2] for row in await cursor.fetchall()}
+            await cursor.close()
+
+            mismatches = [
+                (*key, stored.get(key, 0), actual.get(key, 0))
+                for key in sorted(actual.keys() | stored.keys())
+                if stored.get(key, 0) != actual.get(key, 0)
+            ]
+            if repair and mismatches:
+                await conn.execute("DELETE FROM chat_stats")
+                await conn.execute(
+                    "INSERT INTO chat_stats (chat_id, status, count) "
+                    "SELECT chat_id, COALESCE(status, 'new'), COUNT(*) FROM bug_reports GROUP BY 1, 2"
+                )
+            return mismatches
 
     async def search(
         self, chat_id: int, query: str,
         limit: int = 50, offset: int = 0
     ) -> List[BugReport]:
-        """Поиск репортов по тексту"""
-        search_pattern = f"%{query}%"
-        cursor = await self.db.connection.execute(
-            """SELECT * FROM bug_reports
-            WHERE chat_id = ? AND (
-                description LIKE ? OR user_login LIKE ? OR
-                subscriber_info LIKE ? OR tracking_id LIKE ?
-                OR CAST(report_number AS TEXT) = ?
-            )
-            ORDER BY created_at DESC LIMIT ? OFFSET ?""",
-            (chat_id, search_pattern, search_pattern,
-             search_pattern, search_pattern, query, limit, offset)
-        )
-        rows = await cursor.fetchall()
-        await cursor.close()
-        return [self._row_to_report(row) for row in rows]
+        """Поиск репортов по тексту (FTS5, ранжирование bm25).
+
+        Точное совпадение номера репорта выводится первым.
+        """
+        found = self._search_sql(chat_id, query)
+        if found is None:
+            return []
+        sql, params = found
+        rows = await self._fetch_all(
+            f"SELECT * FROM ({sql}) "
+            "ORDER BY search_group, search_rank, created_at DESC, id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        )
+        return rows_to_reports(rows)
+
+    async def search_json(
+        self, chat_id: int, query: str,
+        limit: int = 50, offset: int = 0,
+        include_admin_fields: bool = True, summary_chars: Optional[int] = None
+    ) -> ReportPage:
+        """Как search, но страница сразу в JSON (краткая или полная форма)"""
+        found = self._search_sql(chat_id, query)
+        if found is None:
+            return ReportPage(reports_json="[]", has_more=False)
+        sql, params = found
+        order = "search_group, search_rank, created_at DESC, id DESC"
+        row = await self._fetch_one(
+            f"""
+            WITH page AS MATERIALIZED (
+                SELECT * FROM ({sql}) ORDER BY {order} LIMIT ? OFFSET ?
+            ),
+            shown AS (
+                SELECT * FROM page ORDER BY {order} LIMIT ?
+            )
+            SELECT
+                (SELECT json_group_array({_report_json_object(include_admin_fields, summary_chars)}) FROM shown),
+                (SELECT COUNT(*) FROM page)
+            """,
+            params + [limit + 1, offset, limit]
+        )
+        reports_json, fetched = row
+        return ReportPage(reports_json=reports_json, has_more=fetched > limit)
+
+    def _search_sql(self, chat_id: int, query: str) -> Optional[Tuple[str, list]]:
+        """UNION выборок поиска (номер и FTS) с колонками search_group и search_rank"""
+        query = query.strip()
+        report_number = int(query) if query.isdigit() else None
+        fts_query = build_fts_query(query)
+
+        parts = []
+        params = []
+        if report_number is not None:
+            parts.append(
+                "SELECT *, 0 AS search_group, 0.0 AS search_rank FROM bug_reports "
+                "WHERE chat_id = ? AND report_number = ?"
+            )
+            params += [chat_id, report_number]
+        if fts_query:
+            parts.append(
+                "SELECT b.*, 1 AS search_group, bm25(bug_reports_fts) AS search_rank "
+                "FROM bug_reports_fts JOIN bug_reports b ON b.id = bug_reports_fts.rowid "
+                "WHERE bug_reports_fts MATCH ? AND b.chat_id = ? AND b.report_number IS NOT ?"
+            )
+            params += [fts_query, chat_id, report_number]
+        if not parts:
+            return None
+        return " UNION ALL ".join(parts), params
 
     async def update(self, report_id: int, **fields) -> bool:
         """Обновить поля репорта"""
         if not fields:
             return False
+        return await self.update_returning(report_id, **fields) is not None
+
+    async def update_returning(
+        self, report_id: int, expected_updated_at: Optional[str] = None, **fields
+    ) -> Optional[BugReport]:
+        """Обновить поля и вернуть обновлённый репорт одним запросом (RETURNING).
+
+        Если передан expected_updated_at, строка обновляется только когда её
+        updated_at не изменился с момента чтения, иначе StaleReportError.
+        Возвращает None, если репорта нет.
+        """
+        if not fields:
+            raise ValueError("Нет полей для обновления")
 
         invalid = set(fields.keys()) - ALLOWED_UPDATE_FIELDS
         if invalid:
@@ -186,19 +510,36 @@ class BugReportRepository:
 
         set_clause = ", ".join(f"{k} = ?" for k in fields.keys())
         values = list(fields.values()) + [report_id]
+        where = "id = ?"
+        if expected_updated_at is not None:
+            where += " AND updated_at = ?"
+            values.append(expected_updated_at)
 
-        cursor = await self.db.connection.execute(
-            f"UPDATE bug_reports SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-            values
-        )
-        await self.db.connection.commit()
-        rows_affected = cursor.rowcount
-        await cursor.close()
-        return rows_affected > 0
+        async with self.db.transaction() as conn:
+            cursor = await conn.execute(
+                f"UPDATE bug_reports SET {set_clause}, updated_at = {UPDATED_AT_NOW} "
+                f"WHERE {where} RETURNING *",
+                values
+            )
+            row = await cursor.fetchone()
+            await cursor.close()
+
+        if row:
+            return rows_to_reports([row])[0]
+        if expected_updated_at is not None and await self.get_by_id(report_id):
+            raise StaleReportError(report_id)
+        return None
 
     async def update_message_id(self, report_id: int, message_id: int) -> bool:
-        """Обновить ID сообщения"""
-        return await self.update(report_id, message_id=message_id)
+        """Обновить ID сообщения.
+
+        Служебная запись: updated_at — токен правок пользователя, его не трогаем.
+        """
+        async with self.db.transaction() as conn:
+            cursor = await conn.execute(
+                "UPDATE bug_reports SET message_id = ? WHERE id = ?", (message_id, report_id)
+            )
+            return cursor.rowcount > 0
 
     async def set_tracking_id(self, report_id: int, tracking_id: str) -> bool:
         """Установить Tracking ID"""
@@ -208,38 +549,248 @@ class BugReportRepository:
         """Установить статус"""
         return await self.update(report_id, status=status)
 
+    async def get_media(self, report_ids: Iterable[int]) -> Dict[int, List[ReportMedia]]:
+        """Вложения нескольких репортов одним запросом: {report_id: [media, ...]}"""
+        report_ids = sorted({rid for rid in report_ids if rid is not None})
+        if not report_ids:
+            return {}
+
+        placeholders = ", ".join("?" * len(report_ids))
+        rows = await self._fetch_all(
+            f"SELECT * FROM report_media WHERE report_id IN ({placeholders}) "
+            "ORDER BY report_id, position",
+            report_ids
+        )
+        result: Dict[int, List[ReportMedia]] = {}
+        for row in rows:
+            result.setdefault(row["report_id"], []).append(ReportMedia(**dict(row)))
+        return result
+
     async def export_chat_reports(self, chat_id: int) -> List[BugReport]:
         """Экспорт всех репортов чата для CSV"""
-        cursor = await self.db.connection.execute(
+        rows = await self._fetch_all(
             "SELECT * FROM bug_reports WHERE chat_id = ? ORDER BY report_number ASC",
             (chat_id,)
         )
-        rows = await cursor.fetchall()
-        await cursor.close()
-        return [self._row_to_report(row) for row in rows]
+        return rows_to_reports(rows)
+
+    async def iter_chat_reports(
+        self, chat_id: int, batch_size: int = 500
+    ) -> AsyncIterator[List[BugReport]]:
+        """Потоковый экспорт репортов чата пачками по batch_size строк.
+
+        Каждая пачка — отдельный запрос по ключу (chat_id, report_number):
+        соединение из пула возвращается между пачками, и медленная выгрузка
+        клиенту не держит читателя и открытую транзакцию, мешающую checkpoint WAL.
+        """
+        last_number = 0
+        while True:
+            rows = await self._fetch_all(
+                "SELECT * FROM bug_reports WHERE chat_id = ? AND report_number > ? "
+                "ORDER BY report_number ASC LIMIT ?",
+                (chat_id, last_number, batch_size)
+            )
+            if not rows:
+                break
+            reports = rows_to_reports(rows)
+            last_number = reports[-1].report_number
+            yield reports
+            if len(rows) < batch_size:
+                break
 
-    def _row_to_report(self, row) -> BugReport:
-        """Конвертация строки БД в объект BugReport"""
-        return BugReport(
+    async def _fetch_one(self, sql: str, params=()):
+        """Одна строка через пул чтения"""
+        async with self.db.reader() as conn:
+            cursor = await conn.execute(sql, params)
+            row = await cursor.fetchone()
+            await cursor.close()
+            return row
+
+    async def _fetch_all(self, sql: str, params=()) -> list:
+        """Все строки через пул чтения"""
+        async with self.db.reader() as conn:
+            cursor = await conn.execute(sql, params)
+            rows = await cursor.fetchall()
+            await cursor.close()
+            return rows
+
+
+@instrument_methods(DB_QUERY_SECONDS)
+class SendJobRepository:
+    """Очередь заданий отправки в Telegram (таблица send_jobs)"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def claim_next(self, now: Optional[float] = None) -> Optional[SendJob]:
+        """Забрать ближайшее готовое задание и пометить его running"""
+        now = time.time() if now is None else now
+        async with self.db.transaction() as conn:
+            cursor = await conn.execute(
+                f"""
+                UPDATE send_jobs
+                SET status = 'running', attempts = attempts + 1, updated_at = {UPDATED_AT_NOW}
+                WHERE id = (
+                    SELECT id FROM send_jobs
+                    WHERE status = 'pending' AND next_attempt_at <= ?
+                    ORDER BY next_attempt_at, id
+                    LIMIT 1
+                )
+                RETURNING *
+                """,
+                (now,)
+            )
+            row = await cursor.fetchone()
+            await cursor.close()
+        return self._row_to_job(row) if row else None
+
+    async def complete(
+        self, job: SendJob, message_id: int, sent_media: Iterable[SentMedia] = ()
+    ) -> None:
+        """Записать message_id и file_id вложений, закрыть задание одной транзакцией.
+
+        updated_at репорта не меняется: это токен оптимистичной блокировки
+        правок пользователя, а фоновая отправка не должна давать им 409.
+        """
+        sent_media = list(sent_media)
+        media_file_id = sent_media[0].file_id if sent_media else None
+        async with self.db.transaction() as conn:
+            await conn.execute(
+                "UPDATE bug_reports SET message_id = ?, media_file_id = COALESCE(?, media_file_id) "
+                "WHERE id = ?",
+                (message_id, media_file_id, job.report_id)
+            )
+            await conn.executemany(
+                """
+                INSERT INTO media_blobs (sha256, media_type, file_id, file_unique_id, size)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(sha256, media_type) DO UPDATE SET
+                    file_id = excluded.file_id,
+                    file_unique_id = excluded.file_unique_id,
+                    last_used_at = CURRENT_TIMESTAMP
+                """,
+                [
+                    (m.sha256, m.media_type, m.file_id, m.file_unique_id, m.size)
+                    for m in sent_media if m.sha256
+                ]
+            )
+            await conn.executemany(
+                """
+                INSERT INTO report_media
+                (report_id, position, media_type, file_id, file_unique_id, size, sha256, message_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(report_id, position) DO UPDATE SET
+                    media_type = excluded.media_type,
+                    file_id = excluded.file_id,
+                    file_unique_id = excluded.file_unique_id,
+                    size = excluded.size,
+                    sha256 = excluded.sha256,
+                    message_id = excluded.message_id
+                """,
+                [
+                    (job.report_id, m.position, m.media_type, m.file_id,
+                     m.file_unique_id, m.size, m.sha256, m.message_id)
+                    for m in sent_media
+                ]
+            )
+            await conn.execute(
+                f"UPDATE send_jobs SET status = 'done', last_error = NULL, updated_at = {UPDATED_AT_NOW} "
+                "WHERE id = ?",
+                (job.id,)
+            )
+
+    async def retry_later(self, job: SendJob, delay: float, error: str) -> None:
+        """Вернуть задание в очередь через delay секунд"""
+        async with self.db.transaction() as conn:
+            await conn.execute(
+                f"UPDATE send_jobs SET status = 'pending', next_attempt_at = ?, last_error = ?, "
+                f"updated_at = {UPDATED_AT_NOW} WHERE id = ?",
+                (time.time() + delay, error, job.id)
+            )
+
+    async def fail(self, job: SendJob, error: str) -> None:
+        """Окончательно пометить задание как неудачное"""
+        async with self.db.transaction() as conn:
+            await conn.execute(
+                f"UPDATE send_jobs SET status = 'failed', last_error = ?, updated_at = {UPDATED_AT_NOW} "
+                "WHERE id = ?",
+                (error, job.id)
+            )
+
+    async def requeue_running(self) -> int:
+        """Вернуть в очередь задания, прерванные остановкой процесса"""
+        async with self.db.transaction() as conn:
+            cursor = await conn.execute(
+                f"UPDATE send_jobs SET status = 'pending', updated_at = {UPDATED_AT_NOW} "
+                "WHERE status = 'running'"
+            )
+            count = cursor.rowcount
+            await cursor.close()
+        return count
+
+    async def next_due_at(self) -> Optional[float]:
+        """Время ближайшего ожидающего задания"""
+        async with self.db.reader() as conn:
+            cursor = await conn.execute(
+                "SELECT MIN(next_attempt_at) FROM send_jobs WHERE status = 'pending'"
+            )
+            row = await cursor.fetchone()
+            await cursor.close()
+        return row[0] if row else None
+
+    async def count_by_status(self) -> dict:
+        """Количество заданий по статусам"""
+        async with self.db.reader() as conn:
+            cursor = await conn.execute("SELECT status, COUNT(*) FROM send_jobs GROUP BY status")
+            rows = await cursor.fetchall()
+            await cursor.close()
+        return {row[0]: row[1] for row in rows}
+
+    async def get(self, job_id: int) -> Optional[SendJob]:
+        """Получить задание по ID"""
+        async with self.db.reader() as conn:
+            cursor = await conn.execute("SELECT * FROM send_jobs WHERE id = ?", (job_id,))
+            row = await cursor.fetchone()
+            await cursor.close()
+        return self._row_to_job(row) if row else None
+
+    def _row_to_job(self, row) -> SendJob:
+        payload = json.loads(row["payload"] or "{}")
+        return SendJob(
             id=row["id"],
-            report_number=row["report_number"],
-            chat_id=row["chat_id"],
-            user_id=row["user_id"],
-            username=row["username"],
-            user_login=row["user_login"],
-            platform=row["platform"],
-            platform_version=row["platform_version"],
-            error_time=row["error_time"],
-            server=row["server"],
-            subscriber_info=row["subscriber_info"],
-            description=row["description"],
-            media_file_id=row["media_file_id"],
-            media_type=row["media_type"],
-            message_id=row["message_id"],
-            tracking_id=row["tracking_id"] if "tracking_id" in row.keys() else None,
-            status=row["status"] if "status" in row.keys() else "new",
-            status_comment=row["status_comment"] if "status_comment" in row.keys() else None,
-            status_changed_by=row["status_changed_by"] if "status_changed_by" in row.keys() else None,
-            created_at=row["created_at"],
-            updated_at=row["updated_at"]
+            report_id=row["report_id"],
+            files=[SpooledFile(**f) for f in payload.get("files", [])],
+            cleanup_files=payload.get("cleanup", True),
+            status=row["status"],
+            attempts=row["attempts"],
+            next_attempt_at=row["next_attempt_at"],
+            last_error=row["last_error"],
         )
+
+
+@instrument_methods(DB_QUERY_SECONDS)
+class MediaRepository:
+    """Вложения, уже загруженные в Telegram (таблица media_blobs)"""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def get_file_ids(self, hashes: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """file_id по sha256 содержимого: {sha256: {media_type: file_id}}"""
+        hashes = sorted({h for h in hashes if h})
+        if not hashes:
+            return {}
+
+        placeholders = ", ".join("?" * len(hashes))
+        async with self.db.reader() as conn:
+            cursor = await conn.execute(
+                f"SELECT sha256, media_type, file_id FROM media_blobs WHERE sha256 IN ({placeholders})",
+                hashes
+            )
+            rows = await cursor.fetchall()
+            await cursor.close()
+
+        result: Dict[str, Dict[str, str]] = {}
+        for sha256, media_type, file_id in rows:
+            result.setdefault(sha256, {})[media_type] = file_id
+        return result
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Tuple
+
+CacheKey = Tuple[int, int]
+
+# Результат ожидания, если загружавший запрос был отменён
+_LEADER_CANCELLED = object()
+
+
+class AdminCache:
+    """LRU-кэш прав админа с TTL и объединением параллельных запросов"""
+
+    def __init__(self, ttl: float = 300, negative_ttl: float = 60, max_size: int = 10000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[CacheKey, Tuple[bool, float]]" = OrderedDict()
+        self._pending: Dict[CacheKey, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    async def get_or_load(
+        self, chat_id: int, user_id: int,
+        loader: Callable[[], Awaitable[bool]]
+    ) -> bool:
+        """Вернуть статус из кэша или загрузить его через loader.
+
+        Параллельные запросы одного ключа ждут один и тот же вызов loader.
+        Исключения loader не кэшируются и пробрасываются всем ожидающим.
+        Если загружающий запрос отменён, ожидающие не отменяются: первый
+        из них загружает статус заново.
+        """
+        key = (chat_id, user_id)
+
+        while True:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            pending = self._pending.get(key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            value = await asyncio.shield(pending)
+            if value is not _LEADER_CANCELLED:
+                return value
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await loader()
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение уже получит вызывающий, ожидающих может не быть
+            future.exception()
+            raise
+        except BaseException:
+            # Отмена касается только этого запроса, не ожидающих
+            future.set_result(_LEADER_CANCELLED)
+            raise
+        else:
+            self._store(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self._pending.pop(key, None)
+
+    def invalidate(self, chat_id: int, user_id: int) -> None:
+        """Сбросить закэшированный статус"""
+        self._entries.pop((chat_id, user_id), None)
+
+    def clear(self) -> None:
+        """Очистить кэш"""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Счётчики кэша"""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
+
+    def _store(self, key: CacheKey, value: bool) -> None:
+        ttl = self.ttl if value else self.negative_ttl
+        if ttl <= 0:
+            return
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
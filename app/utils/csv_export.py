@@ -0,0 +1,46 @@
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, List
+
+from app.database.models import BugReport, STATUS_LABELS
+
+CSV_EXPORT_HEADER = [
+    "ID", "Номер", "Логин", "Платформа", "Версия",
+    "Время ошибки", "Сервер", "Абонент/Заявка",
+    "Описание", "Tracking ID", "Статус", "Дата создания",
+    "Username", "User ID",
+]
+
+
+def csv_export_row(r: BugReport) -> list:
+    """Строка CSV-экспорта для репорта"""
+    created_at = r.created_at.isoformat() if isinstance(r.created_at, datetime) else r.created_at
+    return [
+        r.id, r.report_number, r.user_login, r.platform,
+        r.platform_version, r.error_time, r.server,
+        r.subscriber_info, r.description, r.tracking_id,
+        STATUS_LABELS.get(r.status, r.status),
+        created_at or "",
+        r.username or "", r.user_id,
+    ]
+
+
+async def iter_csv_chunks(batches: AsyncIterator[List[BugReport]]) -> AsyncIterator[bytes]:
+    """CSV в UTF-8 по одному куску на пачку репортов.
+
+    В памяти держится только текущая пачка, поэтому расход не зависит
+    от общего числа строк.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CSV_EXPORT_HEADER)
+
+    async for batch in batches:
+        writer.writerows(csv_export_row(r) for r in batch)
+        yield output.getvalue().encode("utf-8")
+        output.seek(0)
+        output.truncate()
+
+    if output.tell():
+        yield output.getvalue().encode("utf-8")
@@ -0,0 +1,124 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+
+logger = logging.getLogger(__name__)
+
+MessageKey = Tuple[int, int]
+
+
+def _text_hash(text: str, is_caption: bool) -> str:
+    return hashlib.sha256(f"{int(is_caption)}:{text}".encode("utf-8")).hexdigest()
+
+
+class EditScheduler:
+    """Отложенное редактирование сообщений репортов с объединением правок.
+
+    Для каждого (chat_id, message_id) хранится только последний текст;
+    правка отправляется, когда после последнего schedule прошло delay
+    секунд. Если текст совпадает с последним отправленным, правка
+    пропускается.
+    """
+
+    def __init__(self, bot: Bot, delay: float = 3.0, max_size: int = 10000):
+        self.bot = bot
+        self.delay = delay
+        self.max_size = max_size
+        self._pending: Dict[MessageKey, Tuple[str, bool, float]] = {}
+        self._tasks: Dict[MessageKey, asyncio.Task] = {}
+        self._sent: "OrderedDict[MessageKey, str]" = OrderedDict()
+        self.scheduled = 0
+        self.coalesced = 0
+        self.unchanged = 0
+        self.sent = 0
+        self.failed = 0
+
+    def schedule(self, chat_id: int, message_id: int, text: str, is_caption: bool) -> None:
+        """Запланировать правку текста (или подписи) сообщения"""
+        key = (chat_id, message_id)
+        self.scheduled += 1
+        if key in self._pending:
+            self.coalesced += 1
+        self._pending[key] = (text, is_caption, time.monotonic())
+
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._run(key))
+
+    async def flush(self) -> None:
+        """Немедленно отправить все отложенные правки (при остановке)"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        for key in list(self._pending):
+            await self._send(key)
+
+    def stats(self) -> dict:
+        """Метрики для /health"""
+        return {
+            "pending": len(self._pending),
+            "scheduled": self.scheduled,
+            "coalesced": self.coalesced,
+            "unchanged": self.unchanged,
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+    async def _run(self, key: MessageKey) -> None:
+        try:
+            while True:
+                _, _, scheduled_at = self._pending[key]
+                remaining = scheduled_at + self.delay - time.monotonic()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(remaining)
+            del self._tasks[key]
+            await self._send(key)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._tasks.pop(key, None)
+            logger.exception(f"Ошибка отложенной правки сообщения {key}: {e}")
+
+    async def _send(self, key: MessageKey) -> None:
+        text, is_caption, _ = self._pending.pop(key)
+        digest = _text_hash(text, is_caption)
+        if self._sent.get(key) == digest:
+            self.unchanged += 1
+            return
+
+        chat_id, message_id = key
+        try:
+            if is_caption:
+                await self.bot.edit_message_caption(
+                    chat_id=chat_id, message_id=message_id,
+                    caption=text, parse_mode="HTML"
+                )
+            else:
+                await self.bot.edit_message_text(
+                    chat_id=chat_id, message_id=message_id,
+                    text=text, parse_mode="HTML"
+                )
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e).lower():
+                self.failed += 1
+                logger.warning(f"Не удалось обновить сообщение в Telegram: {e}")
+                return
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"Не удалось обновить сообщение в Telegram: {e}")
+            return
+
+        self.sent += 1
+        self._sent[key] = digest
+        self._sent.move_to_end(key)
+        while len(self._sent) > self.max_size:
+            self._sent.popitem(last=False)
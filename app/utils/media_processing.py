@@ -0,0 +1,160 @@
+"""Подготовка изображений перед отправкой в Telegram.
+
+Скриншоты с телефонов приходят многомегабайтными PNG: Telegram всё равно
+пережимает их, а часть отвергает с image_process_failed. Здесь фото
+поворачиваются по EXIF, уменьшаются до max_dimension и пережимаются в JPEG
+под target_bytes. Работа идёт в ProcessPoolExecutor, чтобы не блокировать
+event loop. Pillow — необязательная зависимость: без неё этап пропускается.
+"""
+import asyncio
+import functools
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.database.models import SpooledFile
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - зависит от окружения
+    Image = None
+    ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+
+def is_available() -> bool:
+    """Установлен ли Pillow"""
+    return Image is not None
+
+
+@dataclass(frozen=True)
+class ImageOptions:
+    """Параметры пережатия фото"""
+    max_dimension: int = 2560
+    target_bytes: int = 1_500_000
+    quality: int = 85
+    min_quality: int = 50
+
+    @property
+    def variant(self) -> str:
+        """Метка варианта для ключа file_id: другие настройки — другой файл"""
+        return f"jpeg-{self.max_dimension}-{self.target_bytes}-{self.quality}"
+
+
+def process_image(src: str, dst: str, options: ImageOptions) -> Optional[int]:
+    """Повернуть, уменьшить и пережать фото из src в JPEG dst.
+
+    Выполняется в дочернем процессе. Возвращает размер результата или None,
+    если обработка не нужна (исходник уже мал и не требует поворота).
+    """
+    with Image.open(src) as image:
+        source_format = image.format
+        # 0x0112 — тег EXIF Orientation; 1 означает «без поворота»
+        rotated = image.getexif().get(0x0112, 1) != 1
+        transposed = ImageOps.exif_transpose(image)
+        too_large = max(transposed.size) > options.max_dimension
+
+        source_size = os.path.getsize(src)
+        if not (rotated or too_large or source_size > options.target_bytes):
+            return None
+
+        if transposed.mode in ("RGBA", "LA", "P"):
+            rgba = transposed.convert("RGBA")
+            result = Image.new("RGB", rgba.size, (255, 255, 255))
+            result.paste(rgba, mask=rgba.getchannel("A"))
+        else:
+            result = transposed.convert("RGB")
+        if too_large:
+            result.thumbnail((options.max_dimension, options.max_dimension), Image.LANCZOS)
+
+        quality = options.quality
+        while True:
+            buffer = io.BytesIO()
+            result.save(buffer, "JPEG", quality=quality, optimize=True)
+            if buffer.tell() <= options.target_bytes or quality <= options.min_quality:
+                break
+            quality -= 10
+
+    if buffer.tell() >= source_size and not rotated and source_format == "JPEG":
+        return None
+    with open(dst, "wb") as f:
+        f.write(buffer.getvalue())
+    return buffer.tell()
+
+
+class ImageProcessor:
+    """Пул процессов для подготовки фото из задания отправки"""
+
+    def __init__(self, options: ImageOptions = ImageOptions(), max_workers: int = 1):
+        self.options = options
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.processed = 0
+        self.skipped = 0
+        self.errors = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def prepare(
+        self, files: List[SpooledFile], known_file_ids: Dict[str, Dict[str, str]]
+    ) -> List[Tuple[SpooledFile, SpooledFile]]:
+        """Вернуть пары (исходный, для отправки) для каждого файла.
+
+        Если обработанный вариант уже есть в Telegram, повторно он не
+        создаётся — достаточно ключа с file_id. Если этот file_id не
+        примут, загрузится исходник (SpooledFile.source).
+        """
+        loop = asyncio.get_running_loop()
+        result = []
+        for file in files:
+            if file.media_type != "photo" or not file.sha256:
+                result.append((file, file))
+                continue
+
+            processed = SpooledFile(
+                path=f"{file.path}.{self.options.variant}.jpg",
+                filename=f"{(file.filename or 'image').rsplit('.', 1)[0]}.jpg",
+                content_type="image/jpeg",
+                sha256=f"{file.sha256}:{self.options.variant}",
+                source=file,
+            )
+            if processed.sha256 in known_file_ids:
+                result.append((file, processed))
+                continue
+
+            try:
+                size = await loop.run_in_executor(
+                    self._get_executor(), process_image, file.path, processed.path, self.options
+                )
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Не удалось обработать изображение {file.filename}: {e}")
+                size = None
+
+            if size is None:
+                self.skipped += 1
+                result.append((file, file))
+            else:
+                self.processed += 1
+                processed.size = size
+                result.append((file, processed))
+        return result
+
+    async def close(self) -> None:
+        """Остановить пул процессов, не блокируя event loop"""
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(executor.shutdown, wait=True, cancel_futures=True)
+            )
+
+    def stats(self) -> dict:
+        """Метрики для /health"""
+        return {"processed": self.processed, "skipped": self.skipped, "errors": self.errors}
@@ -0,0 +1,234 @@
+"""Метрики процесса в текстовом формате Prometheus.
+
+Реестр живёт в памяти процесса и отдаётся обработчиком /metrics, внешние
+сервисы и пакеты не нужны. Метрики — гистограммы и счётчики с метками;
+значения меток задаются позиционно, в порядке labelnames:
+
+    HTTP_REQUEST_SECONDS.observe(0.012, "GET", "/api/chat-reports", "200")
+"""
+import abc
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+# Границы корзин по умолчанию — как в клиентских библиотеках Prometheus
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+TELEGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(abc.ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Sequence) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: ожидаются метки {self.labelnames}, получено {labels!r}")
+        return tuple(str(value) for value in labels)
+
+    @abc.abstractmethod
+    def _samples(self) -> List[str]:
+        """Строки значений метрики без HELP и TYPE"""
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Монотонный счётчик"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными корзинами (значения в секундах)"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Метки -> [счётчики корзин (последняя — +Inf), сумма]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, *labels) -> Iterator[None]:
+        """Замерить блок кода, в том числе завершившийся исключением"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def count(self, *labels) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def _samples(self) -> List[str]:
+        samples = []
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                samples.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            samples.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            samples.append(f"{self.name}_count{labels} {cumulative}")
+        return samples
+
+
+class Registry:
+    """Набор метрик процесса"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате экспозиции Prometheus 0.0.4"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса Web App",
+    ("method", "route", "status"),
+)
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "db_query_duration_seconds", "Время вызова метода репозитория SQLite",
+    ("repository", "method"), buckets=DB_BUCKETS,
+)
+TELEGRAM_REQUEST_SECONDS = REGISTRY.histogram(
+    "telegram_api_request_duration_seconds", "Время запроса к Bot API",
+    ("method",), buckets=TELEGRAM_BUCKETS,
+)
+TELEGRAM_ERRORS = REGISTRY.counter(
+    "telegram_api_errors_total", "Ошибки запросов к Bot API по типу исключения",
+    ("method", "error"),
+)
+UPLOAD_BYTES = REGISTRY.counter(
+    "upload_bytes_total", "Принятые байты вложений (report — multipart-форма, chunk — по частям)",
+    ("kind",),
+)
+
+
+def instrument_methods(histogram: Histogram):
+    """Декоратор класса: замер всех публичных async-методов.
+
+    Метки — имя класса и имя метода. Асинхронные генераторы не оборачиваются.
+    """
+    def decorate(cls):
+        for name, func in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.iscoroutinefunction(func):
+                continue
+            setattr(cls, name, _timed_method(histogram, cls.__name__, name, func))
+        return cls
+    return decorate
+
+
+def _timed_method(histogram: Histogram, owner: str, name: str, func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started, owner, name)
+    return wrapper
+
+
+class BotApiMetricsMiddleware(BaseRequestMiddleware):
+    """Мидлварь сессии aiogram: время и ошибки каждого запроса к Bot API.
+
+    Регистрируется после RateLimitMiddleware, чтобы ожидание лимитов не
+    попадало в замер, а каждый повтор после RetryAfter считался отдельно.
+    """
+
+    async def __call__(self, make_request, bot, method):
+        api_method = getattr(method, "__api_method__", type(method).__name__)
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            TELEGRAM_ERRORS.inc(api_method, type(e).__name__)
+            raise
+        finally:
+            TELEGRAM_REQUEST_SECONDS.observe(time.perf_counter() - started, api_method)
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Union
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMediaGroup
+
+logger = logging.getLogger(__name__)
+
+ChatKey = Union[int, str]
+
+# Префиксы методов Bot API, на которые действуют лимиты отправки сообщений
+LIMITED_METHOD_PREFIXES = ("send", "edit", "copy", "forward")
+
+
+class TokenBucket:
+    """Token bucket с резервированием: каждый вызов acquire получает свой слот.
+
+    Токены могут уходить в минус — это очередь ожидающих, поэтому порядок
+    обслуживания совпадает с порядком вызовов и блокировка не нужна.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, cost: float = 1) -> float:
+        """Забрать cost токенов, вернуть время ожидания до их появления (секунды)"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= cost
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def block(self, seconds: float) -> None:
+        """Запретить отправку на seconds (ответ retry_after от Telegram)"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def is_idle(self) -> bool:
+        """Бакет полон и не заблокирован — его можно выбросить"""
+        now = time.monotonic()
+        self._refill(now)
+        return self.tokens >= self.capacity and self.blocked_until <= now
+
+
+def _message_cost(method) -> int:
+    """Сколько сообщений отправит метод: альбом — по одному на элемент"""
+    if isinstance(method, SendMediaGroup):
+        return max(1, len(method.media))
+    return 1
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """Мидлварь сессии aiogram: общий и по-чатовые лимиты на все вызовы Bot API.
+
+    Действует на методы отправки и редактирования сообщений. Перед запросом
+    ждёт токен в глобальном бакете и в бакете чата (группы и личные чаты
+    лимитируются по-разному). На TelegramRetryAfter блокирует бакет чата на
+    указанное время и повторяет запрос до max_retries раз.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        group_rate: float = 20 / 60,
+        group_burst: float = 20,
+        private_rate: float = 1,
+        private_burst: float = 3,
+        max_retries: int = 3,
+        max_chats: int = 10000,
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.private_rate = private_rate
+        self.private_burst = private_burst
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self._chats: "OrderedDict[ChatKey, TokenBucket]" = OrderedDict()
+        self.waiting = 0
+        self.requests = 0
+        self.delayed = 0
+        self.retry_after_hits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _chat_bucket(self, chat_id: ChatKey) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            if is_group:
+                bucket = TokenBucket(self.group_rate, self.group_burst)
+            else:
+                bucket = TokenBucket(self.private_rate, self.private_burst)
+            self._chats[chat_id] = bucket
+            if len(self._chats) > self.max_chats:
+                self._prune()
+        self._chats.move_to_end(chat_id)
+        return bucket
+
+    def _prune(self) -> None:
+        for key in [k for k, b in self._chats.items() if b.is_idle()]:
+            del self._chats[key]
+        while len(self._chats) > self.max_chats:
+            self._chats.popitem(last=False)
+
+    async def acquire(self, chat_id: ChatKey | None, cost: int = 1) -> float:
+        """Дождаться разрешения на cost сообщений, вернуть время ожидания"""
+        wait = self.global_bucket.reserve(cost)
+        if chat_id is not None:
+            wait = max(wait, self._chat_bucket(chat_id).reserve(cost))
+
+        self.requests += 1
+        if wait > 0:
+            self.delayed += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self.waiting -= 1
+        return wait
+
+    async def __call__(self, make_request, bot, method):
+        api_method = getattr(method, "__api_method__", "")
+        if not api_method.startswith(LIMITED_METHOD_PREFIXES):
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, "chat_id", None)
+        cost = _message_cost(method)
+        attempt = 0
+        while True:
+            await self.acquire(chat_id, cost)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.retry_after_hits += 1
+                if chat_id is not None:
+                    self._chat_bucket(chat_id).block(e.retry_after)
+                else:
+                    self.global_bucket.block(e.retry_after)
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                logger.warning(
+                    f"{api_method}: флуд-лимит для чата {chat_id}, повтор через {e.retry_after}с"
+                )
+
+    def stats(self) -> dict:
+        """Метрики для /health"""
+        return {
+            "waiting": self.waiting,
+            "chats": len(self._chats),
+            "requests": self.requests,
+            "delayed": self.delayed,
+            "retry_after": self.retry_after_hits,
+            "total_wait": round(self.total_wait, 3),
+            "max_wait": round(self.max_wait, 3),
+        }
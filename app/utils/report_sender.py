@@ -0,0 +1,238 @@
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import (
+    FSInputFile, InputMediaPhoto, InputMediaVideo, InputMediaDocument, Message
+)
+
+from app.database.models import BugReport, SentMedia, SpooledFile
+from app.utils.report_formatter import format_final_report
+
+logger = logging.getLogger(__name__)
+
+# Таймаут загрузки медиа в Telegram (секунды)
+TELEGRAM_SEND_TIMEOUT = 300
+
+# sha256 -> {media_type: file_id} уже загруженных в Telegram файлов
+KnownFileIds = Dict[str, Dict[str, str]]
+
+MEDIA_CLASSES = {
+    "photo": InputMediaPhoto,
+    "video": InputMediaVideo,
+    "document": InputMediaDocument,
+}
+
+
+@dataclass
+class SendResult:
+    """Сообщение с текстом репорта и сведения об отправленных вложениях"""
+    message: Message
+    media: List[SentMedia] = field(default_factory=list)
+
+
+def _is_media_processing_error(error: TelegramBadRequest) -> bool:
+    error_msg = str(error).lower()
+    return "image_process_failed" in error_msg or "wrong file" in error_msg
+
+
+def _on_disk(file: SpooledFile) -> SpooledFile:
+    """Файл для загрузки: несозданный вариант фото заменяется исходником"""
+    if file.source is not None and not os.path.exists(file.path):
+        return file.source
+    return file
+
+
+def _input_file(file: SpooledFile) -> FSInputFile:
+    file = _on_disk(file)
+    return FSInputFile(file.path, filename=file.filename or "file")
+
+
+def _resolve(file: SpooledFile, known: KnownFileIds) -> Tuple[str, Union[str, FSInputFile]]:
+    """Тип отправки и содержимое: file_id, если файл уже есть в Telegram"""
+    by_type = known.get(file.sha256, {}) if file.sha256 else {}
+    if file.media_type in by_type:
+        return file.media_type, by_type[file.media_type]
+    # Файл уже уходил документом после ошибки обработки — сразу так и шлём
+    if "document" in by_type:
+        return "document", by_type["document"]
+    return file.media_type, _input_file(file)
+
+
+def extract_media(message: Message, file: SpooledFile, position: int = 0) -> Optional[SentMedia]:
+    """Достать file_id вложения из ответа Telegram"""
+    if message.photo:
+        media_type, attachment = "photo", message.photo[-1]
+    elif message.video:
+        media_type, attachment = "video", message.video
+    elif message.document:
+        media_type, attachment = "document", message.document
+    else:
+        return None
+    return SentMedia(
+        sha256=file.sha256,
+        media_type=media_type,
+        file_id=attachment.file_id,
+        file_unique_id=attachment.file_unique_id,
+        size=file.size,
+        position=position,
+        message_id=message.message_id,
+    )
+
+
+def _collect(messages: List[Optional[Message]], files: List[SpooledFile]) -> List[SentMedia]:
+    result = []
+    for position, (message, file) in enumerate(zip(messages, files)):
+        if message is None:
+            continue
+        media = extract_media(message, file, position)
+        if media is not None:
+            result.append(media)
+    return result
+
+
+async def _send_single_media(
+    bot: Bot, chat_id: int, file: SpooledFile, caption_text: str, known: KnownFileIds
+) -> Message:
+    """Отправка одного медиафайла; при ошибке обработки — как документ"""
+    media_type, content = _resolve(file, known)
+    try:
+        if media_type == "photo":
+            return await bot.send_photo(
+                chat_id=chat_id, photo=content,
+                caption=caption_text, parse_mode="HTML",
+                request_timeout=TELEGRAM_SEND_TIMEOUT
+            )
+        elif media_type == "video":
+            return await bot.send_video(
+                chat_id=chat_id, video=content,
+                caption=caption_text, parse_mode="HTML",
+                request_timeout=TELEGRAM_SEND_TIMEOUT
+            )
+        else:
+            return await bot.send_document(
+                chat_id=chat_id, document=content,
+                caption=caption_text, parse_mode="HTML",
+                request_timeout=TELEGRAM_SEND_TIMEOUT
+            )
+    except TelegramBadRequest as e:
+        if _is_media_processing_error(e):
+            logger.warning(f"Ошибка обработки медиа, отправляю как документ: {e}")
+            return await bot.send_document(
+                chat_id=chat_id, document=_input_file(file),
+                caption=caption_text, parse_mode="HTML",
+                request_timeout=TELEGRAM_SEND_TIMEOUT
+            )
+        raise
+
+
+async def _send_media_group(
+    bot: Bot, chat_id: int, files: List[SpooledFile], caption_text: str, known: KnownFileIds
+) -> Tuple[Message, List[Message]]:
+    """Отправка альбома; при ошибке обработки — текст и файлы документами"""
+    media_group = []
+    for i, file in enumerate(files):
+        media_type, content = _resolve(file, known)
+        caption = caption_text if i == 0 else None
+        parse_mode = "HTML" if i == 0 else None
+        media_group.append(MEDIA_CLASSES[media_type](media=content, caption=caption, parse_mode=parse_mode))
+
+    try:
+        sent_messages = await bot.send_media_group(
+            chat_id=chat_id, media=media_group,
+            request_timeout=TELEGRAM_SEND_TIMEOUT
+        )
+        return sent_messages[0], sent_messages
+    except TelegramBadRequest as e:
+        if not _is_media_processing_error(e):
+            raise
+        logger.warning(f"Ошибка группы медиа, отправляю по отдельности: {e}")
+
+    report_msg = await bot.send_message(
+        chat_id=chat_id, text=caption_text, parse_mode="HTML"
+    )
+    documents = []
+    for file in files:
+        try:
+            documents.append(await bot.send_document(
+                chat_id=chat_id, document=_input_file(file),
+                request_timeout=TELEGRAM_SEND_TIMEOUT
+            ))
+        except Exception as doc_e:
+            logger.warning(f"Не удалось отправить файл {file.filename}: {doc_e}")
+            documents.append(None)
+    return report_msg, documents
+
+
+async def _send(
+    bot: Bot, report: BugReport, files: List[SpooledFile], known: KnownFileIds
+) -> SendResult:
+    final_text = format_final_report(report, report.username)
+
+    if len(files) > 1:
+        report_msg, messages = await _send_media_group(bot, report.chat_id, files, final_text, known)
+        return SendResult(report_msg, _collect(messages, files))
+    if len(files) == 1:
+        report_msg = await _send_single_media(bot, report.chat_id, files[0], final_text, known)
+        return SendResult(report_msg, _collect([report_msg], files))
+    report_msg = await bot.send_message(
+        chat_id=report.chat_id, text=final_text, parse_mode="HTML"
+    )
+    return SendResult(report_msg)
+
+
+async def _send_originals(
+    bot: Bot, chat_id: int, report_msg: Message, originals: List[SpooledFile],
+    known: KnownFileIds, first_position: int
+) -> List[SentMedia]:
+    """Исходники пережатых фото — документами в ответ на сообщение репорта"""
+    result = []
+    for i, file in enumerate(originals):
+        by_type = known.get(file.sha256, {}) if file.sha256 else {}
+        try:
+            message = await bot.send_document(
+                chat_id=chat_id,
+                document=by_type.get("document") or _input_file(file),
+                reply_to_message_id=report_msg.message_id,
+                request_timeout=TELEGRAM_SEND_TIMEOUT
+            )
+        except Exception as e:
+            logger.warning(f"Не удалось отправить исходник {file.filename}: {e}")
+            continue
+        media = extract_media(message, file, first_position + i)
+        if media is not None:
+            result.append(media)
+    return result
+
+
+async def send_report_message(
+    bot: Bot,
+    report: BugReport,
+    files: List[SpooledFile],
+    known_file_ids: Optional[KnownFileIds] = None,
+    originals: List[SpooledFile] = (),
+) -> SendResult:
+    """Отправить репорт с вложениями в чат.
+
+    Файлы, которые уже есть в Telegram (по sha256 в known_file_ids),
+    отправляются по file_id без повторной загрузки. Если Telegram отверг
+    сохранённый file_id, отправка повторяется с загрузкой файлов.
+    originals (исходники пережатых фото) досылаются документами.
+    """
+    known = known_file_ids or {}
+    try:
+        result = await _send(bot, report, files, known)
+    except TelegramBadRequest as e:
+        if not any(f.sha256 in known for f in files):
+            raise
+        logger.warning(f"Сохранённый file_id не принят, загружаю файлы заново: {e}")
+        result = await _send(bot, report, [_on_disk(f) for f in files], {})
+
+    if originals:
+        result.media.extend(await _send_originals(
+            bot, report.chat_id, result.message, originals, known, len(files)
+        ))
+    return result
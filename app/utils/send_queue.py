@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest, TelegramEntityTooLarge, TelegramForbiddenError,
+    TelegramMigrateToChat, TelegramNotFound, TelegramRetryAfter,
+    TelegramUnauthorizedError,
+)
+
+from app.database.models import SendJob
+from app.utils.media_processing import ImageProcessor
+from app.database.repository import BugReportRepository, MediaRepository, SendJobRepository
+from app.utils.report_sender import send_report_message
+
+logger = logging.getLogger(__name__)
+
+# Ошибки, после которых повтор бессмысленен
+PERMANENT_ERRORS = (
+    TelegramBadRequest,
+    TelegramEntityTooLarge,
+    TelegramForbiddenError,
+    TelegramMigrateToChat,
+    TelegramNotFound,
+    TelegramUnauthorizedError,
+    FileNotFoundError,
+)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Экспоненциальная задержка с джиттером для попытки attempt (с 1)"""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class SendQueue:
+    """Фоновые воркеры, отправляющие репорты из таблицы send_jobs в Telegram.
+
+    Задания хранятся в SQLite, поэтому после перезапуска недоставленные
+    репорты отправляются снова. Временные ошибки повторяются с
+    экспоненциальной задержкой, TelegramRetryAfter — через указанное время.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        report_repo: BugReportRepository,
+        job_repo: SendJobRepository,
+        media_repo: MediaRepository,
+        image_processor: Optional[ImageProcessor] = None,
+        keep_originals: bool = True,
+        workers: int = 2,
+        max_attempts: int = 8,
+        backoff_base: float = 2.0,
+        backoff_cap: float = 300.0,
+        poll_interval: float = 5.0,
+    ):
+        self.bot = bot
+        self.report_repo = report_repo
+        self.job_repo = job_repo
+        self.media_repo = media_repo
+        self.image_processor = image_processor
+        self.keep_originals = keep_originals
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.reused_files = 0
+
+    async def start(self) -> None:
+        """Вернуть прерванные задания в очередь и запустить воркеры"""
+        requeued = await self.job_repo.requeue_running()
+        if requeued:
+            logger.info(f"Возвращено в очередь прерванных заданий: {requeued}")
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"send-queue-{i}")
+            for i in range(self.workers)
+        ]
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Остановить воркеры; задание в работе будет повторено при следующем старте"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.image_processor is not None:
+            await self.image_processor.close()
+
+    def notify(self) -> None:
+        """Разбудить воркеры после постановки нового задания"""
+        self._wakeup.set()
+
+    async def stats(self) -> dict:
+        """Состояние очереди для /health"""
+        return {
+            "jobs": await self.job_repo.count_by_status(),
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "reused_files": self.reused_files,
+            "images": self.image_processor.stats() if self.image_processor else None,
+        }
+
+    async def run_once(self) -> bool:
+        """Обработать одно готовое задание; False, если очередь пуста"""
+        job = await self.job_repo.claim_next()
+        if job is None:
+            return False
+        await self._process(job)
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                if await self.run_once():
+                    continue
+                await self._wait_for_work()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Ошибка воркера очереди отправки: {e}")
+                await asyncio.sleep(1)
+
+    async def _wait_for_work(self) -> None:
+        timeout = self.poll_interval
+        next_due = await self.job_repo.next_due_at()
+        if next_due is not None:
+            timeout = max(0.0, min(timeout, next_due - time.time()))
+
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _process(self, job: SendJob) -> None:
+        report = await self.report_repo.get_by_id(job.report_id)
+        if report is None:
+            await self.job_repo.fail(job, "report not found")
+            self._cleanup(job)
+            return
+
+        files, originals = job.files, []
+        if self.image_processor is not None:
+            known_file_ids = await self.media_repo.get_file_ids(
+                h for f in job.files if f.sha256
+                for h in (f.sha256, f"{f.sha256}:{self.image_processor.options.variant}")
+            )
+            pairs = await self.image_processor.prepare(job.files, known_file_ids)
+            files = [sent for _, sent in pairs]
+            if self.keep_originals:
+                originals = [original for original, sent in pairs if sent is not original]
+        else:
+            known_file_ids = await self.media_repo.get_file_ids(f.sha256 for f in job.files)
+
+        try:
+            result = await send_report_message(self.bot, report, files, known_file_ids, originals)
+        except TelegramRetryAfter as e:
+            self._cleanup_derived(job, files)
+            self.retried += 1
+            logger.warning(f"Задание {job.id}: флуд-лимит, повтор через {e.retry_after}с")
+            await self.job_repo.retry_later(job, e.retry_after, str(e))
+            return
+        except PERMANENT_ERRORS as e:
+            self._cleanup_derived(job, files)
+            await self._give_up(job, report.report_number, e)
+            return
+        except Exception as e:
+            self._cleanup_derived(job, files)
+            if job.attempts >= self.max_attempts:
+                await self._give_up(job, report.report_number, e)
+                return
+            self.retried += 1
+            delay = backoff_delay(job.attempts, self.backoff_base, self.backoff_cap)
+            logger.warning(
+                f"Задание {job.id}: ошибка отправки ({e}), попытка {job.attempts}, "
+                f"повтор через {delay:.1f}с"
+            )
+            await self.job_repo.retry_later(job, delay, str(e))
+            return
+
+        self._cleanup_derived(job, files)
+        await self.job_repo.complete(job, result.message.message_id, result.media)
+        self.sent += 1
+        self.reused_files += sum(1 for f in files if f.sha256 in known_file_ids)
+        self._cleanup(job)
+        logger.info(f"Репорт #{report.report_number} отправлен в чат {report.chat_id}")
+
+    async def _give_up(self, job: SendJob, report_number: int, error: Exception) -> None:
+        self.failed += 1
+        logger.error(f"Задание {job.id}: репорт #{report_number} не отправлен: {error}")
+        await self.job_repo.fail(job, str(error))
+        self._cleanup(job)
+
+    def _cleanup_derived(self, job: SendJob, files) -> None:
+        """Удалить файлы, созданные обработкой изображений для этой попытки"""
+        own = {f.path for f in job.files}
+        for file in files:
+            if file.path not in own and os.path.exists(file.path):
+                os.unlink(file.path)
+
+    def _cleanup(self, job: SendJob) -> None:
+        if not job.cleanup_files:
+            return
+        for file in job.files:
+            try:
+                if os.path.exists(file.path):
+                    os.unlink(file.path)
+            except Exception as e:
+                logger.warning(f"Не удалось удалить временный файл {file.path}: {e}")
+
@@ -0,0 +1,83 @@
+"""Пропускная способность смешанной нагрузки: одно соединение против пула чтения.
+
+Запуск:
+    python -m benchmarks.bench_concurrency --rows 50000 --workers 32 --duration 5
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from app.database.connection import Database
+from app.database.repository import BugReportRepository
+from benchmarks.fixtures import fill_reports
+
+CHAT_ID = -1001
+
+
+async def _worker(repo: BugReportRepository, rows: int, deadline: float, seed: int, counts: dict) -> None:
+    rnd = random.Random(seed)
+    while time.perf_counter() < deadline:
+        roll = rnd.random()
+        if roll < 0.6:
+            await repo.get_by_chat(CHAT_ID, limit=20, offset=rnd.randrange(0, 2000))
+            counts["page"] += 1
+        elif roll < 0.75:
+            await repo.get_by_id(rnd.randrange(1, rows + 1))
+            counts["get"] += 1
+        elif roll < 0.85:
+            await repo.get_stats(CHAT_ID)
+            counts["stats"] += 1
+        elif roll < 0.95:
+            await repo.search(CHAT_ID, str(rnd.randrange(1, rows + 1)), limit=20)
+            counts["search"] += 1
+        else:
+            await repo.update(rnd.randrange(1, rows + 1), tracking_id=f"TRK-{rnd.randrange(10000)}")
+            counts["update"] += 1
+
+
+async def _run_mode(path: Path, pool_size: int, rows: int, workers: int, duration: float) -> dict:
+    db = Database(path, read_pool_size=pool_size)
+    await db.connect()
+    try:
+        repo = BugReportRepository(db)
+        counts = {"page": 0, "get": 0, "stats": 0, "search": 0, "update": 0}
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*[
+            _worker(repo, rows, deadline, seed, counts) for seed in range(workers)
+        ])
+        return counts
+    finally:
+        await db.disconnect()
+
+
+async def run(rows: int, workers: int, duration: float, pool_size: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        db = Database(path, read_pool_size=0)
+        await db.connect()
+        await fill_reports(db, rows, CHAT_ID)
+        await db.disconnect()
+
+        print(f"rows={rows} workers={workers} duration={duration}s")
+        print(f"{'mode':<16} {'ops/s':>10} {'updates/s':>10}")
+        for name, size in (("single", 0), (f"pool={pool_size}", pool_size)):
+            counts = await _run_mode(path, size, rows, workers, duration)
+            total = sum(counts.values())
+            print(f"{name:<16} {total / duration:>10.0f} {counts['update'] / duration:>10.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.workers, args.duration, args.pool_size))
+
+
+if __name__ == "__main__":
+    main()
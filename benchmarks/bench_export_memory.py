@@ -0,0 +1,76 @@
+"""Пиковая память CSV-экспорта: список + StringIO против потоковой выгрузки.
+
+Запуск:
+    python -m benchmarks.bench_export_memory --rows 500000
+"""
+import argparse
+import asyncio
+import csv
+import io
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from app.database.connection import Database
+from app.database.repository import BugReportRepository
+from app.utils.csv_export import CSV_EXPORT_HEADER, csv_export_row, iter_csv_chunks
+from benchmarks.fixtures import fill_reports
+
+CHAT_ID = -1001
+
+
+async def _export_in_memory(repo: BugReportRepository) -> int:
+    """Прежняя реализация: все репорты в список, весь CSV в одну строку"""
+    reports = await repo.export_chat_reports(CHAT_ID)
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CSV_EXPORT_HEADER)
+    for r in reports:
+        writer.writerow(csv_export_row(r))
+    return len(output.getvalue().encode("utf-8"))
+
+
+async def _export_streaming(repo: BugReportRepository) -> int:
+    """Потоковая выгрузка: куски сразу уходят в ответ (здесь — отбрасываются)"""
+    total = 0
+    async for chunk in iter_csv_chunks(repo.iter_chat_reports(CHAT_ID)):
+        total += len(chunk)
+    return total
+
+
+async def _measure(name: str, export) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = await export()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<12} {size / 2**20:>10.1f} {peak / 2**20:>12.1f} {elapsed:>10.2f}")
+
+
+async def run(rows: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(Path(tmp) / "bench.db")
+        await db.connect()
+        try:
+            await fill_reports(db, rows, CHAT_ID)
+            repo = BugReportRepository(db)
+
+            print(f"rows={rows}")
+            print(f"{'mode':<12} {'csv, MB':>10} {'peak, MB':>12} {'time, s':>10}")
+            await _measure("in-memory", lambda: _export_in_memory(repo))
+            await _measure("streaming", lambda: _export_streaming(repo))
+        finally:
+            await db.disconnect()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows))
+
+
+if __name__ == "__main__":
+    main()
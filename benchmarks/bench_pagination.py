@@ -0,0 +1,70 @@
+"""Задержка страницы N: OFFSET против курсора (created_at, id).
+
+Запуск:
+    python -m benchmarks.bench_pagination --rows 50000 --page-size 20
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from app.database.connection import Database
+from app.database.repository import BugReportRepository, encode_cursor
+from benchmarks.fixtures import fill_reports
+
+CHAT_ID = -1001
+
+
+async def _timed(coro_factory, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await coro_factory()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+async def run(rows: int, page_size: int, repeats: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(Path(tmp) / "bench.db")
+        await db.connect()
+        try:
+            await fill_reports(db, rows, CHAT_ID)
+            repo = BugReportRepository(db)
+
+            print(f"rows={rows} page_size={page_size}")
+            print(f"{'page':>8} {'offset, ms':>12} {'cursor, ms':>12}")
+
+            page = 1
+            while (page - 1) * page_size < rows:
+                offset = (page - 1) * page_size
+                cursor = None
+                if offset:
+                    # Курсор = последняя строка предыдущей страницы
+                    prev = await repo.get_by_chat(CHAT_ID, limit=1, offset=offset - 1)
+                    cursor = encode_cursor(prev[0])
+
+                offset_ms = await _timed(
+                    lambda: repo.get_by_chat(CHAT_ID, limit=page_size, offset=offset), repeats
+                )
+                cursor_ms = await _timed(
+                    lambda: repo.get_by_chat(CHAT_ID, limit=page_size, cursor=cursor), repeats
+                )
+                print(f"{page:>8} {offset_ms:>12.2f} {cursor_ms:>12.2f}")
+                page *= 4
+        finally:
+            await db.disconnect()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.page_size, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
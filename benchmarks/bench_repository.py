@@ -0,0 +1,204 @@
+"""Методы BugReportRepository на большом синтетическом наборе.
+
+Набор строит benchmarks.fixtures.generate_reports: одинаковые --rows и
+--seed дают одинаковые данные. Для каждого сценария считаются min, медиана
+и p95 в миллисекундах; результат сохраняется в JSON. С --compare медианы
+сравниваются с прошлым запуском, и замедление больше --threshold раз
+(и больше --min-delta-ms, чтобы не ловить шум долей миллисекунды) даёт код
+выхода 1.
+
+Запуск:
+    python -m benchmarks.bench_repository --rows 100000
+    python -m benchmarks.bench_repository --rows 1000000 --compare benchmarks/results/base.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.database.connection import Database
+from app.database.models import BugReport
+from app.database.repository import BugReportRepository, encode_cursor
+from benchmarks.fixtures import Dataset, fill_dataset
+
+RESULTS_DIR = Path(__file__).parent / "results"
+PAGE_SIZE = 20
+
+
+def _summary(samples: List[float]) -> dict:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+    return {
+        "repeats": len(samples),
+        "min_ms": round(ordered[0], 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(p95, 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+    }
+
+
+async def _measure(factory: Callable[[int], Awaitable], repeats: int) -> dict:
+    """Вызвать factory(i) repeats раз после одного прогрева"""
+    await factory(0)
+    samples = []
+    for i in range(repeats):
+        started = time.perf_counter()
+        await factory(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    return _summary(samples)
+
+
+async def _scenarios(
+    repo: BugReportRepository, dataset: Dataset, seed: int
+) -> Dict[str, Tuple[Callable[[int], Awaitable], float]]:
+    """Сценарии: имя -> (factory(i), доля от --repeats)"""
+    chat_id = dataset.largest_chat
+    user_id, user_chat_id = dataset.busiest_user
+    rnd = random.Random(seed)
+    random_ids = [rnd.randrange(1, dataset.rows + 1) for _ in range(1000)]
+    report_numbers = [rnd.randrange(1, dataset.chat_sizes[chat_id] + 1) for _ in range(1000)]
+
+    # Курсор на середину самого большого чата — «глубокая» страница
+    middle = await repo.get_by_chat(chat_id, limit=1, offset=dataset.chat_sizes[chat_id] // 2)
+    deep_cursor = encode_cursor(middle[0])
+
+    def new_report(i: int) -> BugReport:
+        return BugReport(
+            id=None, report_number=0, chat_id=chat_id, user_id=user_id,
+            username="bench", user_login="bench", platform="iOS", platform_version="17.5",
+            error_time="2026-01-01 10:00", server="Corbina", subscriber_info=None,
+            description=f"Новый репорт бенчмарка номер {i}: приложение зависает на загрузке.",
+        )
+
+    return {
+        "get_by_id": (lambda i: repo.get_by_id(random_ids[i % len(random_ids)]), 1.0),
+        "get_by_chat.first_page": (lambda i: repo.get_by_chat(chat_id, limit=PAGE_SIZE), 1.0),
+        "get_by_chat.deep_cursor": (
+            lambda i: repo.get_by_chat(chat_id, limit=PAGE_SIZE, cursor=deep_cursor), 1.0
+        ),
+        "get_by_chat.status": (
+            lambda i: repo.get_by_chat(chat_id, status="revision", limit=PAGE_SIZE), 1.0
+        ),
+        "get_by_chat_json.summary": (
+            lambda i: repo.get_by_chat_json(chat_id, limit=PAGE_SIZE, summary_chars=200), 1.0
+        ),
+        "get_by_user": (lambda i: repo.get_by_user(user_id, user_chat_id, limit=PAGE_SIZE), 1.0),
+        "search.number": (
+            lambda i: repo.search(chat_id, str(report_numbers[i % len(report_numbers)]), limit=PAGE_SIZE), 1.0
+        ),
+        "search.common_word": (lambda i: repo.search(chat_id, dataset.common_word, limit=PAGE_SIZE), 0.2),
+        "search.rare_word": (lambda i: repo.search(chat_id, dataset.rare_word, limit=PAGE_SIZE), 1.0),
+        "get_stats": (lambda i: repo.get_stats(chat_id), 1.0),
+        "export_chat_reports": (lambda i: repo.export_chat_reports(chat_id), 0.05),
+        # Пишущий сценарий последним: он меняет набор
+        "create": (lambda i: repo.create(new_report(i)), 1.0),
+    }
+
+
+def _environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+    }
+
+
+async def run(rows: int, seed: int, repeats: int, only: Optional[List[str]]) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(Path(tmp) / "bench.db")
+        await db.connect()
+        try:
+            started = time.perf_counter()
+            dataset = await fill_dataset(db, rows, seed)
+            generate_seconds = time.perf_counter() - started
+            print(f"rows={rows} seed={seed} chats={len(dataset.chat_ids)} "
+                  f"largest_chat={dataset.chat_sizes[dataset.largest_chat]} "
+                  f"generated in {generate_seconds:.1f}s")
+
+            repo = BugReportRepository(db)
+            results = {}
+            print(f"{'scenario':<28} {'min, ms':>10} {'median, ms':>11} {'p95, ms':>10}")
+            for name, (factory, share) in (await _scenarios(repo, dataset, seed)).items():
+                if only and name not in only:
+                    continue
+                result = await _measure(factory, max(1, round(repeats * share)))
+                results[name] = result
+                print(f"{name:<28} {result['min_ms']:>10.2f} {result['median_ms']:>11.2f} {result['p95_ms']:>10.2f}")
+        finally:
+            await db.disconnect()
+
+    return {
+        "benchmark": "repository",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "params": {"rows": rows, "seed": seed, "repeats": repeats},
+        "environment": _environment(),
+        "dataset": {
+            "chats": len(dataset.chat_ids),
+            "largest_chat_rows": dataset.chat_sizes[dataset.largest_chat],
+            "busiest_user_rows": dataset.busiest_user_rows,
+            "generate_seconds": round(generate_seconds, 2),
+        },
+        "scenarios": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta_ms: float = 0.5) -> List[str]:
+    """Напечатать сравнение медиан и вернуть замедлившиеся сценарии"""
+    if current["params"] != baseline["params"]:
+        print(f"Внимание: параметры отличаются от базового запуска: {baseline['params']}")
+    regressions = []
+    print(f"{'scenario':<28} {'base, ms':>10} {'now, ms':>10} {'ratio':>7}")
+    for name, result in current["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            print(f"{name:<28} {'-':>10} {result['median_ms']:>10.2f} {'new':>7}")
+            continue
+        ratio = result["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        slower = ratio > threshold and result["median_ms"] - base["median_ms"] > min_delta_ms
+        mark = " !" if slower else ""
+        print(f"{name:<28} {base['median_ms']:>10.2f} {result['median_ms']:>10.2f} {ratio:>6.2f}x{mark}")
+        if slower:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--only", nargs="*", help="запустить только эти сценарии")
+    parser.add_argument("--output", type=Path, help="файл результата (по умолчанию benchmarks/results/)")
+    parser.add_argument("--compare", type=Path, help="JSON прошлого запуска для сравнения")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="допустимое замедление медианы, раз")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                        help="меньшая разница медиан не считается замедлением")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.rows, args.seed, args.repeats, args.only))
+
+    output = args.output or RESULTS_DIR / f"repository-{args.rows}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Результат: {output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(result, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"Замедление больше {args.threshold}x: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Сериализация страницы списка: строки SQLite → BugReport → JSON.
+
+«До» — прежний путь: row.keys() на каждое поле миграций, dataclass без
+__slots__ и json.dumps, как в web.json_response. «После» — карта колонок
+на выборку, BugReport со __slots__ и webapp.json_codec (orjson, если
+установлен).
+
+Запуск:
+    python -m benchmarks.bench_serialization --rows 100 --repeats 500
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.database.connection import Database
+from app.database.models import BugReport
+from app.database.repository import rows_to_reports
+from benchmarks.fixtures import fill_reports
+from webapp import json_codec
+
+CHAT_ID = -1001
+
+
+@dataclass
+class _LegacyBugReport(BugReport):
+    """BugReport с __dict__, как до __slots__"""
+
+
+def _legacy_row_to_report(row) -> BugReport:
+    return _LegacyBugReport(
+        id=row["id"],
+        report_number=row["report_number"],
+        chat_id=row["chat_id"],
+        user_id=row["user_id"],
+        username=row["username"],
+        user_login=row["user_login"],
+        platform=row["platform"],
+        platform_version=row["platform_version"],
+        error_time=row["error_time"],
+        server=row["server"],
+        subscriber_info=row["subscriber_info"],
+        description=row["description"],
+        media_file_id=row["media_file_id"],
+        media_type=row["media_type"],
+        message_id=row["message_id"],
+        tracking_id=row["tracking_id"] if "tracking_id" in row.keys() else None,
+        status=row["status"] if "status" in row.keys() else "new",
+        status_comment=row["status_comment"] if "status_comment" in row.keys() else None,
+        status_changed_by=row["status_changed_by"] if "status_changed_by" in row.keys() else None,
+        created_at=row["created_at"],
+        updated_at=row["updated_at"]
+    )
+
+
+def _before(rows) -> bytes:
+    reports = [_legacy_row_to_report(row) for row in rows]
+    payload = {"success": True, "reports": [r.to_dict(include_admin_fields=True) for r in reports]}
+    return json.dumps(payload).encode("utf-8")
+
+
+def _after(rows) -> bytes:
+    reports = rows_to_reports(rows)
+    payload = {"success": True, "reports": [r.to_dict(include_admin_fields=True) for r in reports]}
+    return json_codec.dumps(payload)
+
+
+def _timed(func, rows, repeats: int) -> float:
+    """Лучшее время одного вызова, мкс"""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func(rows)
+        best = min(best, time.perf_counter() - started)
+    return best * 1_000_000
+
+
+async def run(rows: int, repeats: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(Path(tmp) / "bench.db")
+        await db.connect()
+        try:
+            await fill_reports(db, rows, CHAT_ID)
+            async with db.reader() as conn:
+                cursor = await conn.execute(
+                    "SELECT * FROM bug_reports WHERE chat_id = ? ORDER BY id LIMIT ?", (CHAT_ID, rows)
+                )
+                fetched = await cursor.fetchall()
+                await cursor.close()
+        finally:
+            await db.disconnect()
+
+    before_us = _timed(_before, fetched, repeats)
+    after_us = _timed(_after, fetched, repeats)
+    print(f"rows={len(fetched)} repeats={repeats} json={json_codec.BACKEND}")
+    print(f"{'path':>8} {'µs':>10} {'bytes':>8}")
+    print(f"{'before':>8} {before_us:>10.1f} {len(_before(fetched)):>8}")
+    print(f"{'after':>8} {after_us:>10.1f} {len(_after(fetched)):>8}")
+    print(f"speedup x{before_us / after_us:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
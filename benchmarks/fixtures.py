@@ -0,0 +1,174 @@
+"""Общие данные для бенчмарков"""
+import itertools
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from app.database.connection import Database
+
+
+async def fill_reports(db: Database, rows: int, chat_id: int, batch_size: int = 10000) -> None:
+    """Вставить rows репортов в один чат напрямую, минуя репозиторий"""
+    start = datetime(2024, 1, 1)
+    sql = """INSERT INTO bug_reports
+        (report_number, chat_id, user_id, username, user_login, platform,
+         platform_version, error_time, server, description, status, created_at)
+        VALUES (?, ?, ?, 'bench', 'login', 'iOS', '17', '2024-01-01 00:00',
+                'Corbina', 'Описание ошибки для бенчмарка', 'new', ?)"""
+    for first in range(1, rows + 1, batch_size):
+        last = min(first + batch_size, rows + 1)
+        await db.connection.executemany(sql, [
+            (n, chat_id, n % 500, (start + timedelta(seconds=n // 3)).strftime("%Y-%m-%d %H:%M:%S"))
+            for n in range(first, last)
+        ])
+    await db.connection.commit()
+
+
+# Синтетический набор, похожий на рабочую базу: немного больших чатов и
+# длинный хвост маленьких, у каждого чата свои активные пользователи,
+# описания на русском, статусы в типичной пропорции
+_PLATFORMS = (("iOS", ("16.7", "17.4", "17.5", "18.0")), ("Android", ("12", "13", "14")))
+_SERVERS = ("Corbina", "Beeline")
+_STATUS_WEIGHTS = (("new", 30), ("in_progress", 20), ("completed", 35), ("revision", 5), ("trash", 10))
+_SUBJECTS = (
+    "Приложение", "Экран оплаты", "Личный кабинет", "Поиск", "Лента новостей",
+    "Чат поддержки", "Профиль", "Уведомление", "Видеоплеер", "Каталог тарифов",
+)
+_SYMPTOMS = (
+    "вылетает при запуске", "зависает на загрузке", "показывает пустой экран",
+    "не сохраняет изменения", "долго открывается", "выдаёт ошибку сети",
+    "дублирует платёж", "сбрасывает авторизацию", "не отправляет код подтверждения",
+    "неправильно отображает баланс",
+)
+_CONDITIONS = (
+    "после обновления", "при слабом сигнале", "в роуминге", "при входе через СМС",
+    "после смены тарифа", "в тёмной теме", "при повороте экрана", "с включённым VPN",
+)
+_DETAILS = (
+    "Повторяется стабильно, перезагрузка телефона не помогает.",
+    "Воспроизводится примерно в половине случаев.",
+    "На другом устройстве с той же учётной записью всё работает.",
+    "Очистка кэша помогает ненадолго, потом ошибка возвращается.",
+    "Скриншот и запись экрана приложены к заявке.",
+    "Абонент ждёт ответа, просит связаться по почте.",
+)
+# Редкое слово — для замера выборочного полнотекстового поиска
+RARE_WORD = "ксилофон"
+
+
+def _zipf_cum_weights(size: int, exponent: float = 1.1) -> List[float]:
+    total = 0.0
+    cum = []
+    for rank in range(1, size + 1):
+        total += 1.0 / rank ** exponent
+        cum.append(total)
+    return cum
+
+
+@dataclass
+class Dataset:
+    """Параметры сгенерированного набора для сценариев бенчмарка"""
+    rows: int
+    seed: int
+    chat_ids: List[int]
+    chat_sizes: Dict[int, int]
+    busiest_user: Tuple[int, int]
+    busiest_user_rows: int
+    common_word: str = "ошибку"
+    rare_word: str = RARE_WORD
+
+    @property
+    def largest_chat(self) -> int:
+        return max(self.chat_sizes, key=self.chat_sizes.get)
+
+
+def generate_reports(
+    rows: int, seed: int = 42, chats: int = 200, users_per_chat: int = 300
+) -> Iterator[tuple]:
+    """Детерминированный поток строк bug_reports (одинаковый seed — одинаковые данные).
+
+    Кортеж в порядке колонок _DATASET_INSERT_SQL.
+    """
+    rnd = random.Random(seed)
+    chat_cum = _zipf_cum_weights(chats)
+    user_cum = _zipf_cum_weights(users_per_chat)
+    status_names = [name for name, _ in _STATUS_WEIGHTS]
+    status_cum = list(itertools.accumulate(weight for _, weight in _STATUS_WEIGHTS))
+    chat_indexes = range(chats)
+    user_indexes = range(users_per_chat)
+    numbers = [0] * chats
+
+    start = datetime(2024, 1, 1)
+    # Два года равномерно, с секундной точностью
+    step = 2 * 365 * 86400 / max(rows, 1)
+
+    for n in range(rows):
+        chat_index = rnd.choices(chat_indexes, cum_weights=chat_cum)[0]
+        user_index = rnd.choices(user_indexes, cum_weights=user_cum)[0]
+        numbers[chat_index] += 1
+        platform, versions = _PLATFORMS[rnd.random() < 0.45]
+        status = rnd.choices(status_names, cum_weights=status_cum)[0]
+
+        sentences = [
+            f"{rnd.choice(_SUBJECTS)} {rnd.choice(_SYMPTOMS)} {rnd.choice(_CONDITIONS)}.",
+            f"Абонент видит ошибку с кодом {rnd.randrange(100, 1000)}.",
+        ]
+        sentences += rnd.sample(_DETAILS, rnd.randrange(0, 4))
+        if rnd.random() < 0.001:
+            sentences.append(f"В логах упоминается {RARE_WORD}.")
+
+        created_at = (start + timedelta(seconds=int(n * step))).strftime("%Y-%m-%d %H:%M:%S")
+        user_id = 100000 + chat_index * 1000 + user_index
+        yield (
+            numbers[chat_index],
+            -1000000 - chat_index,
+            user_id,
+            f"user{user_id}",
+            f"login{user_id}",
+            platform,
+            rnd.choice(versions),
+            created_at[:16],
+            rnd.choice(_SERVERS),
+            f"+7 9{rnd.randrange(10 ** 8, 10 ** 9)}" if rnd.random() < 0.3 else None,
+            " ".join(sentences),
+            status,
+            f"BUG-{n + 1}" if status != "new" else None,
+            created_at,
+            created_at,
+        )
+
+
+_DATASET_INSERT_SQL = """INSERT INTO bug_reports
+    (report_number, chat_id, user_id, username, user_login, platform,
+     platform_version, error_time, server, subscriber_info, description,
+     status, tracking_id, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+
+async def fill_dataset(
+    db: Database, rows: int, seed: int = 42, batch_size: int = 10000, **generator_options
+) -> Dataset:
+    """Заполнить базу набором generate_reports, минуя репозиторий (триггеры работают)"""
+    chat_sizes: Dict[int, int] = {}
+    user_sizes: Dict[Tuple[int, int], int] = {}
+    rows_iter = generate_reports(rows, seed, **generator_options)
+    while True:
+        batch = list(itertools.islice(rows_iter, batch_size))
+        if not batch:
+            break
+        for row in batch:
+            chat_sizes[row[1]] = chat_sizes.get(row[1], 0) + 1
+            user_sizes[(row[2], row[1])] = user_sizes.get((row[2], row[1]), 0) + 1
+        await db.connection.executemany(_DATASET_INSERT_SQL, batch)
+        await db.connection.commit()
+
+    busiest_user = max(user_sizes, key=user_sizes.get) if user_sizes else (0, 0)
+    return Dataset(
+        rows=rows,
+        seed=seed,
+        chat_ids=sorted(chat_sizes),
+        chat_sizes=chat_sizes,
+        busiest_user=busiest_user,
+        busiest_user_rows=user_sizes.get(busiest_user, 0),
+    )
@@ -10,10 +10,19 @@ from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 
-from config import BOT_TOKEN, DB_PATH, WEBAPP_URL, WEBAPP_PORT, TELEGRAM_LOCAL, TELEGRAM_API_URL
+from config import (
+    BOT_TOKEN, DB_PATH, DB_READ_POOL_SIZE, WEBAPP_URL, WEBAPP_PORT, TELEGRAM_LOCAL, TELEGRAM_API_URL,
+    SEND_QUEUE_WORKERS, SEND_QUEUE_MAX_ATTEMPTS,
+    RATE_LIMIT_GLOBAL_PER_SEC, RATE_LIMIT_GROUP_PER_MIN, RATE_LIMIT_PRIVATE_PER_SEC,
+    IMAGE_PROCESSING, IMAGE_MAX_DIMENSION, IMAGE_TARGET_BYTES, IMAGE_KEEP_ORIGINAL, IMAGE_WORKERS,
+)
 from app.database.connection import Database
-from app.database.repository import BugReportRepository
+from app.database.repository import BugReportRepository, MediaRepository, SendJobRepository
 from app.handlers import webapp_handler
+from app.utils import media_processing
+from app.utils.metrics import BotApiMetricsMiddleware
+from app.utils.rate_limiter import RateLimitMiddleware
+from app.utils.send_queue import SendQueue
 
 logging.basicConfig(
     level=logging.INFO,
@@ -40,7 +49,7 @@ class DatabaseMiddleware(BaseMiddleware):
 
 async def main():
     """Главная функция запуска бота"""
-    db = Database(DB_PATH)
+    db = Database(DB_PATH, read_pool_size=DB_READ_POOL_SIZE)
 
     await db.connect()
     logger.info("База данных подключена")
@@ -60,6 +69,16 @@ async def main():
         session=session
     )
 
+    rate_limiter = RateLimitMiddleware(
+        global_rate=RATE_LIMIT_GLOBAL_PER_SEC,
+        group_rate=RATE_LIMIT_GROUP_PER_MIN / 60,
+        group_burst=RATE_LIMIT_GROUP_PER_MIN,
+        private_rate=RATE_LIMIT_PRIVATE_PER_SEC,
+    )
+    bot.session.middleware(rate_limiter)
+    # После лимитера: замеряется сам запрос к Telegram, без ожидания токена
+    bot.session.middleware(BotApiMetricsMiddleware())
+
     bot_info = await bot.get_me()
     logger.info(f"Бот @{bot_info.username} запущен (id={bot_info.id})")
 
@@ -72,6 +91,27 @@ async def main():
     webapp_handler.set_bot_info(bot_info)
     dp.include_router(webapp_handler.router)
 
+    image_processor = None
+    if IMAGE_PROCESSING:
+        if media_processing.is_available():
+            image_processor = media_processing.ImageProcessor(
+                media_processing.ImageOptions(
+                    max_dimension=IMAGE_MAX_DIMENSION, target_bytes=IMAGE_TARGET_BYTES
+                ),
+                max_workers=IMAGE_WORKERS,
+            )
+        else:
+            logger.warning("IMAGE_PROCESSING включён, но Pillow не установлен — фото отправляются как есть")
+
+    send_queue = SendQueue(
+        bot, report_repo, SendJobRepository(db), MediaRepository(db),
+        image_processor=image_processor,
+        keep_originals=IMAGE_KEEP_ORIGINAL,
+        workers=SEND_QUEUE_WORKERS, max_attempts=SEND_QUEUE_MAX_ATTEMPTS
+    )
+    await send_queue.start()
+    logger.info("Очередь отправки запущена")
+
     webapp_runner = None
     if WEBAPP_URL:
         from webapp.server import start_webapp
@@ -79,6 +119,8 @@ async def main():
             bot=bot,
             report_repo=report_repo,
             bot_token=BOT_TOKEN,
+            send_queue=send_queue,
+            rate_limiter=rate_limiter,
             port=WEBAPP_PORT
         )
         logger.info(f"Web App сервер запущен на порту {WEBAPP_PORT}")
@@ -94,6 +136,7 @@ async def main():
         if webapp_runner:
             await webapp_runner.cleanup()
             logger.info("Web App сервер остановлен")
+        await send_queue.stop()
         await db.disconnect()
         logger.info("База данных отключена")
         await bot.session.close()
@@ -6,6 +6,7 @@ load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 DB_PATH = Path(os.getenv("DB_PATH", "data/bug_reports.db"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "4"))
 
 WEBAPP_URL = os.getenv("WEBAPP_URL", "")
 WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", "8080"))
@@ -16,6 +17,33 @@ TELEGRAM_API_HASH = os.getenv("TELEGRAM_API_HASH", "")
 TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "http://localhost:8081")
 TELEGRAM_LOCAL_FILES_DIR = Path(os.getenv("TELEGRAM_LOCAL_FILES_DIR", "data/telegram-files"))
 
+ADMIN_CACHE_TTL = int(os.getenv("ADMIN_CACHE_TTL", "300"))
+ADMIN_CACHE_NEGATIVE_TTL = int(os.getenv("ADMIN_CACHE_NEGATIVE_TTL", "60"))
+ADMIN_CACHE_MAX_SIZE = int(os.getenv("ADMIN_CACHE_MAX_SIZE", "10000"))
+
+SPOOL_DIR = Path(os.getenv("SPOOL_DIR", "data/spool"))
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "data/uploads"))
+UPLOAD_MAX_CONCURRENT = int(os.getenv("UPLOAD_MAX_CONCURRENT", "4"))
+UPLOAD_MAX_INFLIGHT_MB = int(os.getenv("UPLOAD_MAX_INFLIGHT_MB", "1024"))
+UPLOAD_MIN_FREE_DISK_MB = int(os.getenv("UPLOAD_MIN_FREE_DISK_MB", "1024"))
+SEND_QUEUE_WORKERS = int(os.getenv("SEND_QUEUE_WORKERS", "2"))
+SEND_QUEUE_MAX_ATTEMPTS = int(os.getenv("SEND_QUEUE_MAX_ATTEMPTS", "8"))
+
+RATE_LIMIT_GLOBAL_PER_SEC = float(os.getenv("RATE_LIMIT_GLOBAL_PER_SEC", "30"))
+RATE_LIMIT_GROUP_PER_MIN = float(os.getenv("RATE_LIMIT_GROUP_PER_MIN", "20"))
+RATE_LIMIT_PRIVATE_PER_SEC = float(os.getenv("RATE_LIMIT_PRIVATE_PER_SEC", "1"))
+
+EDIT_DEBOUNCE_SECONDS = float(os.getenv("EDIT_DEBOUNCE_SECONDS", "3"))
+
+# Отдавать собранную статику из webapp/static/dist (собирается при запуске)
+STATIC_BUILD = os.getenv("STATIC_BUILD", "").lower() in ("true", "1", "yes")
+
+IMAGE_PROCESSING = os.getenv("IMAGE_PROCESSING", "").lower() in ("true", "1", "yes")
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "2560"))
+IMAGE_TARGET_BYTES = int(os.getenv("IMAGE_TARGET_BYTES", "1500000"))
+IMAGE_KEEP_ORIGINAL = os.getenv("IMAGE_KEEP_ORIGINAL", "true").lower() in ("true", "1", "yes")
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "1"))
+
 if not BOT_TOKEN:
     raise ValueError("BOT_TOKEN не установлен в переменных окружения")
 
@@ -3,9 +3,13 @@ from pathlib import Path
 
 import pytest
 import pytest_asyncio
+from aiohttp.test_utils import TestClient, TestServer
 
 from app.database.connection import Database
 from app.database.repository import BugReportRepository
+from webapp.server import create_app
+from webapp.session import derive_session_key, derive_webapp_secret
+from webapp.uploads import UploadStore
 
 
 @pytest.fixture(scope="session")
@@ -29,3 +33,18 @@ async def db(tmp_path):
 async def repo(db):
     """Repository backed by temp database."""
     return BugReportRepository(db)
+
+
+@pytest_asyncio.fixture
+async def webapp_client(repo, tmp_path):
+    """aiohttp test client for the Web App backed by the temp database."""
+    from tests.test_validate_init_data import BOT_TOKEN
+
+    app = create_app()
+    app["upload_store"] = UploadStore(tmp_path / "uploads", max_size=1024 * 1024)
+    app["report_repo"] = repo
+    app["bot_token"] = BOT_TOKEN
+    app["webapp_secret"] = derive_webapp_secret(BOT_TOKEN)
+    app["session_key"] = derive_session_key(BOT_TOKEN)
+    async with TestClient(TestServer(app)) as client:
+        yield client
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from app.utils.admin_cache import AdminCache
+
+
+class _Loader:
+    def __init__(self, result=True, delay=0.0, error=None):
+        self.result = result
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+class TestAdminCache:
+    @pytest.mark.asyncio
+    async def test_hit_after_first_load(self):
+        cache = AdminCache()
+        loader = _Loader(result=True)
+
+        assert await cache.get_or_load(-100, 1, loader) is True
+        assert await cache.get_or_load(-100, 1, loader) is True
+
+        assert loader.calls == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_coalesced(self):
+        cache = AdminCache()
+        loader = _Loader(result=True, delay=0.05)
+
+        results = await asyncio.gather(*[
+            cache.get_or_load(-100, 1, loader) for _ in range(10)
+        ])
+
+        assert results == [True] * 10
+        assert loader.calls == 1
+        assert cache.stats()["coalesced"] == 9
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_waiters(self):
+        cache = AdminCache()
+        loader = _Loader(result=True, delay=0.05)
+
+        leader = asyncio.create_task(cache.get_or_load(-100, 1, loader))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_load(-100, 1, loader))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await waiter is True
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert loader.calls == 2
+        assert cache.stats()["coalesced"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_keeps_leader(self):
+        cache = AdminCache()
+        loader = _Loader(result=True, delay=0.05)
+
+        leader = asyncio.create_task(cache.get_or_load(-100, 1, loader))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_load(-100, 1, loader))
+        await asyncio.sleep(0)
+        waiter.cancel()
+
+        assert await leader is True
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert loader.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_positive_entry_expires(self):
+        cache = AdminCache(ttl=0.01)
+        loader = _Loader(result=True)
+
+        await cache.get_or_load(-100, 1, loader)
+        await asyncio.sleep(0.02)
+        await cache.get_or_load(-100, 1, loader)
+
+        assert loader.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_negative_ttl_separate(self):
+        cache = AdminCache(ttl=60, negative_ttl=0)
+        loader = _Loader(result=False)
+
+        await cache.get_or_load(-100, 1, loader)
+        await cache.get_or_load(-100, 1, loader)
+
+        assert loader.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_not_cached(self):
+        cache = AdminCache()
+        failing = _Loader(error=RuntimeError("429"))
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load(-100, 1, failing)
+
+        loader = _Loader(result=True)
+        assert await cache.get_or_load(-100, 1, loader) is True
+        assert loader.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        cache = AdminCache(max_size=2)
+        loader = _Loader(result=True)
+
+        await cache.get_or_load(-100, 1, loader)
+        await cache.get_or_load(-100, 2, loader)
+        await cache.get_or_load(-100, 1, loader)
+        await cache.get_or_load(-100, 3, loader)
+
+        assert cache.stats()["size"] == 2
+        assert cache.stats()["evictions"] == 1
+
+        await cache.get_or_load(-100, 1, loader)
+        assert loader.calls == 3
+
+    @pytest.mark.asyncio
+    async def test_invalidate(self):
+        cache = AdminCache()
+        loader = _Loader(result=True)
+
+        await cache.get_or_load(-100, 1, loader)
+        cache.invalidate(-100, 1)
+        await cache.get_or_load(-100, 1, loader)
+
+        assert loader.calls == 2
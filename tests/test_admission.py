@@ -0,0 +1,67 @@
+import pytest
+
+from webapp import admission as admission_module
+from webapp.admission import AdmissionRejected, UploadAdmission
+
+
+@pytest.fixture
+def free_space(monkeypatch):
+    free = {"bytes": 10_000}
+    monkeypatch.setattr(admission_module, "_free_space", lambda path: free["bytes"])
+    return free
+
+
+class TestUploadAdmission:
+    def test_limits_concurrent_uploads(self, free_space, tmp_path):
+        admission = UploadAdmission(max_concurrent=1, max_bytes=1000, min_free_bytes=0)
+
+        with admission.admit(10, tmp_path):
+            with pytest.raises(AdmissionRejected) as exc:
+                with admission.admit(10, tmp_path):
+                    pass
+            assert exc.value.reason == "concurrency"
+            assert exc.value.retry_after == admission.retry_after
+
+        with admission.admit(10, tmp_path):
+            pass
+        assert admission.stats()["active"] == 0
+        assert admission.stats()["rejected"]["concurrency"] == 1
+
+    def test_limits_bytes_in_flight(self, free_space, tmp_path):
+        admission = UploadAdmission(max_concurrent=10, max_bytes=100, min_free_bytes=0)
+
+        with admission.admit(60, tmp_path):
+            assert admission.stats()["in_flight_bytes"] == 60
+            with pytest.raises(AdmissionRejected) as exc:
+                with admission.admit(60, tmp_path):
+                    pass
+            assert exc.value.reason == "bytes"
+        assert admission.stats()["in_flight_bytes"] == 0
+
+    def test_single_oversized_upload_is_admitted_alone(self, free_space, tmp_path):
+        admission = UploadAdmission(max_concurrent=10, max_bytes=100, min_free_bytes=0)
+
+        with admission.admit(500, tmp_path):
+            assert admission.active == 1
+
+    def test_keeps_free_disk_space(self, free_space, tmp_path):
+        admission = UploadAdmission(max_concurrent=10, max_bytes=100_000, min_free_bytes=4_000)
+
+        with admission.admit(5_000, tmp_path):
+            with pytest.raises(AdmissionRejected) as exc:
+                admission.check_disk(2_000, tmp_path)
+            assert exc.value.reason == "disk"
+            assert exc.value.retry_after == admission.disk_retry_after
+
+    def test_releases_reservation_on_error(self, free_space, tmp_path):
+        admission = UploadAdmission(max_concurrent=1, max_bytes=100, min_free_bytes=0)
+
+        with pytest.raises(ConnectionResetError):
+            with admission.admit(50, tmp_path):
+                raise ConnectionResetError()
+
+        assert admission.active == 0
+        assert admission.in_flight_bytes == 0
+
+    def test_free_space_of_missing_directory(self, tmp_path):
+        assert admission_module._free_space(tmp_path / "not" / "created") > 0
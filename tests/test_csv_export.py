@@ -0,0 +1,61 @@
+import csv
+import io
+
+import pytest
+
+from app.database.models import BugReport
+from app.utils.csv_export import CSV_EXPORT_HEADER, csv_export_row, iter_csv_chunks
+
+
+def _make_report(**overrides) -> BugReport:
+    defaults = dict(
+        id=1,
+        report_number=7,
+        chat_id=-100123,
+        user_id=999,
+        username=None,
+        user_login="login",
+        platform="Android",
+        platform_version="14",
+        error_time="2025-01-20 09:00",
+        server="Beeline",
+        subscriber_info=None,
+        description='Текст, с "кавычками"',
+        status="in_progress",
+        created_at="2025-01-20 09:05:00",
+    )
+    defaults.update(overrides)
+    return BugReport(**defaults)
+
+
+async def _batches(*batches):
+    for batch in batches:
+        yield batch
+
+
+class TestCsvExport:
+    def test_row_uses_status_label(self):
+        row = csv_export_row(_make_report())
+        assert row[10] == "В работе"
+        assert row[11] == "2025-01-20 09:05:00"
+        assert row[12] == ""
+
+    @pytest.mark.asyncio
+    async def test_chunk_per_batch(self):
+        chunks = [c async for c in iter_csv_chunks(_batches(
+            [_make_report(id=1), _make_report(id=2)],
+            [_make_report(id=3)],
+        ))]
+
+        assert len(chunks) == 2
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+        assert rows[0] == CSV_EXPORT_HEADER
+        assert [r[0] for r in rows[1:]] == ["1", "2", "3"]
+        assert rows[1][8] == 'Текст, с "кавычками"'
+
+    @pytest.mark.asyncio
+    async def test_header_only_when_empty(self):
+        chunks = [c async for c in iter_csv_chunks(_batches())]
+
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+        assert rows == [CSV_EXPORT_HEADER]
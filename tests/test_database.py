@@ -0,0 +1,100 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.database.connection import Database
+
+
+class TestDatabase:
+    @pytest.mark.asyncio
+    async def test_wal_mode(self, db):
+        cursor = await db.connection.execute("PRAGMA journal_mode")
+        assert (await cursor.fetchone())[0] == "wal"
+
+    @pytest.mark.asyncio
+    async def test_report_delete_cascades(self, db):
+        async with db.transaction() as conn:
+            await conn.execute(
+                "INSERT INTO bug_reports (id, report_number, chat_id, user_id, user_login, "
+                "platform, error_time, server, description) "
+                "VALUES (7, 1, -1, 1, 'l', 'iOS', 't', 's', 'd')"
+            )
+            await conn.execute(
+                "INSERT INTO report_media (report_id, position, media_type, file_id) "
+                "VALUES (7, 0, 'photo', 'f')"
+            )
+            await conn.execute("INSERT INTO send_jobs (report_id, payload) VALUES (7, '{}')")
+
+        async with db.transaction() as conn:
+            await conn.execute("DELETE FROM bug_reports WHERE id = 7")
+
+        for table in ("report_media", "send_jobs"):
+            cursor = await db.connection.execute(f"SELECT COUNT(*) FROM {table}")
+            assert (await cursor.fetchone())[0] == 0
+
+    @pytest.mark.asyncio
+    async def test_readers_are_read_only(self, db):
+        async with db.reader() as conn:
+            assert conn is not db.connection
+            with pytest.raises(sqlite3.OperationalError):
+                await conn.execute("DELETE FROM bug_reports")
+
+    @pytest.mark.asyncio
+    async def test_reader_sees_committed_writes(self, db):
+        async with db.transaction() as conn:
+            await conn.execute(
+                "INSERT INTO bug_reports (report_number, chat_id, user_id, user_login, "
+                "platform, error_time, server, description) "
+                "VALUES (1, -1, 1, 'l', 'iOS', 't', 's', 'd')"
+            )
+
+        async with db.reader() as conn:
+            cursor = await conn.execute("SELECT COUNT(*) FROM bug_reports")
+            assert (await cursor.fetchone())[0] == 1
+
+    @pytest.mark.asyncio
+    async def test_transaction_rolls_back_on_error(self, db):
+        with pytest.raises(RuntimeError):
+            async with db.transaction() as conn:
+                await conn.execute(
+                    "INSERT INTO bug_reports (report_number, chat_id, user_id, user_login, "
+                    "platform, error_time, server, description) "
+                    "VALUES (1, -1, 1, 'l', 'iOS', 't', 's', 'd')"
+                )
+                raise RuntimeError("boom")
+
+        async with db.reader() as conn:
+            cursor = await conn.execute("SELECT COUNT(*) FROM bug_reports")
+            assert (await cursor.fetchone())[0] == 0
+
+    @pytest.mark.asyncio
+    async def test_pool_limits_concurrent_readers(self, tmp_path):
+        database = Database(tmp_path / "pool.db", read_pool_size=2)
+        await database.connect()
+        try:
+            active = 0
+            peak = 0
+
+            async def read():
+                nonlocal active, peak
+                async with database.reader():
+                    active += 1
+                    peak = max(peak, active)
+                    await asyncio.sleep(0.01)
+                    active -= 1
+
+            await asyncio.gather(*[read() for _ in range(6)])
+            assert peak == 2
+        finally:
+            await database.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_without_pool_reads_use_writer(self, tmp_path):
+        database = Database(tmp_path / "single.db", read_pool_size=0)
+        await database.connect()
+        try:
+            async with database.reader() as conn:
+                assert conn is database.connection
+        finally:
+            await database.disconnect()
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import EditMessageText
+
+from app.utils.edit_scheduler import EditScheduler
+
+
+class FakeBot:
+    def __init__(self, error=None):
+        self.error = error
+        self.edits = []
+
+    async def edit_message_text(self, chat_id, message_id, text, parse_mode):
+        self.edits.append(("text", chat_id, message_id, text))
+        if self.error:
+            raise self.error
+
+    async def edit_message_caption(self, chat_id, message_id, caption, parse_mode):
+        self.edits.append(("caption", chat_id, message_id, caption))
+
+
+class TestEditScheduler:
+    @pytest.mark.asyncio
+    async def test_coalesces_burst_into_last_text(self):
+        bot = FakeBot()
+        scheduler = EditScheduler(bot, delay=0.05)
+
+        for text in ("a", "b", "c"):
+            scheduler.schedule(-1, 10, text, is_caption=False)
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+
+        assert bot.edits == [("text", -1, 10, "c")]
+        assert scheduler.stats()["coalesced"] == 2
+
+    @pytest.mark.asyncio
+    async def test_skips_unchanged_text(self):
+        bot = FakeBot()
+        scheduler = EditScheduler(bot, delay=0.01)
+
+        scheduler.schedule(-1, 10, "same", is_caption=True)
+        await asyncio.sleep(0.05)
+        scheduler.schedule(-1, 10, "same", is_caption=True)
+        await asyncio.sleep(0.05)
+
+        assert bot.edits == [("caption", -1, 10, "same")]
+        assert scheduler.stats()["unchanged"] == 1
+
+    @pytest.mark.asyncio
+    async def test_messages_are_independent(self):
+        bot = FakeBot()
+        scheduler = EditScheduler(bot, delay=0.01)
+
+        scheduler.schedule(-1, 10, "x", is_caption=False)
+        scheduler.schedule(-1, 11, "x", is_caption=False)
+        await asyncio.sleep(0.05)
+
+        assert len(bot.edits) == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_edit_is_retried_on_next_change(self):
+        method = EditMessageText(chat_id=-1, message_id=10, text="x")
+        bot = FakeBot(error=TelegramBadRequest(method, "message to edit not found"))
+        scheduler = EditScheduler(bot, delay=0.01)
+
+        scheduler.schedule(-1, 10, "x", is_caption=False)
+        await asyncio.sleep(0.05)
+        bot.error = None
+        scheduler.schedule(-1, 10, "x", is_caption=False)
+        await asyncio.sleep(0.05)
+
+        assert len(bot.edits) == 2
+        assert scheduler.stats()["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_sends_pending(self):
+        bot = FakeBot()
+        scheduler = EditScheduler(bot, delay=60)
+
+        scheduler.schedule(-1, 10, "x", is_caption=False)
+        await scheduler.flush()
+
+        assert bot.edits == [("text", -1, 10, "x")]
+        assert scheduler.stats()["pending"] == 0
@@ -0,0 +1,27 @@
+import json
+
+from webapp import json_codec
+
+
+class TestJsonCodec:
+    def test_stdlib_and_active_backend_agree(self):
+        data = {"success": True, "reports": [{"id": 1, "description": "Ошибка"}], 5: None}
+
+        assert json.loads(json_codec.dumps(data)) == json.loads(json_codec._stdlib_dumps(data))
+
+    def test_response_is_utf8_json(self):
+        response = json_codec.json_response({"error": "Нет"}, status=400, headers={"ETag": '"x"'})
+
+        assert response.status == 400
+        assert response.content_type == "application/json"
+        assert response.charset == "utf-8"
+        assert response.headers["ETag"] == '"x"'
+        assert json.loads(response.body) == {"error": "Нет"}
+
+    def test_raw_fragments_are_embedded(self):
+        response = json_codec.json_response_with_raw(
+            {"success": True, "has_more": False}, {"reports": '[{"id":1}]'}
+        )
+
+        assert json.loads(response.body) == {"success": True, "has_more": False, "reports": [{"id": 1}]}
+        assert json.loads(json_codec.json_response_with_raw({}, {"reports": "[]"}).body) == {"reports": []}
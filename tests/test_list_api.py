@@ -0,0 +1,85 @@
+import json
+import time
+
+import pytest
+
+from tests.test_repository import _make_report
+from tests.test_validate_init_data import _build_init_data
+
+
+async def _auth_headers(client, user_id: int) -> dict:
+    init_data = _build_init_data({
+        "auth_date": str(int(time.time())),
+        "user": json.dumps({"id": user_id, "username": "tester"}),
+    })
+    response = await client.post("/api/session", json={"init_data": init_data})
+    token = (await response.json())["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestListEtag:
+    @pytest.mark.asyncio
+    async def test_matching_etag_returns_304(self, webapp_client, repo):
+        await repo.create(_make_report(chat_id=-1700, user_id=70))
+        headers = await _auth_headers(webapp_client, 70)
+
+        first = await webapp_client.get("/api/user-reports?chat_id=-1700", headers=headers)
+        etag = first.headers["ETag"]
+        assert first.status == 200
+        assert len((await first.json())["reports"]) == 1
+
+        cached = await webapp_client.get(
+            "/api/user-reports?chat_id=-1700", headers={**headers, "If-None-Match": etag}
+        )
+        assert cached.status == 304
+        assert cached.headers["ETag"] == etag
+
+    @pytest.mark.asyncio
+    async def test_write_changes_etag(self, webapp_client, repo):
+        report_id = await repo.create(_make_report(chat_id=-1701, user_id=71))
+        headers = await _auth_headers(webapp_client, 71)
+        first = await webapp_client.get("/api/user-reports?chat_id=-1701", headers=headers)
+        etag = first.headers["ETag"]
+
+        await repo.set_status(report_id, "completed")
+
+        after = await webapp_client.get(
+            "/api/user-reports?chat_id=-1701", headers={**headers, "If-None-Match": etag}
+        )
+        assert after.status == 200
+        assert after.headers["ETag"] != etag
+        assert (await after.json())["reports"][0]["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_post_and_get_share_etag(self, webapp_client, repo):
+        await repo.create(_make_report(chat_id=-1702, user_id=72))
+        headers = await _auth_headers(webapp_client, 72)
+
+        get = await webapp_client.get("/api/user-reports?chat_id=-1702&limit=20", headers=headers)
+        post = await webapp_client.post(
+            "/api/user-reports", json={"chat_id": -1702, "limit": 20}, headers=headers
+        )
+
+        assert get.headers["ETag"] == post.headers["ETag"]
+
+
+class TestListParameters:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("query", ["chat_id=abc", "chat_id=-1&limit=ten", "offset=1.5"])
+    async def test_invalid_query_returns_400(self, webapp_client, query):
+        headers = await _auth_headers(webapp_client, 73)
+
+        for path in ("/api/user-reports", "/api/chat-reports"):
+            response = await webapp_client.get(f"{path}?{query}", headers=headers)
+            assert response.status == 400
+            assert (await response.json())["error"] == "Invalid parameters"
+
+    @pytest.mark.asyncio
+    async def test_invalid_json_fields_return_400(self, webapp_client):
+        headers = await _auth_headers(webapp_client, 74)
+
+        response = await webapp_client.post(
+            "/api/user-reports", json={"chat_id": -1, "limit": "many"}, headers=headers
+        )
+
+        assert response.status == 400
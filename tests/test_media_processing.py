@@ -0,0 +1,133 @@
+import hashlib
+import os
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendMessage
+
+from app.database.models import SpooledFile
+from app.database.repository import MediaRepository, SendJobRepository
+from app.utils.media_processing import ImageOptions, ImageProcessor, process_image
+from app.utils.send_queue import SendQueue
+from tests.test_send_queue import FakeBot, _make_report
+
+Image = pytest.importorskip("PIL.Image")
+
+OPTIONS = ImageOptions(max_dimension=400, target_bytes=50_000)
+
+
+def _png(path, size):
+    noise = Image.effect_noise(size, 64).convert("RGB")
+    noise.save(path, "PNG")
+    data = path.read_bytes()
+    return SpooledFile(str(path), path.name, "image/png", hashlib.sha256(data).hexdigest(), len(data))
+
+
+class TestProcessImage:
+    def test_downscales_large_png_to_jpeg(self, tmp_path):
+        src = _png(tmp_path / "big.png", (1200, 800))
+        dst = tmp_path / "out.jpg"
+
+        size = process_image(src.path, str(dst), OPTIONS)
+
+        assert size == dst.stat().st_size
+        with Image.open(dst) as result:
+            assert result.format == "JPEG"
+            assert max(result.size) == 400
+
+    def test_small_image_is_left_alone(self, tmp_path):
+        src = tmp_path / "small.jpg"
+        Image.new("RGB", (100, 100), "white").save(src, "JPEG")
+
+        assert process_image(str(src), str(tmp_path / "out.jpg"), OPTIONS) is None
+        assert not (tmp_path / "out.jpg").exists()
+
+
+class TestImageProcessor:
+    @pytest.mark.asyncio
+    async def test_prepare_replaces_photos_only(self, tmp_path):
+        photo = _png(tmp_path / "big.png", (1200, 800))
+        log = SpooledFile(str(tmp_path / "a.txt"), "a.txt", "text/plain")
+        processor = ImageProcessor(OPTIONS)
+        try:
+            (photo_original, photo_sent), (log_original, log_sent) = await processor.prepare([photo, log], {})
+        finally:
+            await processor.close()
+
+        assert photo_original is photo
+        assert photo_sent.content_type == "image/jpeg"
+        assert photo_sent.sha256 == f"{photo.sha256}:{OPTIONS.variant}"
+        assert os.path.exists(photo_sent.path)
+        assert log_sent is log_original is log
+        assert processor.stats()["processed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_known_variant_is_not_processed_again(self, tmp_path):
+        photo = _png(tmp_path / "big.png", (1200, 800))
+        processor = ImageProcessor(OPTIONS)
+
+        [(_, sent)] = await processor.prepare([photo], {f"{photo.sha256}:{OPTIONS.variant}": {"photo": "x"}})
+
+        assert not os.path.exists(sent.path)
+        assert processor.stats() == {"processed": 0, "skipped": 0, "errors": 0}
+
+
+class TestSendQueueWithProcessor:
+    @pytest.mark.asyncio
+    async def test_sends_processed_photo_and_original(self, repo, db, tmp_path):
+        photo = _png(tmp_path / "big.png", (1200, 800))
+        report_id, _ = await repo.create_with_send_job(_make_report(), [photo])
+
+        bot = FakeBot()
+        queue = SendQueue(
+            bot, repo, SendJobRepository(db), MediaRepository(db),
+            image_processor=ImageProcessor(OPTIONS), keep_originals=True, workers=1,
+        )
+        try:
+            assert await queue.run_once() is True
+        finally:
+            await queue.stop()
+
+        (photo_method, photo_kwargs), (doc_method, doc_kwargs) = bot.calls
+        assert photo_method == "send_photo"
+        assert photo_kwargs["photo"].path.endswith(".jpg")
+        assert doc_method == "send_document"
+        assert doc_kwargs["reply_to_message_id"] == 101
+
+        media = (await repo.get_media([report_id]))[report_id]
+        assert [m.media_type for m in media] == ["photo", "document"]
+        assert not os.path.exists(photo.path)
+        assert not any(tmp_path.glob("*.jpg"))
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("error", ["wrong file identifier", "file reference expired"])
+    async def test_stale_variant_file_id_uploads_original(self, repo, db, tmp_path, error):
+        first = _png(tmp_path / "first.png", (1200, 800))
+        await repo.create_with_send_job(_make_report(), [first])
+        second = tmp_path / "second.png"
+        second.write_bytes((tmp_path / "first.png").read_bytes())
+        report_id, job_id = await repo.create_with_send_job(
+            _make_report(), [SpooledFile(str(second), "second.png", "image/png", first.sha256, first.size)]
+        )
+
+        bot = FakeBot()
+        jobs = SendJobRepository(db)
+        queue = SendQueue(
+            bot, repo, jobs, MediaRepository(db),
+            image_processor=ImageProcessor(OPTIONS), keep_originals=False, workers=1,
+        )
+        try:
+            assert await queue.run_once() is True
+            # Вариант уже в Telegram, но его file_id отвергнут
+            bot.errors.append(TelegramBadRequest(SendMessage(chat_id=1, text="x"), error))
+            bot.calls.clear()
+            assert await queue.run_once() is True
+        finally:
+            await queue.stop()
+
+        assert bot.calls[0][1].get("photo", "").startswith("photo-")
+        retry_method, retry_kwargs = bot.calls[1]
+        upload = retry_kwargs.get("photo") or retry_kwargs.get("document")
+        assert upload.path == str(second)
+        assert (await jobs.get(job_id)).status == "done"
+        assert (await repo.get_by_id(report_id)).message_id is not None
@@ -0,0 +1,102 @@
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendMessage
+
+from app.utils import metrics
+from app.utils.metrics import BotApiMetricsMiddleware, Registry, instrument_methods
+
+
+class TestHistogram:
+    def test_buckets_are_cumulative(self):
+        registry = Registry()
+        histogram = registry.histogram("op_seconds", "Операция", ("route",), buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, "/a")
+
+        text = registry.render()
+        assert 'op_seconds_bucket{route="/a",le="0.1"} 1' in text
+        assert 'op_seconds_bucket{route="/a",le="1.0"} 3' in text
+        assert 'op_seconds_bucket{route="/a",le="+Inf"} 4' in text
+        assert 'op_seconds_sum{route="/a"} 6.05' in text
+        assert 'op_seconds_count{route="/a"} 4' in text
+        assert "# TYPE op_seconds histogram" in text
+
+    def test_time_records_failed_block(self):
+        histogram = Registry().histogram("op_seconds", "Операция", ("name",))
+
+        with pytest.raises(RuntimeError):
+            with histogram.time("x"):
+                raise RuntimeError()
+
+        assert histogram.count("x") == 1
+
+    def test_rejects_wrong_labels(self):
+        histogram = Registry().histogram("op_seconds", "Операция", ("a", "b"))
+
+        with pytest.raises(ValueError):
+            histogram.observe(1.0, "only-one")
+
+
+class TestCounter:
+    def test_escapes_label_values(self):
+        registry = Registry()
+        counter = registry.counter("errors_total", "Ошибки", ("error",))
+
+        counter.inc('say "hi"\n')
+        counter.inc('say "hi"\n', amount=2)
+
+        assert 'errors_total{error="say \\"hi\\"\\n"} 3' in registry.render()
+
+    def test_duplicate_name(self):
+        registry = Registry()
+        registry.counter("x_total", "x")
+
+        with pytest.raises(ValueError):
+            registry.counter("x_total", "x")
+
+
+class TestInstrumentMethods:
+    @pytest.mark.asyncio
+    async def test_times_public_coroutines_only(self):
+        histogram = Registry().histogram("db_seconds", "БД", ("repository", "method"))
+
+        @instrument_methods(histogram)
+        class Repo:
+            async def get(self, value):
+                return value
+
+            async def _private(self):
+                return None
+
+            def sync(self):
+                return None
+
+        assert await Repo().get(5) == 5
+        await Repo()._private()
+
+        assert histogram.count("Repo", "get") == 1
+        assert histogram.count("Repo", "_private") == 0
+        assert Repo.get.__name__ == "get"
+
+
+class TestBotApiMetricsMiddleware:
+    @pytest.mark.asyncio
+    async def test_counts_requests_and_errors(self):
+        middleware = BotApiMetricsMiddleware()
+        method = SendMessage(chat_id=1, text="a")
+        requests_before = metrics.TELEGRAM_REQUEST_SECONDS.count("sendMessage")
+        errors_before = metrics.TELEGRAM_ERRORS.value("sendMessage", "TelegramBadRequest")
+
+        async def ok(bot, method):
+            return True
+
+        async def fail(bot, method):
+            raise TelegramBadRequest(method=method, message="Bad Request")
+
+        assert await middleware(ok, None, method) is True
+        with pytest.raises(TelegramBadRequest):
+            await middleware(fail, None, method)
+
+        assert metrics.TELEGRAM_REQUEST_SECONDS.count("sendMessage") == requests_before + 2
+        assert metrics.TELEGRAM_ERRORS.value("sendMessage", "TelegramBadRequest") == errors_before + 1
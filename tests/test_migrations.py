@@ -0,0 +1,100 @@
+import aiosqlite
+import pytest
+
+from app.database.connection import Database
+from app.database.migrations import MIGRATIONS, get_schema_version, migrate
+
+
+LATEST = MIGRATIONS[-1].version
+
+
+async def _create_legacy_db(path):
+    """База в том виде, в каком её создавала первая версия бота"""
+    async with aiosqlite.connect(path) as conn:
+        await conn.executescript("""
+            CREATE TABLE bug_reports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                report_number INTEGER NOT NULL,
+                chat_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                username TEXT,
+                user_login TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                platform_version TEXT,
+                error_time TEXT NOT NULL,
+                server TEXT NOT NULL,
+                subscriber_info TEXT,
+                description TEXT NOT NULL,
+                media_file_id TEXT,
+                media_type TEXT,
+                message_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(chat_id, report_number)
+            );
+            CREATE INDEX idx_reports_chat ON bug_reports(chat_id);
+            ALTER TABLE bug_reports ADD COLUMN status TEXT;
+            INSERT INTO bug_reports
+                (report_number, chat_id, user_id, user_login, platform, error_time, server, description, status)
+            VALUES
+                (1, -1, 1, 'l', 'iOS', 't', 's', 'd', 'open'),
+                (2, -1, 1, 'l', 'iOS', 't', 's', 'd', 'resolved'),
+                (3, -1, 1, 'l', 'iOS', 't', 's', 'd', 'closed');
+        """)
+        await conn.commit()
+
+
+class TestMigrations:
+    @pytest.mark.asyncio
+    async def test_fresh_database_at_latest_version(self, db):
+        assert await get_schema_version(db.connection) == LATEST
+
+    @pytest.mark.asyncio
+    async def test_second_run_is_noop(self, db):
+        assert await migrate(db.connection) == []
+
+    @pytest.mark.asyncio
+    async def test_upgrades_legacy_database(self, tmp_path):
+        path = tmp_path / "legacy.db"
+        await _create_legacy_db(path)
+
+        database = Database(path)
+        await database.connect()
+        try:
+            conn = database.connection
+            assert await get_schema_version(conn) == LATEST
+
+            cursor = await conn.execute("SELECT status FROM bug_reports ORDER BY report_number")
+            statuses = [row[0] for row in await cursor.fetchall()]
+            assert statuses == ["new", "completed", "trash"]
+
+            cursor = await conn.execute("PRAGMA table_info(bug_reports)")
+            columns = {row[1] for row in await cursor.fetchall()}
+            assert {"tracking_id", "status_comment", "status_changed_by"} <= columns
+
+            cursor = await conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+            indexes = {row[0] for row in await cursor.fetchall()}
+            assert "idx_reports_chat_status_created" in indexes
+            assert "idx_reports_user_chat_created" in indexes
+            assert "idx_reports_chat" not in indexes
+
+            cursor = await conn.execute("SELECT last_number FROM chat_counters WHERE chat_id = -1")
+            assert (await cursor.fetchone())[0] == 3
+
+            cursor = await conn.execute("SELECT status, count FROM chat_stats WHERE chat_id = -1")
+            assert dict(await cursor.fetchall()) == {"new": 1, "completed": 1, "trash": 1}
+        finally:
+            await database.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_dry_run_does_not_apply(self, tmp_path):
+        path = tmp_path / "legacy.db"
+        await _create_legacy_db(path)
+
+        async with aiosqlite.connect(path) as conn:
+            planned = await migrate(conn, dry_run=True)
+            assert [m.version for m in planned] == [m.version for m in MIGRATIONS]
+            assert await get_schema_version(conn) == 0
+
+            cursor = await conn.execute("SELECT status FROM bug_reports WHERE report_number = 1")
+            assert (await cursor.fetchone())[0] == "open"
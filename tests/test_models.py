@@ -67,3 +67,15 @@ class TestBugReportToDict:
         d = report.to_dict()
 
         assert d["created_at"] is None
+
+    def test_updated_at_included(self):
+        report = _make_report(updated_at="2025-03-10 14:05:00.123")
+        d = report.to_dict()
+
+        assert d["updated_at"] == "2025-03-10 14:05:00.123"
+
+
+class TestBugReportSlots:
+    def test_has_no_instance_dict(self):
+        report = _make_report()
+        assert not hasattr(report, "__dict__")
@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import GetUpdates, SendMediaGroup, SendMessage
+from aiogram.types import InputMediaPhoto
+
+from app.utils.rate_limiter import RateLimitMiddleware, TokenBucket
+
+
+class TestTokenBucket:
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+        assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+    def test_reserve_cost(self):
+        bucket = TokenBucket(rate=10, capacity=5)
+        assert bucket.reserve(5) == 0
+        assert bucket.reserve(3) == pytest.approx(0.3, abs=0.01)
+
+    def test_block(self):
+        bucket = TokenBucket(rate=10, capacity=5)
+        bucket.block(2)
+        assert bucket.reserve() == pytest.approx(2, abs=0.05)
+        assert not bucket.is_idle()
+
+
+def _request_recorder(errors=()):
+    errors = list(errors)
+    calls = []
+
+    async def make_request(bot, method):
+        calls.append(time.monotonic())
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    return make_request, calls
+
+
+class TestRateLimitMiddleware:
+    @pytest.mark.asyncio
+    async def test_per_chat_limit(self):
+        limiter = RateLimitMiddleware(private_rate=20, private_burst=1)
+        make_request, calls = _request_recorder()
+
+        start = time.monotonic()
+        await asyncio.gather(*[
+            limiter(make_request, None, SendMessage(chat_id=1, text="x")) for _ in range(3)
+        ])
+
+        assert time.monotonic() - start >= 0.09
+        assert limiter.stats()["delayed"] == 2
+        assert limiter.stats()["waiting"] == 0
+
+    @pytest.mark.asyncio
+    async def test_media_group_costs_one_token_per_item(self):
+        limiter = RateLimitMiddleware(group_rate=1000, group_burst=10)
+        make_request, calls = _request_recorder()
+        album = SendMediaGroup(
+            chat_id=-5, media=[InputMediaPhoto(media=f"file-{i}") for i in range(10)]
+        )
+
+        await limiter(make_request, None, album)
+        await limiter(make_request, None, SendMessage(chat_id=-5, text="x"))
+
+        assert limiter.stats()["delayed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_chats_are_independent(self):
+        limiter = RateLimitMiddleware(private_rate=0.1, private_burst=1)
+        make_request, calls = _request_recorder()
+
+        await limiter(make_request, None, SendMessage(chat_id=1, text="x"))
+        await limiter(make_request, None, SendMessage(chat_id=2, text="x"))
+
+        assert limiter.stats()["delayed"] == 0
+
+    @pytest.mark.asyncio
+    async def test_unlimited_methods_pass_through(self):
+        limiter = RateLimitMiddleware(global_rate=0.1)
+        make_request, calls = _request_recorder()
+
+        for _ in range(3):
+            await limiter(make_request, None, GetUpdates())
+
+        assert len(calls) == 3
+        assert limiter.stats()["requests"] == 0
+
+    @pytest.mark.asyncio
+    async def test_retry_after_is_honoured(self):
+        method = SendMessage(chat_id=-5, text="x")
+        limiter = RateLimitMiddleware(group_rate=100, group_burst=10)
+        make_request, calls = _request_recorder([TelegramRetryAfter(method, "Flood", retry_after=0.1)])
+
+        assert await limiter(make_request, None, method) == "ok"
+        assert len(calls) == 2
+        assert calls[1] - calls[0] >= 0.09
+        assert limiter.stats()["retry_after"] == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_after_gives_up(self):
+        method = SendMessage(chat_id=-5, text="x")
+        limiter = RateLimitMiddleware(max_retries=0)
+        make_request, _ = _request_recorder([TelegramRetryAfter(method, "Flood", retry_after=0)])
+
+        with pytest.raises(TelegramRetryAfter):
+            await limiter(make_request, None, method)
@@ -1,7 +1,14 @@
+import asyncio
+import json
+import sqlite3
+from contextlib import AsyncExitStack
+
 import pytest
 
-from app.database.models import BugReport
-from app.database.repository import BugReportRepository
+from app.database.models import BugReport, SentMedia
+from app.database.repository import (
+    BugReportRepository, SendJobRepository, StaleReportError, encode_cursor, rows_to_reports
+)
 
 
 def _make_report(chat_id=-100123, user_id=111, **overrides) -> BugReport:
@@ -51,6 +58,41 @@ class TestCreate:
         assert r1.report_number == 1
         assert r2.report_number == 1
 
+    @pytest.mark.asyncio
+    async def test_numbers_not_reused_after_delete(self, repo, db):
+        await repo.create(_make_report(chat_id=-150))
+        rid = await repo.create(_make_report(chat_id=-150))
+        async with db.transaction() as conn:
+            await conn.execute("DELETE FROM bug_reports WHERE id = ?", (rid,))
+
+        r3 = _make_report(chat_id=-150)
+        await repo.create(r3)
+        assert r3.report_number == 3
+
+    @pytest.mark.asyncio
+    async def test_next_report_number(self, repo):
+        assert await repo.get_next_report_number(-160) == 1
+        await repo.create(_make_report(chat_id=-160))
+        assert await repo.get_next_report_number(-160) == 2
+
+
+class TestCreateConcurrency:
+    @pytest.mark.asyncio
+    async def test_parallel_creates_no_gaps_no_duplicates(self, repo):
+        total = 2000
+        reports = [_make_report(chat_id=-170, user_id=i) for i in range(total)]
+
+        ids = await asyncio.gather(*[repo.create(r) for r in reports])
+
+        assert len(set(ids)) == total
+        assert sorted(r.report_number for r in reports) == list(range(1, total + 1))
+
+        stored = await repo.export_chat_reports(-170)
+        assert [r.report_number for r in stored] == list(range(1, total + 1))
+        assert {r.id: r.report_number for r in stored} == {
+            rid: r.report_number for rid, r in zip(ids, reports)
+        }
+
 
 class TestGetById:
     @pytest.mark.asyncio
@@ -131,6 +173,39 @@ class TestGetByChat:
         assert completed[0].status == "completed"
 
 
+class TestCursorPagination:
+    @pytest.mark.asyncio
+    async def test_walks_all_pages_without_duplicates(self, repo):
+        ids = [await repo.create(_make_report(chat_id=-750)) for _ in range(5)]
+
+        seen = []
+        cursor = None
+        while True:
+            page = await repo.get_by_chat(-750, limit=2, cursor=cursor)
+            seen.extend(r.id for r in page)
+            if len(page) < 2:
+                break
+            cursor = encode_cursor(page[-1])
+
+        assert seen == sorted(ids, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_user_cursor_matches_offset(self, repo):
+        for _ in range(4):
+            await repo.create(_make_report(user_id=778, chat_id=-760))
+
+        first = await repo.get_by_user(778, chat_id=-760, limit=2)
+        by_cursor = await repo.get_by_user(778, chat_id=-760, limit=2, cursor=encode_cursor(first[-1]))
+        by_offset = await repo.get_by_user(778, chat_id=-760, limit=2, offset=2)
+
+        assert [r.id for r in by_cursor] == [r.id for r in by_offset]
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor(self, repo):
+        with pytest.raises(ValueError):
+            await repo.get_by_chat(-770, cursor="???")
+
+
 class TestUpdate:
     @pytest.mark.asyncio
     async def test_update_fields(self, repo):
@@ -163,6 +238,56 @@ class TestUpdate:
         assert result is False
 
 
+class TestUpdateReturning:
+    @pytest.mark.asyncio
+    async def test_returns_updated_report(self, repo):
+        rid = await repo.create(_make_report(chat_id=-810))
+        before = await repo.get_by_id(rid)
+
+        updated = await repo.update_returning(rid, status="completed", description="Новое")
+        assert updated.id == rid
+        assert updated.status == "completed"
+        assert updated.description == "Новое"
+        assert updated.updated_at != before.updated_at
+
+    @pytest.mark.asyncio
+    async def test_nonexistent_returns_none(self, repo):
+        assert await repo.update_returning(99999, status="new") is None
+
+    @pytest.mark.asyncio
+    async def test_expected_updated_at_matches(self, repo):
+        rid = await repo.create(_make_report(chat_id=-811))
+        current = await repo.get_by_id(rid)
+
+        updated = await repo.update_returning(rid, expected_updated_at=current.updated_at, status="in_progress")
+        assert updated.status == "in_progress"
+
+    @pytest.mark.asyncio
+    async def test_stale_write_rejected(self, repo):
+        rid = await repo.create(_make_report(chat_id=-812))
+        stale = await repo.get_by_id(rid)
+        await repo.update_returning(rid, expected_updated_at=stale.updated_at, status="in_progress")
+
+        with pytest.raises(StaleReportError):
+            await repo.update_returning(rid, expected_updated_at=stale.updated_at, status="trash")
+        assert (await repo.get_by_id(rid)).status == "in_progress"
+
+    @pytest.mark.asyncio
+    async def test_send_bookkeeping_keeps_token(self, repo, db):
+        rid, _ = await repo.create_with_send_job(_make_report(chat_id=-813), [])
+        loaded = await repo.get_by_id(rid)
+
+        job = await SendJobRepository(db).claim_next()
+        await SendJobRepository(db).complete(job, 55, [
+            SentMedia(sha256=None, media_type="photo", file_id="f1", position=0)
+        ])
+        await repo.update_message_id(rid, 56)
+
+        updated = await repo.update_returning(rid, expected_updated_at=loaded.updated_at, status="in_progress")
+        assert updated.message_id == 56
+        assert updated.media_file_id == "f1"
+
+
 class TestSearch:
     @pytest.mark.asyncio
     async def test_search_by_description(self, repo):
@@ -186,6 +311,55 @@ class TestSearch:
         results = await repo.search(-1200, "nonexistent_xyz_query")
         assert len(results) == 0
 
+    @pytest.mark.asyncio
+    async def test_search_cyrillic_case_insensitive(self, repo):
+        await repo.create(_make_report(chat_id=-1210, description="Ошибка при ВХОДЕ в личный кабинет"))
+
+        results = await repo.search(-1210, "вход")
+        assert len(results) == 1
+
+    @pytest.mark.asyncio
+    async def test_search_by_tracking_id(self, repo):
+        rid = await repo.create(_make_report(chat_id=-1220))
+        await repo.update(rid, tracking_id="TRK-4521")
+
+        results = await repo.search(-1220, "trk-4521")
+        assert [r.id for r in results] == [rid]
+
+    @pytest.mark.asyncio
+    async def test_search_index_follows_updates(self, repo):
+        rid = await repo.create(_make_report(chat_id=-1230, description="старое описание"))
+        await repo.update(rid, description="новый текст")
+
+        assert await repo.search(-1230, "старое") == []
+        assert len(await repo.search(-1230, "новый")) == 1
+
+    @pytest.mark.asyncio
+    async def test_search_scoped_to_chat(self, repo):
+        await repo.create(_make_report(chat_id=-1240, description="общая ошибка"))
+        await repo.create(_make_report(chat_id=-1250, description="общая ошибка"))
+
+        results = await repo.search(-1240, "общая")
+        assert [r.chat_id for r in results] == [-1240]
+
+    @pytest.mark.asyncio
+    async def test_search_pagination(self, repo):
+        for _ in range(5):
+            await repo.create(_make_report(chat_id=-1260, description="падение приложения"))
+
+        page1 = await repo.search(-1260, "падение", limit=3, offset=0)
+        page2 = await repo.search(-1260, "падение", limit=3, offset=3)
+
+        assert len(page1) == 3
+        assert len(page2) == 2
+        assert not {r.id for r in page1} & {r.id for r in page2}
+
+    @pytest.mark.asyncio
+    async def test_search_ignores_fts_syntax(self, repo):
+        await repo.create(_make_report(chat_id=-1270))
+
+        assert await repo.search(-1270, 'NEAR( "*') == []
+
 
 class TestExportChatReports:
     @pytest.mark.asyncio
@@ -204,3 +378,254 @@ class TestExportChatReports:
         reports = await repo.export_chat_reports(-1400)
         numbers = [r.report_number for r in reports]
         assert numbers == sorted(numbers)
+
+    @pytest.mark.asyncio
+    async def test_iter_in_batches(self, repo):
+        for _ in range(5):
+            await repo.create(_make_report(chat_id=-1500))
+
+        batches = [batch async for batch in repo.iter_chat_reports(-1500, batch_size=2)]
+
+        assert [len(b) for b in batches] == [2, 2, 1]
+        assert [r.report_number for b in batches for r in b] == [1, 2, 3, 4, 5]
+
+    @pytest.mark.asyncio
+    async def test_iter_releases_reader_between_batches(self, repo, db):
+        for _ in range(3):
+            await repo.create(_make_report(chat_id=-1510))
+
+        async def take_all_readers():
+            async with AsyncExitStack() as stack:
+                for _ in range(db.read_pool_size):
+                    await stack.enter_async_context(db.reader())
+
+        seen = []
+        async for batch in repo.iter_chat_reports(-1510, batch_size=1):
+            # Между пачками весь пул свободен: итератор не держит читателя
+            await asyncio.wait_for(take_all_readers(), timeout=1)
+            await repo.create(_make_report(chat_id=-1510))
+            seen.extend(r.report_number for r in batch)
+            if len(seen) == 3:
+                break
+
+        assert seen == [1, 2, 3]
+
+
+class TestReportMedia:
+    @pytest.mark.asyncio
+    async def test_get_media_batched(self, repo, db):
+        jobs = SendJobRepository(db)
+        ids = []
+        for count in (2, 0, 1):
+            report_id, _ = await repo.create_with_send_job(_make_report(chat_id=-1400), [])
+            job = await jobs.claim_next()
+            await jobs.complete(job, 10 + report_id, [
+                SentMedia(sha256=None, media_type="photo", file_id=f"f{report_id}-{i}", position=i)
+                for i in range(count)
+            ])
+            ids.append(report_id)
+
+        media = await repo.get_media(ids + [99999])
+
+        assert [m.file_id for m in media[ids[0]]] == [f"f{ids[0]}-0", f"f{ids[0]}-1"]
+        assert ids[1] not in media
+        assert [m.file_id for m in media[ids[2]]] == [f"f{ids[2]}-0"]
+        assert (await repo.get_by_id(ids[0])).media_file_id == f"f{ids[0]}-0"
+
+    @pytest.mark.asyncio
+    async def test_get_media_empty(self, repo):
+        assert await repo.get_media([]) == {}
+
+
+class TestReportPageJson:
+    async def _with_media(self, repo, db, chat_id, user_id=111, count=2):
+        report_id, _ = await repo.create_with_send_job(_make_report(chat_id=chat_id, user_id=user_id), [])
+        job = await SendJobRepository(db).claim_next()
+        await SendJobRepository(db).complete(job, 10 + report_id, [
+            SentMedia(sha256=None, media_type="photo", file_id=f"f{report_id}-{i}", position=i)
+            for i in range(count)
+        ])
+        return report_id
+
+    @pytest.mark.asyncio
+    async def test_matches_python_serialization(self, repo, db):
+        await self._with_media(repo, db, -1450)
+        await repo.create(_make_report(chat_id=-1450, description='Кавычки " и \\ переносы\n'))
+
+        page = await repo.get_by_chat_json(-1450)
+        reports = await repo.get_by_chat(-1450)
+        media = await repo.get_media(r.id for r in reports)
+        expected = []
+        for report in reports:
+            data = report.to_dict(include_admin_fields=True)
+            data["media"] = [m.to_dict() for m in media.get(report.id, [])]
+            expected.append(data)
+
+        assert json.loads(page.reports_json) == expected
+        assert page.has_more is False and page.next_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_user_list_hides_admin_fields(self, repo):
+        await repo.create(_make_report(chat_id=-1460, user_id=41))
+
+        page = await repo.get_by_user_json(41, chat_id=-1460)
+
+        [report] = json.loads(page.reports_json)
+        assert "user_id" not in report and "username" not in report
+        assert report["media"] == []
+
+    @pytest.mark.asyncio
+    async def test_pages_with_cursor(self, repo):
+        ids = [await repo.create(_make_report(chat_id=-1470)) for _ in range(3)]
+
+        first = await repo.get_by_chat_json(-1470, limit=2)
+        second = await repo.get_by_chat_json(-1470, limit=2, cursor=first.next_cursor)
+
+        assert first.has_more is True
+        assert [r["id"] for r in json.loads(first.reports_json)] == ids[:0:-1]
+        assert [r["id"] for r in json.loads(second.reports_json)] == [ids[0]]
+        assert second.has_more is False and second.next_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_empty_page(self, repo):
+        page = await repo.get_by_chat_json(-1480)
+
+        assert page.reports_json == "[]"
+        assert page.has_more is False
+
+
+class TestSummaryProjection:
+    @pytest.mark.asyncio
+    async def test_truncates_description_and_drops_detail_fields(self, repo):
+        await repo.create(_make_report(chat_id=-1490, description="Ошибка" * 10))
+        await repo.create(_make_report(chat_id=-1490, description="Коротко"))
+
+        page = await repo.get_by_chat_json(-1490, summary_chars=12)
+
+        short, long = json.loads(page.reports_json)
+        assert long["description"] == "ОшибкаОшибка"
+        assert long["description_truncated"] is True
+        assert short["description"] == "Коротко" and short["description_truncated"] is False
+        assert "subscriber_info" not in long and "media" not in long
+        assert long["username"] == "tester"
+
+    @pytest.mark.asyncio
+    async def test_user_summary_hides_admin_fields(self, repo):
+        await repo.create(_make_report(chat_id=-1491, user_id=42))
+
+        page = await repo.get_by_user_json(42, summary_chars=50)
+
+        [report] = json.loads(page.reports_json)
+        assert "user_id" not in report and "username" not in report
+
+    @pytest.mark.asyncio
+    async def test_search_json_matches_search(self, repo):
+        for text in ("сбой авторизации", "сбой оплаты", "всё работает"):
+            await repo.create(_make_report(chat_id=-1492, description=text))
+
+        page = await repo.search_json(-1492, "сбой", limit=1, summary_chars=50)
+        reports = await repo.search(-1492, "сбой", limit=1)
+
+        assert [r["id"] for r in json.loads(page.reports_json)] == [r.id for r in reports]
+        assert page.has_more is True
+        assert (await repo.search_json(-1492, "   ")).reports_json == "[]"
+
+
+class TestGetMany:
+    @pytest.mark.asyncio
+    async def test_keeps_requested_order(self, repo):
+        ids = [await repo.create(_make_report(chat_id=-1495)) for _ in range(3)]
+
+        reports = await repo.get_many([ids[2], 99999, ids[0], ids[2]])
+
+        assert [r.id for r in reports] == [ids[2], ids[0]]
+        assert await repo.get_many([]) == []
+
+
+class TestChatStats:
+    @pytest.mark.asyncio
+    async def test_counts_follow_inserts_and_status_changes(self, repo):
+        ids = [await repo.create(_make_report(chat_id=-1500)) for _ in range(4)]
+        await repo.create(_make_report(chat_id=-1501))
+        await repo.set_status(ids[0], "revision")
+        await repo.set_status(ids[1], "trash")
+        await repo.set_status(ids[1], "completed")
+        await repo.update(ids[2], status="new", tracking_id="TRK-1")
+
+        stats = await repo.get_stats(-1500)
+
+        assert stats == {
+            "total": 4, "new": 2, "revision": 1, "in_progress": 0, "completed": 1, "trash": 0,
+        }
+        assert (await repo.get_stats(-1501))["total"] == 1
+        assert (await repo.get_stats(-1502))["total"] == 0
+
+    @pytest.mark.asyncio
+    async def test_delete_decrements(self, repo, db):
+        report_id = await repo.create(_make_report(chat_id=-1510))
+        async with db.transaction() as conn:
+            await conn.execute("DELETE FROM bug_reports WHERE id = ?", (report_id,))
+
+        assert (await repo.get_stats(-1510))["total"] == 0
+        assert await repo.check_chat_stats() == []
+
+    @pytest.mark.asyncio
+    async def test_check_and_repair(self, repo, db):
+        await repo.create(_make_report(chat_id=-1520))
+        async with db.transaction() as conn:
+            await conn.execute("UPDATE chat_stats SET count = 5 WHERE chat_id = -1520")
+            await conn.execute("INSERT INTO chat_stats VALUES (-1521, 'trash', 2)")
+
+        assert await repo.check_chat_stats() == [(-1521, "trash", 2, 0), (-1520, "new", 5, 1)]
+        assert await repo.check_chat_stats(repair=True) != []
+
+        assert await repo.check_chat_stats() == []
+        assert (await repo.get_stats(-1520))["total"] == 1
+
+
+class TestListVersions:
+    @pytest.mark.asyncio
+    async def test_every_write_bumps_chat_and_user(self, repo, db):
+        assert await repo.get_list_version("chat", -1600) == 0
+
+        report_id = await repo.create(_make_report(chat_id=-1600, user_id=16))
+        after_insert = await repo.get_list_version("chat", -1600)
+        assert after_insert > 0
+        assert await repo.get_list_version("user", 16) > 0
+
+        await repo.set_status(report_id, "in_progress")
+        after_update = await repo.get_list_version("chat", -1600)
+        assert after_update > after_insert
+
+        async with db.transaction() as conn:
+            await conn.execute("DELETE FROM bug_reports WHERE id = ?", (report_id,))
+        assert await repo.get_list_version("chat", -1600) > after_update
+
+    @pytest.mark.asyncio
+    async def test_other_chats_unchanged(self, repo):
+        await repo.create(_make_report(chat_id=-1610, user_id=17))
+        version = await repo.get_list_version("chat", -1610)
+
+        await repo.create(_make_report(chat_id=-1611, user_id=18))
+
+        assert await repo.get_list_version("chat", -1610) == version
+
+
+class TestRowsToReports:
+    def test_maps_columns_once_and_ignores_extra(self):
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            "SELECT 7 AS search_rank, 1 AS id, 2 AS report_number, -1 AS chat_id, 3 AS user_id, "
+            "'u' AS username, 'l' AS user_login, 'iOS' AS platform, NULL AS platform_version, "
+            "'t' AS error_time, 's' AS server, NULL AS subscriber_info, 'd' AS description, "
+            "NULL AS media_file_id, NULL AS media_type, NULL AS message_id, "
+            "'c' AS created_at, 'c' AS updated_at"
+        ).fetchall()
+
+        [report] = rows_to_reports(rows)
+
+        assert report.id == 1 and report.report_number == 2 and report.description == "d"
+        assert report.status == "new"
+        assert report.tracking_id is None
+        assert rows_to_reports([]) == []
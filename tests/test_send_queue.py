@@ -0,0 +1,196 @@
+import time
+
+import pytest
+import pytest_asyncio
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from app.database.models import BugReport, SpooledFile
+from app.database.repository import MediaRepository, SendJobRepository
+from app.utils.send_queue import SendQueue, backoff_delay
+
+
+class FakeFile:
+    def __init__(self, file_id):
+        self.file_id = file_id
+        self.file_unique_id = f"u-{file_id}"
+
+
+class FakeMessage:
+    def __init__(self, message_id, photo=None, video=None, document=None):
+        self.message_id = message_id
+        self.photo = photo
+        self.video = video
+        self.document = document
+
+
+class FakeBot:
+    """Бот, который отвечает ошибками из очереди errors, затем успешно"""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.calls = []
+
+    async def _send(self, method, **kwargs):
+        self.calls.append((method, kwargs))
+        if self.errors:
+            raise self.errors.pop(0)
+        message_id = 100 + len(self.calls)
+        if method == "send_photo":
+            return FakeMessage(message_id, photo=[FakeFile("small"), FakeFile(f"photo-{message_id}")])
+        if method == "send_document":
+            return FakeMessage(message_id, document=FakeFile(f"doc-{message_id}"))
+        return FakeMessage(message_id)
+
+    async def send_message(self, **kwargs):
+        return await self._send("send_message", **kwargs)
+
+    async def send_document(self, **kwargs):
+        return await self._send("send_document", **kwargs)
+
+    async def send_photo(self, **kwargs):
+        return await self._send("send_photo", **kwargs)
+
+    async def send_media_group(self, **kwargs):
+        self.calls.append(("send_media_group", kwargs))
+        return [
+            FakeMessage(200 + i, photo=[FakeFile(f"album-{i}")])
+            for i in range(len(kwargs["media"]))
+        ]
+
+
+def _make_report(chat_id=-100500) -> BugReport:
+    return BugReport(
+        id=None, report_number=0, chat_id=chat_id, user_id=1, username="u",
+        user_login="login", platform="iOS", platform_version=None,
+        error_time="2025-01-20 10:00", server="Corbina", subscriber_info=None,
+        description="desc",
+    )
+
+
+def _method():
+    return SendMessage(chat_id=1, text="x")
+
+
+@pytest_asyncio.fixture
+async def jobs(db):
+    return SendJobRepository(db)
+
+
+def _queue(bot, repo, jobs, **kwargs):
+    kwargs.setdefault("workers", 1)
+    return SendQueue(bot, repo, jobs, MediaRepository(jobs.db), **kwargs)
+
+
+class TestSendQueue:
+    @pytest.mark.asyncio
+    async def test_sends_and_records_message_id(self, repo, jobs, tmp_path):
+        spooled = tmp_path / "a.txt"
+        spooled.write_bytes(b"log")
+        report = _make_report()
+        report_id, job_id = await repo.create_with_send_job(
+            report, [SpooledFile(str(spooled), "a.txt", "text/plain")]
+        )
+
+        bot = FakeBot()
+        assert await _queue(bot, repo, jobs).run_once() is True
+
+        assert bot.calls[0][0] == "send_document"
+        assert (await repo.get_by_id(report_id)).message_id == 101
+        assert (await jobs.get(job_id)).status == "done"
+        assert not spooled.exists()
+
+    @pytest.mark.asyncio
+    async def test_same_content_reuses_file_id(self, repo, jobs, tmp_path):
+        bot = FakeBot()
+        queue = _queue(bot, repo, jobs)
+        report_ids = []
+        for name in ("a.png", "b.png"):
+            path = tmp_path / name
+            path.write_bytes(b"png")
+            report_id, _ = await repo.create_with_send_job(
+                _make_report(), [SpooledFile(str(path), name, "image/png", sha256="abc", size=3)]
+            )
+            report_ids.append(report_id)
+            await queue.run_once()
+
+        first, second = bot.calls
+        assert first[0] == second[0] == "send_photo"
+        assert second[1]["photo"] == "photo-101"
+        assert (await repo.get_by_id(report_ids[0])).media_file_id == "photo-101"
+        assert queue.reused_files == 1
+
+    @pytest.mark.asyncio
+    async def test_media_group_fills_report_media(self, repo, jobs, tmp_path):
+        files = []
+        for i in range(3):
+            path = tmp_path / f"{i}.png"
+            path.write_bytes(b"png")
+            files.append(SpooledFile(str(path), f"{i}.png", "image/png", sha256=f"h{i}", size=3))
+        report_id, _ = await repo.create_with_send_job(_make_report(), files)
+
+        await _queue(FakeBot(), repo, jobs).run_once()
+
+        media = (await repo.get_media([report_id]))[report_id]
+        assert [(m.position, m.file_id, m.sha256, m.message_id) for m in media] == [
+            (0, "album-0", "h0", 200),
+            (1, "album-1", "h1", 201),
+            (2, "album-2", "h2", 202),
+        ]
+        assert (await repo.get_by_id(report_id)).message_id == 200
+
+    @pytest.mark.asyncio
+    async def test_empty_queue(self, repo, jobs):
+        assert await _queue(FakeBot(), repo, jobs).run_once() is False
+
+    @pytest.mark.asyncio
+    async def test_retry_after_reschedules(self, repo, jobs):
+        _, job_id = await repo.create_with_send_job(_make_report(), [])
+        bot = FakeBot([TelegramRetryAfter(_method(), "Flood control", retry_after=30)])
+
+        before = time.time()
+        await _queue(bot, repo, jobs).run_once()
+
+        job = await jobs.get(job_id)
+        assert job.status == "pending"
+        assert job.next_attempt_at >= before + 30
+        assert await jobs.claim_next() is None
+
+    @pytest.mark.asyncio
+    async def test_transient_error_backs_off_then_fails(self, repo, jobs):
+        report_id, job_id = await repo.create_with_send_job(_make_report(), [])
+        bot = FakeBot([TelegramNetworkError(_method(), "timeout")] * 2)
+        queue = _queue(bot, repo, jobs, max_attempts=2, backoff_base=0)
+
+        await queue.run_once()
+        assert (await jobs.get(job_id)).status == "pending"
+
+        await queue.run_once()
+        job = await jobs.get(job_id)
+        assert job.status == "failed"
+        assert job.attempts == 2
+        assert (await repo.get_by_id(report_id)).message_id is None
+
+    @pytest.mark.asyncio
+    async def test_bad_request_is_permanent(self, repo, jobs):
+        _, job_id = await repo.create_with_send_job(_make_report(), [])
+        bot = FakeBot([TelegramBadRequest(_method(), "chat not found")])
+
+        await _queue(bot, repo, jobs).run_once()
+        assert (await jobs.get(job_id)).status == "failed"
+
+    @pytest.mark.asyncio
+    async def test_start_requeues_interrupted_jobs(self, repo, jobs):
+        _, job_id = await repo.create_with_send_job(_make_report(), [])
+        claimed = await jobs.claim_next()
+        assert claimed.status == "running"
+
+        queue = _queue(FakeBot(), repo, jobs, workers=0)
+        await queue.start()
+        await queue.stop()
+
+        assert (await jobs.get(job_id)).status == "pending"
+
+    def test_backoff_is_capped(self):
+        assert backoff_delay(1, 2, 300) <= 2
+        assert 150 <= backoff_delay(20, 2, 300) <= 300
@@ -0,0 +1,150 @@
+import time
+
+import pytest
+
+from webapp.session import (
+    create_session_token,
+    derive_session_key,
+    derive_webapp_secret,
+    verify_session_token,
+)
+from webapp.server import SESSION_TOKEN_TTL, validate_init_data
+
+from tests.test_validate_init_data import BOT_TOKEN, _build_init_data
+
+
+KEY = derive_session_key(BOT_TOKEN)
+
+
+class TestSessionToken:
+    def test_roundtrip(self):
+        token = create_session_token(
+            KEY, {"id": 123, "username": "tester"}, int(time.time()) + 60, chat_id=-100
+        )
+        payload = verify_session_token(KEY, token)
+
+        assert payload["uid"] == 123
+        assert payload["un"] == "tester"
+        assert payload["cid"] == -100
+
+    def test_expired(self):
+        token = create_session_token(KEY, {"id": 123}, int(time.time()) - 1)
+        assert verify_session_token(KEY, token) is None
+
+    def test_tampered_payload(self):
+        token = create_session_token(KEY, {"id": 123}, int(time.time()) + 60)
+        other = create_session_token(KEY, {"id": 456}, int(time.time()) + 60)
+        forged = other.split(".")[0] + "." + token.split(".")[1]
+        assert verify_session_token(KEY, forged) is None
+
+    def test_wrong_key(self):
+        token = create_session_token(KEY, {"id": 123}, int(time.time()) + 60)
+        assert verify_session_token(derive_session_key("other:token"), token) is None
+
+    def test_garbage(self):
+        assert verify_session_token(KEY, "") is None
+        assert verify_session_token(KEY, "not-a-token") is None
+
+
+class TestPrecomputedSecret:
+    def test_validate_with_precomputed_secret(self):
+        params = {
+            "auth_date": str(int(time.time())),
+            "user": '{"id":123,"first_name":"Test"}',
+        }
+        init_data = _build_init_data(params)
+        result = validate_init_data(init_data, BOT_TOKEN, derive_webapp_secret(BOT_TOKEN))
+
+        assert result is not None
+        assert result["user"]["id"] == 123
+
+
+def _init_data(user_id: int = 90, auth_date: int | None = None) -> str:
+    return _build_init_data({
+        "auth_date": str(auth_date or int(time.time())),
+        "user": f'{{"id":{user_id},"username":"tester"}}',
+    })
+
+
+class TestSessionApi:
+    @pytest.mark.asyncio
+    async def test_exchanges_init_data_for_token(self, webapp_client):
+        response = await webapp_client.post("/api/session", json={"init_data": _init_data(91)})
+        result = await response.json()
+
+        assert response.status == 200
+        assert 0 < result["expires_in"] <= SESSION_TOKEN_TTL
+        assert verify_session_token(KEY, result["token"])["uid"] == 91
+
+    @pytest.mark.asyncio
+    async def test_invalid_init_data(self, webapp_client):
+        tampered = _init_data(92).replace("tester", "admin")
+
+        response = await webapp_client.post("/api/session", json={"init_data": tampered})
+
+        assert response.status == 401
+
+    @pytest.mark.asyncio
+    async def test_malformed_body(self, webapp_client):
+        response = await webapp_client.post("/api/session", json=["not", "an", "object"])
+
+        assert response.status == 400
+
+
+class TestAuthMiddleware:
+    @pytest.mark.asyncio
+    async def test_bearer_token(self, webapp_client):
+        token = create_session_token(KEY, {"id": 93}, int(time.time()) + 60)
+
+        response = await webapp_client.get(
+            "/api/user-reports", headers={"Authorization": f"Bearer {token}"}
+        )
+
+        assert response.status == 200
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_init_data_in_body(self, webapp_client):
+        response = await webapp_client.post(
+            "/api/user-reports", json={"init_data": _init_data(94)}
+        )
+
+        assert response.status == 200
+        assert (await response.json())["success"] is True
+
+    @pytest.mark.asyncio
+    async def test_expired_token(self, webapp_client):
+        token = create_session_token(KEY, {"id": 95}, int(time.time()) - 1)
+
+        response = await webapp_client.get(
+            "/api/user-reports", headers={"Authorization": f"Bearer {token}"}
+        )
+
+        assert response.status == 401
+
+    @pytest.mark.asyncio
+    async def test_tampered_token(self, webapp_client):
+        # Тело от другого пользователя с подписью исходного токена
+        token = create_session_token(KEY, {"id": 96}, int(time.time()) + 60)
+        forged = create_session_token(KEY, {"id": 1}, int(time.time()) + 60)
+        tampered = forged.split(".")[0] + "." + token.split(".")[1]
+
+        response = await webapp_client.get(
+            "/api/user-reports", headers={"Authorization": f"Bearer {tampered}"}
+        )
+
+        assert response.status == 401
+
+    @pytest.mark.asyncio
+    async def test_invalid_bearer_does_not_fall_back(self, webapp_client):
+        response = await webapp_client.post(
+            "/api/user-reports", json={"init_data": _init_data(97)},
+            headers={"Authorization": "Bearer garbage"},
+        )
+
+        assert response.status == 401
+
+    @pytest.mark.asyncio
+    async def test_missing_credentials(self, webapp_client):
+        response = await webapp_client.get("/api/user-reports")
+
+        assert response.status == 401
@@ -0,0 +1,52 @@
+import gzip
+import json
+import shutil
+
+import pytest
+
+from webapp import static_build
+from webapp.static_build import build, minify_css
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    root = tmp_path / "static"
+    shutil.copytree(static_build.STATIC_DIR, root, ignore=shutil.ignore_patterns("dist", ".dist.tmp"))
+    return root
+
+
+class TestMinifyCss:
+    def test_strips_comments_and_whitespace(self):
+        css = "/* header */\n.a ,\n.b {\n    color: red;\n    margin: 0 auto;\n}\n"
+        assert minify_css(css) == ".a,.b{color: red;margin: 0 auto}"
+
+    def test_keeps_strings(self):
+        css = '.a::before { content: "/* not a comment */ ;  x"; }'
+        assert minify_css(css) == '.a::before{content: "/* not a comment */ ;  x"}'
+
+
+class TestBuild:
+    def test_fingerprints_and_rewrites_index(self, static_dir):
+        manifest = build(static_dir)
+        dist = static_dir / static_build.DIST_NAME
+
+        assert set(manifest) == set(static_build.ASSETS)
+        assert json.loads((dist / "manifest.json").read_text()) == manifest
+
+        index = (dist / "index.html").read_text(encoding="utf-8")
+        for built in manifest.values():
+            assert f"/static/dist/{built}" in index
+            data = (dist / built).read_bytes()
+            assert gzip.decompress((dist / f"{built}.gz").read_bytes()) == data
+        assert "/static/js/app.js" not in index
+        assert "/static/css/style.css" not in index
+
+    def test_same_sources_same_names(self, static_dir):
+        first = build(static_dir)
+        assert build(static_dir) == first
+
+        (static_dir / "css" / "style.css").write_text("body { color: red; }", encoding="utf-8")
+        second = build(static_dir)
+        assert second["css/style.css"] != first["css/style.css"]
+        assert second["js/app.js"] == first["js/app.js"]
+        assert not (static_dir / static_build.DIST_NAME / first["css/style.css"]).exists()
@@ -0,0 +1,178 @@
+import asyncio
+import hashlib
+import os
+
+import aiohttp
+import pytest
+
+from tests.test_list_api import _auth_headers
+from webapp.uploads import UploadError, UploadOffsetMismatch, UploadStore
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+async def _broken(data, fail_after):
+    yield data[:fail_after]
+    raise ConnectionResetError()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(tmp_path / "uploads", max_size=1024)
+
+
+class TestUploadStore:
+    @pytest.mark.asyncio
+    async def test_chunked_upload_and_claim(self, store, tmp_path):
+        upload = await store.create(1, "video.mp4", "video/mp4", 10)
+
+        upload = await store.append(upload, 0, _chunks(b"0123"))
+        upload = await store.append(upload, 4, _chunks(b"456", b"789"))
+        upload = await store.finalize(await store.get(upload.id, 1))
+
+        assert upload.sha256 == hashlib.sha256(b"0123456789").hexdigest()
+
+        spooled = await store.claim(upload, tmp_path / "spool")
+        assert spooled.media_type == "video"
+        assert spooled.size == 10
+        with open(spooled.path, "rb") as f:
+            assert f.read() == b"0123456789"
+        with pytest.raises(UploadError):
+            await store.get(upload.id, 1)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_claim_gets_one_file(self, store, tmp_path):
+        upload = await store.create(1, "a.bin", "", 3)
+        await store.append(upload, 0, _chunks(b"abc"))
+        upload = await store.finalize(upload)
+        first, second = await store.get(upload.id, 1), await store.get(upload.id, 1)
+
+        results = await asyncio.gather(
+            store.claim(first, tmp_path / "spool"), store.claim(second, tmp_path / "spool"),
+            return_exceptions=True,
+        )
+
+        errors = [r for r in results if isinstance(r, Exception)]
+        assert len(errors) == 1
+        assert isinstance(errors[0], UploadError) and errors[0].status in (404, 409)
+
+    @pytest.mark.asyncio
+    async def test_release_returns_claimed_file(self, store, tmp_path):
+        upload = await store.create(1, "a.bin", "", 3)
+        await store.append(upload, 0, _chunks(b"abc"))
+        upload = await store.finalize(upload)
+        spooled = await store.claim(upload, tmp_path / "spool")
+
+        await store.release(upload, spooled)
+
+        restored = await store.get(upload.id, 1)
+        assert restored.finalized and restored.offset == 3
+        assert not os.path.exists(spooled.path)
+
+    @pytest.mark.asyncio
+    async def test_resume_after_disconnect(self, store):
+        upload = await store.create(1, "a.bin", "", 8)
+
+        with pytest.raises(ConnectionResetError):
+            await store.append(upload, 0, _broken(b"abcdefgh", 5))
+
+        resumed = await store.get(upload.id, 1)
+        assert resumed.offset == 5
+        resumed = await store.append(resumed, 5, _chunks(b"fgh"))
+        assert (await store.finalize(resumed)).finalized
+
+    @pytest.mark.asyncio
+    async def test_wrong_offset_reports_current(self, store):
+        upload = await store.create(1, "a.bin", "", 8)
+        await store.append(upload, 0, _chunks(b"abc"))
+
+        with pytest.raises(UploadOffsetMismatch) as exc:
+            await store.append(await store.get(upload.id, 1), 0, _chunks(b"abc"))
+        assert exc.value.offset == 3
+
+    @pytest.mark.asyncio
+    async def test_rejects_data_past_declared_size(self, store):
+        upload = await store.create(1, "a.bin", "", 2)
+
+        with pytest.raises(UploadError) as exc:
+            await store.append(upload, 0, _chunks(b"abc"))
+        assert exc.value.status == 413
+
+    @pytest.mark.asyncio
+    async def test_finalize_incomplete(self, store):
+        upload = await store.create(1, "a.bin", "", 4)
+        await store.append(upload, 0, _chunks(b"ab"))
+
+        with pytest.raises(UploadOffsetMismatch):
+            await store.finalize(await store.get(upload.id, 1))
+
+    @pytest.mark.asyncio
+    async def test_other_user_cannot_see_upload(self, store):
+        upload = await store.create(1, "a.bin", "", 4)
+
+        with pytest.raises(UploadError) as exc:
+            await store.get(upload.id, 2)
+        assert exc.value.status == 404
+
+    @pytest.mark.asyncio
+    async def test_rejects_bad_id_and_size(self, store):
+        with pytest.raises(UploadError):
+            await store.get("../../etc/passwd", 1)
+        with pytest.raises(UploadError):
+            await store.create(1, "big.bin", "", 4096)
+
+    @pytest.mark.asyncio
+    async def test_cleanup_expired(self, store):
+        await store.create(1, "a.bin", "", 4)
+        store.ttl = -1
+
+        assert await store.cleanup_expired() == 1
+        assert list(store.root.iterdir()) == []
+
+
+async def _finished_upload(client, headers) -> str:
+    created = await client.post("/api/uploads", json={
+        "filename": "a.txt", "content_type": "text/plain", "size": 3,
+    }, headers=headers)
+    upload_id = (await created.json())["upload_id"]
+    await client.put(
+        f"/api/uploads/{upload_id}", data=b"abc", headers={**headers, "Upload-Offset": "0"}
+    )
+    await client.post(f"/api/uploads/{upload_id}/finalize", headers=headers)
+    return upload_id
+
+
+class TestReportWithUploads:
+    @pytest.mark.asyncio
+    async def test_duplicate_upload_id_rejected(self, webapp_client):
+        headers = await _auth_headers(webapp_client, 80)
+        upload_id = await _finished_upload(webapp_client, headers)
+
+        form = aiohttp.FormData(default_to_multipart=True)
+        form.add_field("upload_id", upload_id)
+        form.add_field("upload_id", upload_id)
+        response = await webapp_client.post("/api/report", data=form, headers=headers)
+
+        assert response.status == 400
+        assert (await response.json())["error"] == "Повторяющийся upload_id"
+
+    @pytest.mark.asyncio
+    async def test_upload_is_returned_when_report_fails(self, webapp_client, repo, monkeypatch):
+        headers = await _auth_headers(webapp_client, 81)
+        upload_id = await _finished_upload(webapp_client, headers)
+
+        async def broken(*args, **kwargs):
+            raise RuntimeError("database is locked")
+        monkeypatch.setattr(repo, "create_with_send_job", broken)
+
+        form = aiohttp.FormData(default_to_multipart=True)
+        form.add_field("upload_id", upload_id)
+        response = await webapp_client.post("/api/report", data=form, headers=headers)
+        assert response.status == 500
+
+        state = await webapp_client.get(f"/api/uploads/{upload_id}", headers=headers)
+        assert state.status == 200
+        assert (await state.json())["finalized"] is True
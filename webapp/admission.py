@@ -0,0 +1,100 @@
+"""Контроль допуска загрузок.
+
+Каждая загрузка (часть файла или multipart-репорт) до чтения тела
+резервирует заявленный Content-Length. Новая загрузка не допускается, если
+уже идёт max_concurrent загрузок, если в сумме в полёте больше max_bytes
+или если после записи на диске останется меньше min_free_bytes. Отказ —
+AdmissionRejected с временем, через которое стоит повторить.
+"""
+import logging
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Загрузка не допущена; retry_after — через сколько секунд повторить"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Сервер загружен ({reason}), повторите позже")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _free_space(path: Path) -> int:
+    """Свободное место на диске, где лежит (или будет лежать) path"""
+    path = Path(path).absolute()
+    while not path.exists() and path.parent != path:
+        path = path.parent
+    return shutil.disk_usage(path).free
+
+
+class UploadAdmission:
+    """Ограничение одновременных загрузок и байтов в полёте"""
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_bytes: int = 1024 * 1024 * 1024,
+        min_free_bytes: int = 1024 * 1024 * 1024,
+        retry_after: int = 5,
+        disk_retry_after: int = 60,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_bytes = max_bytes
+        self.min_free_bytes = min_free_bytes
+        self.retry_after = retry_after
+        self.disk_retry_after = disk_retry_after
+        self.active = 0
+        self.in_flight_bytes = 0
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {"concurrency": 0, "bytes": 0, "disk": 0}
+
+    def _reject(self, reason: str, retry_after: int) -> None:
+        self.rejected[reason] += 1
+        logger.warning(
+            f"Загрузка отклонена ({reason}): активных {self.active}, "
+            f"в полёте {self.in_flight_bytes} байт"
+        )
+        raise AdmissionRejected(reason, retry_after)
+
+    def check_disk(self, nbytes: int, path: Path) -> None:
+        """Хватит ли места под nbytes с учётом уже зарезервированного"""
+        if _free_space(path) - self.in_flight_bytes - nbytes < self.min_free_bytes:
+            self._reject("disk", self.disk_retry_after)
+
+    @contextmanager
+    def admit(self, nbytes: int, path: Path) -> Iterator[None]:
+        """Зарезервировать место под загрузку на время блока with.
+
+        Загрузка больше max_bytes допускается, только если других нет,
+        иначе она никогда бы не прошла.
+        """
+        if self.active >= self.max_concurrent:
+            self._reject("concurrency", self.retry_after)
+        if self.in_flight_bytes and self.in_flight_bytes + nbytes > self.max_bytes:
+            self._reject("bytes", self.retry_after)
+        self.check_disk(nbytes, path)
+
+        self.active += 1
+        self.in_flight_bytes += nbytes
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.in_flight_bytes -= nbytes
+
+    def stats(self) -> dict:
+        """Метрики для /health"""
+        return {
+            "active": self.active,
+            "max_concurrent": self.max_concurrent,
+            "in_flight_bytes": self.in_flight_bytes,
+            "max_bytes": self.max_bytes,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
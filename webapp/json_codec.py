@@ -0,0 +1,56 @@
+"""JSON-ответы API с быстрым кодировщиком.
+
+Если установлен orjson, ответы кодируются им сразу в bytes, без
+промежуточной строки; иначе — стандартным json. Все обработчики
+используют json_response отсюда вместо web.json_response.
+"""
+import json
+from typing import Any, Callable, Dict, Optional
+
+from aiohttp import web
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None
+
+
+def _stdlib_dumps(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _orjson_dumps(data: Any) -> bytes:
+    # Ключи-числа допускаются, как и в стандартном json
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+
+dumps: Callable[[Any], bytes] = _orjson_dumps if orjson is not None else _stdlib_dumps
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def json_response(
+    data: Any, *, status: int = 200, headers: Optional[dict] = None
+) -> web.Response:
+    """Ответ application/json (UTF-8)"""
+    return web.Response(
+        body=dumps(data), status=status, headers=headers,
+        content_type="application/json", charset="utf-8",
+    )
+
+
+def json_response_with_raw(
+    data: Dict[str, Any], raw: Dict[str, str], *, status: int = 200, headers: Optional[dict] = None
+) -> web.Response:
+    """Ответ-объект, в который готовые JSON-фрагменты из raw вставляются как есть.
+
+    Нужен для списков, собранных в JSON самой SQLite: фрагмент не
+    разбирается и не кодируется повторно.
+    """
+    parts = [dumps(key) + b":" + value.encode("utf-8") for key, value in raw.items()]
+    encoded = dumps(data)
+    if len(encoded) > 2:
+        parts.append(encoded[1:-1])
+    return web.Response(
+        body=b"{" + b",".join(parts) + b"}", status=status, headers=headers,
+        content_type="application/json", charset="utf-8",
+    )
@@ -1,45 +1,65 @@
-import csv
+import asyncio
 import hashlib
 import hmac
-import io
 import json
 import logging
 import os
 import re
-import tempfile
 import time
+import uuid
+from contextlib import aclosing
 from datetime import datetime
 from pathlib import Path
+from typing import List, Tuple
 from urllib.parse import parse_qsl
 
 import aiofiles
 from aiohttp import web
 
-from aiogram.types import (
-    FSInputFile, InputMediaPhoto, InputMediaVideo, InputMediaDocument,
-    InlineKeyboardMarkup, InlineKeyboardButton,
-)
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.exceptions import TelegramBadRequest
 
-from app.database.models import BugReport
+from app.database.models import BugReport, SpooledFile, STATUS_LABELS
+from app.database.repository import StaleReportError
+from app.utils.admin_cache import AdminCache
+from app.utils.csv_export import iter_csv_chunks
+from app.utils import metrics
+from app.utils.edit_scheduler import EditScheduler
 from app.utils.report_formatter import format_final_report
-from config import WEBAPP_URL, TELEGRAM_LOCAL, TELEGRAM_LOCAL_FILES_DIR
+from webapp.session import (
+    derive_webapp_secret, derive_session_key,
+    create_session_token, verify_session_token,
+)
+from webapp import static_build
+from webapp.admission import AdmissionRejected, UploadAdmission
+from webapp import json_codec
+from webapp.json_codec import json_response, json_response_with_raw
+from webapp.uploads import UploadError, UploadOffsetMismatch, UploadState, UploadStore
+from config import (
+    WEBAPP_URL, TELEGRAM_LOCAL, TELEGRAM_LOCAL_FILES_DIR, SPOOL_DIR, UPLOAD_DIR,
+    ADMIN_CACHE_TTL, ADMIN_CACHE_NEGATIVE_TTL, ADMIN_CACHE_MAX_SIZE,
+    EDIT_DEBOUNCE_SECONDS, STATIC_BUILD, UPLOAD_MAX_CONCURRENT, UPLOAD_MAX_INFLIGHT_MB, UPLOAD_MIN_FREE_DISK_MB,
+)
 
 STATIC_DIR = Path(__file__).parent / "static"
+DIST_DIR = STATIC_DIR / static_build.DIST_NAME
+# Собранные файлы с хэшем в имени не меняются никогда
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
 logger = logging.getLogger(__name__)
 
 INIT_DATA_MAX_AGE = 86400
+SESSION_TOKEN_TTL = 3600
 MAX_FILE_SIZE = 500 * 1024 * 1024
 MAX_FILES = 10
-TELEGRAM_SEND_TIMEOUT = 300
+# Файлы плюс запас на текстовые поля формы
+MAX_REPORT_SIZE = MAX_FILES * MAX_FILE_SIZE + 1024 * 1024
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
 
-STATUS_LABELS = {
-    'new': 'Новая',
-    'revision': 'Доработка',
-    'in_progress': 'В работе',
-    'completed': 'Завершена',
-    'trash': 'Отказ',
-}
+CSV_EXPORT_BATCH_SIZE = 500
+# Списки отдают краткую форму репорта: описание обрезается, полный репорт —
+# через /api/get-reports при открытии карточки
+LIST_DESCRIPTION_CHARS = 200
+MAX_BATCH_REPORTS = 100
 
 
 def _get_bot(request):
@@ -54,7 +74,13 @@ def _get_token(request):
     return request.app["bot_token"]
 
 
-def validate_init_data(init_data: str, bot_token: str) -> dict | None:
+def _get_admin_cache(request) -> AdminCache:
+    return request.app["admin_cache"]
+
+
+def validate_init_data(
+    init_data: str, bot_token: str, secret_key: bytes | None = None
+) -> dict | None:
     """Валидация init_data из Telegram WebApp"""
     try:
         parsed = dict(parse_qsl(init_data, keep_blank_values=True))
@@ -67,11 +93,8 @@ def validate_init_data(init_data: str, bot_token: str) -> dict | None:
         data_check_arr = sorted([f"{k}={v}" for k, v in parsed.items()])
         data_check_string = "\n".join(data_check_arr)
 
-        secret_key = hmac.new(
-            b"WebAppData",
-            bot_token.encode(),
-            hashlib.sha256
-        ).digest()
+        if secret_key is None:
+            secret_key = derive_webapp_secret(bot_token)
 
         calculated_hash = hmac.new(
             secret_key,
@@ -79,7 +102,7 @@ def validate_init_data(init_data: str, bot_token: str) -> dict | None:
             hashlib.sha256
         ).hexdigest()
 
-        if calculated_hash != received_hash:
+        if not hmac.compare_digest(calculated_hash, received_hash):
             logger.warning("Неверный хэш init_data")
             return None
 
@@ -104,12 +127,21 @@ def validate_init_data(init_data: str, bot_token: str) -> dict | None:
         return None
 
 
+def _init_data_chat_id(validated: dict) -> int | None:
+    """ID чата из проверенного init_data, если он передан"""
+    if "chat" not in validated:
+        return None
+    chat_data = json.loads(validated["chat"]) if isinstance(validated["chat"], str) else validated["chat"]
+    return chat_data.get("id")
+
+
 def no_cache_response(file_path: Path) -> web.FileResponse:
     """Ответ без кэширования"""
     response = web.FileResponse(file_path)
     response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
     response.headers["Pragma"] = "no-cache"
     response.headers["Expires"] = "0"
+    response.headers["Vary"] = "Accept-Encoding"
     return response
 
 
@@ -131,11 +163,36 @@ async def get_chat_member_safe(bot, chat_id: int, user_id: int):
         raise
 
 
-async def _check_admin(bot, chat_id: int, user_id: int) -> bool:
-    """Проверить, является ли пользователь админом чата"""
+async def _reports_with_media(repo, reports, include_admin_fields: bool = False) -> list:
+    """Сериализация репортов вместе с вложениями (одним запросом на все)"""
+    media = await repo.get_media(r.id for r in reports)
+    result = []
+    for report in reports:
+        data = report.to_dict(include_admin_fields=include_admin_fields)
+        data["media"] = [m.to_dict() for m in media.get(report.id, [])]
+        result.append(data)
+    return result
+
+
+async def _fetch_admin_status(bot, chat_id: int, user_id: int) -> bool:
+    """Запросить статус участника чата у Telegram"""
     try:
         member = await get_chat_member_safe(bot, chat_id, user_id)
-        return member.status in ("administrator", "creator")
+    except TelegramBadRequest:
+        # Пользователь не в чате или чат недоступен — кэшируем как отказ
+        return False
+    return member.status in ("administrator", "creator")
+
+
+async def _check_admin(request, chat_id: int, user_id: int) -> bool:
+    """Проверить, является ли пользователь админом чата (с кэшем)"""
+    bot = _get_bot(request)
+    try:
+        chat_id, user_id = int(chat_id), int(user_id)
+        return await _get_admin_cache(request).get_or_load(
+            chat_id, user_id,
+            lambda: _fetch_admin_status(bot, chat_id, user_id)
+        )
     except Exception:
         return False
 
@@ -198,16 +255,27 @@ async def send_revision_completed_notification(bot, report, admin_user_id: int):
         logger.warning(f"Не удалось отправить уведомление админу: {e}")
 
 
+def _route_label(request) -> str:
+    """Шаблон маршрута для метки метрики: путь с ID дал бы по серии на запрос"""
+    route = request.match_info.route
+    if route.resource is None:
+        return "unmatched"
+    return route.resource.canonical
+
+
 @web.middleware
 async def request_logging_middleware(request, handler):
-    """Логирование HTTP-запросов"""
+    """Логирование HTTP-запросов и гистограмма времени по маршруту и статусу"""
     start = time.monotonic()
+    status = 500
     try:
         response = await handler(request)
+        status = response.status
         elapsed = (time.monotonic() - start) * 1000
         logger.info(f"{request.method} {request.path} → {response.status} ({elapsed:.0f}ms)")
         return response
     except web.HTTPException as e:
+        status = e.status
         elapsed = (time.monotonic() - start) * 1000
         logger.info(f"{request.method} {request.path} → {e.status} ({elapsed:.0f}ms)")
         raise
@@ -215,39 +283,163 @@ async def request_logging_middleware(request, handler):
         elapsed = (time.monotonic() - start) * 1000
         logger.error(f"{request.method} {request.path} → 500 ({elapsed:.0f}ms) {e}")
         raise
+    finally:
+        metrics.HTTP_REQUEST_SECONDS.observe(
+            time.monotonic() - start, request.method, _route_label(request), str(status)
+        )
+
+
+async def _authenticate(request) -> dict | None:
+    """Определить пользователя по сессионному токену или init_data"""
+    auth_header = request.headers.get("Authorization", "")
+    if auth_header.startswith("Bearer "):
+        payload = verify_session_token(request.app["session_key"], auth_header[7:])
+        if not payload:
+            return None
+        request["auth_chat_id"] = payload.get("cid")
+        return {"id": payload["uid"], "username": payload.get("un")}
+
+    # Совместимость со старыми клиентами: init_data в JSON-теле запроса
+    if request.content_type != "application/json":
+        return None
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    validated = validate_init_data(
+        data.get("init_data", ""), _get_token(request), request.app["webapp_secret"]
+    )
+    if not validated:
+        return None
+    return validated.get("user") or None
+
+
+@web.middleware
+async def auth_middleware(request, handler):
+    """Аутентификация API-запросов: пользователь кладётся в request["user"]"""
+    if request.path.startswith("/api/") and request.path != "/api/session":
+        request["user"] = await _authenticate(request)
+    return await handler(request)
 
 
 async def health(request):
     """Health check"""
-    return web.json_response({"status": "ok"})
+    data = {
+        "status": "ok",
+        "json": json_codec.BACKEND,
+        "admin_cache": _get_admin_cache(request).stats(),
+    }
+    send_queue = request.app.get("send_queue")
+    if send_queue is not None:
+        data["send_queue"] = await send_queue.stats()
+    rate_limiter = request.app.get("rate_limiter")
+    if rate_limiter is not None:
+        data["rate_limiter"] = rate_limiter.stats()
+    edit_scheduler = request.app.get("edit_scheduler")
+    if edit_scheduler is not None:
+        data["edit_scheduler"] = edit_scheduler.stats()
+    data["upload_admission"] = _get_admission(request).stats()
+    return json_response(data)
+
+
+async def metrics_handler(request):
+    """Метрики процесса в текстовом формате Prometheus"""
+    return web.Response(
+        text=metrics.REGISTRY.render(),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+    )
 
 
 async def index(request):
-    """Главная страница Web App"""
+    """Главная страница Web App.
+
+    В режиме сборки отдаётся dist/index.html со ссылками на файлы с хэшем;
+    FileResponse сам выбирает .br или .gz по Accept-Encoding.
+    """
+    if request.app["static_build"]:
+        return no_cache_response(DIST_DIR / "index.html")
     return no_cache_response(STATIC_DIR / "index.html")
 
 
+async def static_asset(request):
+    """Собранный ресурс из dist: предсжатый и кэшируемый навсегда"""
+    path = (DIST_DIR / request.match_info["path"]).resolve()
+    if not path.is_relative_to(DIST_DIR.resolve()) or not path.is_file():
+        raise web.HTTPNotFound()
+    response = web.FileResponse(path)
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+def _get_admission(request) -> UploadAdmission:
+    return request.app["upload_admission"]
+
+
+def _admission_rejected_response(e: AdmissionRejected):
+    return json_response(
+        {"success": False, "error": str(e), "retry_after": e.retry_after},
+        status=503,
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
 async def handle_report(request):
-    """Обработка отправки баг-репорта"""
-    bot = _get_bot(request)
+    """Приём баг-репорта с контролем допуска.
+
+    Размер тела известен из Content-Length до чтения: слишком большой запрос
+    отклоняется сразу, а при перегрузке клиент получает 503 с Retry-After.
+    """
+    spool_dir = TELEGRAM_LOCAL_FILES_DIR if TELEGRAM_LOCAL else SPOOL_DIR
+    content_length = request.content_length
+    if content_length is not None and content_length > MAX_REPORT_SIZE:
+        return json_response({"success": False, "error": "Слишком большой запрос"}, status=413)
+
+    # Без Content-Length (chunked) резервируется и принимается не больше одного файла
+    budget = content_length if content_length is not None else MAX_FILE_SIZE
+    try:
+        with _get_admission(request).admit(budget, spool_dir):
+            return await _receive_report(request, spool_dir, budget)
+    except AdmissionRejected as e:
+        return _admission_rejected_response(e)
+
+
+async def _receive_report(request, spool_dir: Path, budget: int):
+    """Приём баг-репорта: сохранение в БД и постановка в очередь отправки.
+
+    Вложения передаются полями upload_id (файлы, загруженные через
+    /api/uploads) или, для старых клиентов, частями media. Они складываются
+    в каталог очереди, репорт и задание отправки записываются одной
+    транзакцией, и ответ уходит сразу — загрузкой в Telegram занимаются
+    воркеры SendQueue.
+    """
     repo = _get_repo(request)
     bot_token = _get_token(request)
-    temp_files = []
+    media_files: List[SpooledFile] = []
+    store = _get_upload_store(request)
+    uploads: List[UploadState] = []
+    claimed: List[Tuple[UploadState, SpooledFile]] = []
+    received = 0
+    enqueued = False
 
     try:
         reader = await request.multipart()
 
         data = {}
-        media_files = []
+        upload_ids = []
 
         while True:
             part = await reader.next()
             if part is None:
                 break
 
-            if part.name == "media":
+            if part.name == "upload_id":
+                upload_ids.append(await part.text())
+            elif part.name == "media":
                 if len(media_files) >= MAX_FILES:
-                    return web.json_response(
+                    return json_response(
                         {"success": False, "error": f"Максимум {MAX_FILES} файлов"},
                         status=400
                     )
@@ -257,49 +449,85 @@ async def handle_report(request):
 
                 suffix = Path(media_filename).suffix if media_filename else ""
 
-                if TELEGRAM_LOCAL:
-                    import uuid
-                    TELEGRAM_LOCAL_FILES_DIR.mkdir(parents=True, exist_ok=True)
-                    unique_name = f"{uuid.uuid4().hex}{suffix}"
-                    temp_path = str(TELEGRAM_LOCAL_FILES_DIR / unique_name)
-                    temp_fd = os.open(temp_path, os.O_CREAT | os.O_WRONLY, 0o644)
-                else:
-                    temp_fd, temp_path = tempfile.mkstemp(suffix=suffix)
-                    temp_files.append(temp_path)
+                spool_dir.mkdir(parents=True, exist_ok=True)
+                temp_path = str(spool_dir / f"{uuid.uuid4().hex}{suffix}")
+                spooled = SpooledFile(temp_path, media_filename, media_content_type)
+                media_files.append(spooled)
 
+                # Хэш считается на лету — по нему повторно отправленный файл
+                # уходит в Telegram по file_id без загрузки
+                digest = hashlib.sha256()
                 file_size = 0
-                try:
-                    async with aiofiles.open(temp_path, 'wb') as f:
-                        while True:
-                            chunk = await part.read_chunk(8192)
-                            if not chunk:
-                                break
-                            file_size += len(chunk)
-                            if file_size > MAX_FILE_SIZE:
-                                max_size_mb = MAX_FILE_SIZE // (1024 * 1024)
-                                return web.json_response(
-                                    {"success": False, "error": f"Файл слишком большой (макс. {max_size_mb}MB)"},
-                                    status=400
-                                )
-                            await f.write(chunk)
-                finally:
-                    os.close(temp_fd)
-
-                media_files.append((temp_path, media_filename, media_content_type))
+                async with aiofiles.open(temp_path, 'wb') as f:
+                    while True:
+                        chunk = await part.read_chunk(8192)
+                        if not chunk:
+                            break
+                        file_size += len(chunk)
+                        received += len(chunk)
+                        metrics.UPLOAD_BYTES.inc("report", amount=len(chunk))
+                        if received > budget:
+                            return json_response(
+                                {"success": False, "error": "Слишком большой запрос"},
+                                status=413
+                            )
+                        if file_size > MAX_FILE_SIZE:
+                            max_size_mb = MAX_FILE_SIZE // (1024 * 1024)
+                            return json_response(
+                                {"success": False, "error": f"Файл слишком большой (макс. {max_size_mb}MB)"},
+                                status=400
+                            )
+                        digest.update(chunk)
+                        await f.write(chunk)
+                    await f.flush()
+                    # fsync файла в сотни мегабайт не должен держать цикл событий
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(None, os.fsync, f.fileno())
+
+                spooled.sha256 = digest.hexdigest()
+                spooled.size = file_size
             else:
                 value = await part.text()
                 data[part.name] = value
 
-        init_data = data.get("init_data", "")
-        validated = validate_init_data(init_data, bot_token)
+        user = request.get("user")
+        auth_chat_id = request.get("auth_chat_id")
 
-        if not validated:
-            logger.warning("Невалидный init_data")
+        if not user:
+            validated = validate_init_data(
+                data.get("init_data", ""), bot_token, request.app["webapp_secret"]
+            )
+            if not validated:
+                logger.warning("Невалидный init_data")
+            else:
+                user = validated.get("user")
+                auth_chat_id = _init_data_chat_id(validated)
 
-        user_data = validated.get("user", {}) if validated else {}
+        user_data = user or {}
         user_id = user_data.get("id") or 0
         username = user_data.get("username")
 
+        if upload_ids:
+            if not user_id:
+                return json_response({"success": False, "error": "Unauthorized"}, status=401)
+            if len(media_files) + len(upload_ids) > MAX_FILES:
+                return json_response(
+                    {"success": False, "error": f"Максимум {MAX_FILES} файлов"},
+                    status=400
+                )
+            if len(set(upload_ids)) != len(upload_ids):
+                return json_response(
+                    {"success": False, "error": "Повторяющийся upload_id"}, status=400
+                )
+            try:
+                for upload_id in upload_ids:
+                    upload = await store.get(upload_id, user_id)
+                    if not upload.finalized:
+                        raise UploadError("Загрузка не завершена")
+                    uploads.append(upload)
+            except UploadError as e:
+                return _upload_error_response(e)
+
         chat_id = None
 
         if data.get("chat_id"):
@@ -308,9 +536,8 @@ async def handle_report(request):
             except ValueError:
                 pass
 
-        if not chat_id and validated and "chat" in validated:
-            chat_data = json.loads(validated["chat"]) if isinstance(validated["chat"], str) else validated["chat"]
-            chat_id = chat_data.get("id")
+        if not chat_id and auth_chat_id:
+            chat_id = auth_chat_id
 
         if not chat_id:
             chat_id = user_id
@@ -323,20 +550,15 @@ async def handle_report(request):
             except ValueError:
                 pass
 
-        prepared_media = []
-        for temp_path, media_filename, media_content_type in media_files:
-            input_file = FSInputFile(temp_path, filename=media_filename or "file")
-
-            if media_content_type.startswith("image/"):
-                media_type = "photo"
-            elif media_content_type.startswith("video/"):
-                media_type = "video"
-            else:
-                media_type = "document"
-
-            prepared_media.append((input_file, media_type))
-
-        first_media_type = prepared_media[0][1] if prepared_media else None
+        # Загрузки забираются после проверки полей: если репорт не создастся,
+        # файлы вернутся в хранилище и клиент сможет повторить запрос
+        try:
+            for upload in uploads:
+                spooled = await store.claim(upload, spool_dir)
+                claimed.append((upload, spooled))
+                media_files.append(spooled)
+        except UploadError as e:
+            return _upload_error_response(e)
 
         report = BugReport(
             id=None,
@@ -352,323 +574,452 @@ async def handle_report(request):
             subscriber_info=data.get("subscriber"),
             description=data.get("description", ""),
             media_file_id=None,
-            media_type=first_media_type,
+            media_type=media_files[0].media_type if media_files else None,
             message_id=None
         )
 
-        report_id = await repo.create(report)
-        report.id = report_id
+        # Локальный Bot API читает файлы с диска сам — их не удаляем
+        await repo.create_with_send_job(report, media_files, cleanup_files=not TELEGRAM_LOCAL)
+        enqueued = True
+        request.app["send_queue"].notify()
 
-        final_text = format_final_report(report, username)
+        logger.info(f"Репорт #{report.report_number} создан для чата {chat_id}, поставлен в очередь")
 
-        async def send_single_media(input_file, media_type, caption_text):
-            """Отправка одного медиафайла"""
-            try:
-                if media_type == "photo":
-                    return await bot.send_photo(
-                        chat_id=chat_id, photo=input_file,
-                        caption=caption_text, parse_mode="HTML",
-                        request_timeout=TELEGRAM_SEND_TIMEOUT
-                    )
-                elif media_type == "video":
-                    return await bot.send_video(
-                        chat_id=chat_id, video=input_file,
-                        caption=caption_text, parse_mode="HTML",
-                        request_timeout=TELEGRAM_SEND_TIMEOUT
-                    )
-                else:
-                    return await bot.send_document(
-                        chat_id=chat_id, document=input_file,
-                        caption=caption_text, parse_mode="HTML",
-                        request_timeout=TELEGRAM_SEND_TIMEOUT
-                    )
-            except TelegramBadRequest as e:
-                error_msg = str(e).lower()
-                if "image_process_failed" in error_msg or "wrong file" in error_msg:
-                    logger.warning(f"Ошибка обработки медиа, отправляю как документ: {e}")
-                    new_input_file = FSInputFile(input_file.path, filename=input_file.filename)
-                    return await bot.send_document(
-                        chat_id=chat_id, document=new_input_file,
-                        caption=caption_text, parse_mode="HTML",
-                        request_timeout=TELEGRAM_SEND_TIMEOUT
-                    )
-                raise
+        return json_response({"success": True, "report_number": report.report_number})
+
+    except ConnectionResetError:
+        logger.warning("Клиент отключился во время загрузки")
+        return json_response({"success": False, "error": "Соединение прервано"}, status=499)
 
-        if len(prepared_media) > 1:
-            media_group = []
-            for i, (input_file, media_type) in enumerate(prepared_media):
-                caption = final_text if i == 0 else None
-                parse_mode = "HTML" if i == 0 else None
+    except Exception as e:
+        logger.exception(f"Ошибка обработки репорта: {e}")
+        return json_response({"success": False, "error": "Внутренняя ошибка сервера"}, status=500)
 
-                if media_type == "photo":
-                    media_group.append(InputMediaPhoto(media=input_file, caption=caption, parse_mode=parse_mode))
-                elif media_type == "video":
-                    media_group.append(InputMediaVideo(media=input_file, caption=caption, parse_mode=parse_mode))
-                else:
-                    media_group.append(InputMediaDocument(media=input_file, caption=caption, parse_mode=parse_mode))
+    finally:
+        if not enqueued:
+            for upload, spooled in claimed:
+                try:
+                    await store.release(upload, spooled)
+                except Exception as e:
+                    logger.warning(f"Не удалось вернуть загрузку {upload.id}: {e}")
+            returned = {spooled.path for _, spooled in claimed}
+            for media in media_files:
+                if media.path in returned:
+                    continue
+                try:
+                    if os.path.exists(media.path):
+                        os.unlink(media.path)
+                except Exception as e:
+                    logger.warning(f"Не удалось удалить временный файл {media.path}: {e}")
 
-            try:
-                sent_messages = await bot.send_media_group(
-                    chat_id=chat_id, media=media_group,
-                    request_timeout=TELEGRAM_SEND_TIMEOUT
-                )
-                report_msg = sent_messages[0]
-            except TelegramBadRequest as e:
-                error_msg = str(e).lower()
-                if "image_process_failed" in error_msg or "wrong file" in error_msg:
-                    logger.warning(f"Ошибка группы медиа, отправляю по отдельности: {e}")
-                    report_msg = await bot.send_message(
-                        chat_id=chat_id, text=final_text, parse_mode="HTML"
-                    )
-                    for temp_path, media_filename, _ in media_files:
-                        try:
-                            doc_file = FSInputFile(temp_path, filename=media_filename or "file")
-                            await bot.send_document(
-                                chat_id=chat_id, document=doc_file,
-                                request_timeout=TELEGRAM_SEND_TIMEOUT
-                            )
-                        except Exception as doc_e:
-                            logger.warning(f"Не удалось отправить файл {media_filename}: {doc_e}")
-                else:
-                    raise
-
-        elif len(prepared_media) == 1:
-            input_file, media_type = prepared_media[0]
-            report_msg = await send_single_media(input_file, media_type, final_text)
-        else:
-            report_msg = await bot.send_message(
-                chat_id=chat_id, text=final_text, parse_mode="HTML"
-            )
 
-        await repo.update_message_id(report_id, report_msg.message_id)
+def _get_upload_store(request) -> UploadStore:
+    return request.app["upload_store"]
 
-        logger.info(f"Репорт #{report.report_number} создан для чата {chat_id}")
 
-        return web.json_response({"success": True, "report_number": report.report_number})
+def _upload_error_response(e: UploadError):
+    body = {"success": False, "error": str(e)}
+    if isinstance(e, UploadOffsetMismatch):
+        body["offset"] = e.offset
+    return json_response(body, status=e.status)
 
-    except ConnectionResetError:
-        logger.warning("Клиент отключился во время загрузки")
-        return web.json_response({"success": False, "error": "Соединение прервано"}, status=499)
+
+async def api_create_upload(request):
+    """Начать возобновляемую загрузку файла"""
+    user = request.get("user")
+    if not user:
+        return json_response({"success": False, "error": "Unauthorized"}, status=401)
+
+    try:
+        data = await request.json()
+        size = int(data.get("size", 0))
+    except (ValueError, TypeError):
+        return json_response({"success": False, "error": "Invalid size"}, status=400)
+
+    try:
+        _get_admission(request).check_disk(max(size, 0), UPLOAD_DIR)
+        upload = await _get_upload_store(request).create(
+            user["id"], data.get("filename"), data.get("content_type", ""), size
+        )
+    except AdmissionRejected as e:
+        return _admission_rejected_response(e)
+    except UploadError as e:
+        return _upload_error_response(e)
+
+    return json_response({"success": True, "chunk_size": UPLOAD_CHUNK_SIZE, **upload.to_dict()})
+
+
+async def api_get_upload(request):
+    """Состояние загрузки: с какого смещения продолжать"""
+    user = request.get("user")
+    if not user:
+        return json_response({"success": False, "error": "Unauthorized"}, status=401)
+
+    try:
+        upload = await _get_upload_store(request).get(request.match_info["upload_id"], user["id"])
+    except UploadError as e:
+        return _upload_error_response(e)
+
+    return json_response({"success": True, **upload.to_dict()})
+
+
+async def _count_upload_bytes(chunks):
+    """Пропустить части тела запроса, считая принятые байты"""
+    async for chunk in chunks:
+        metrics.UPLOAD_BYTES.inc("chunk", amount=len(chunk))
+        yield chunk
+
+
+async def api_put_upload_chunk(request):
+    """Принять часть файла, начинающуюся со смещения Upload-Offset"""
+    user = request.get("user")
+    if not user:
+        return json_response({"success": False, "error": "Unauthorized"}, status=401)
+
+    try:
+        offset = int(request.headers.get("Upload-Offset", ""))
+    except ValueError:
+        return json_response({"success": False, "error": "Upload-Offset required"}, status=400)
+
+    store = _get_upload_store(request)
+    try:
+        upload = await store.get(request.match_info["upload_id"], user["id"])
+        remaining = upload.size - upload.offset
+        content_length = request.content_length
+        if content_length is not None and content_length > remaining:
+            raise UploadError("Данных больше, чем заявлено", status=413)
+        reserve = content_length if content_length is not None else remaining
+        with _get_admission(request).admit(reserve, UPLOAD_DIR):
+            upload = await store.append(upload, offset, _count_upload_bytes(request.content.iter_chunked(64 * 1024)))
+    except AdmissionRejected as e:
+        return _admission_rejected_response(e)
+    except UploadError as e:
+        return _upload_error_response(e)
+
+    return json_response({"success": True, **upload.to_dict()})
+
+
+async def api_finalize_upload(request):
+    """Завершить загрузку: проверить размер и посчитать SHA-256"""
+    user = request.get("user")
+    if not user:
+        return json_response({"success": False, "error": "Unauthorized"}, status=401)
+
+    store = _get_upload_store(request)
+    try:
+        upload = await store.get(request.match_info["upload_id"], user["id"])
+        upload = await store.finalize(upload)
+    except UploadError as e:
+        return _upload_error_response(e)
+
+    return json_response({"success": True, **upload.to_dict()})
+
+
+async def api_create_session(request):
+    """Обмен init_data на короткоживущий сессионный токен"""
+    try:
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return json_response({"success": False, "error": "Invalid request"}, status=400)
+        validated = validate_init_data(
+            data.get("init_data", ""), _get_token(request), request.app["webapp_secret"]
+        )
+        if not validated or not validated.get("user", {}).get("id"):
+            return json_response({"success": False, "error": "Unauthorized"}, status=401)
+
+        user = validated["user"]
+        expires_at = int(time.time()) + SESSION_TOKEN_TTL
+        auth_date = validated.get("auth_date")
+        if auth_date:
+            expires_at = min(expires_at, int(auth_date) + INIT_DATA_MAX_AGE)
+
+        token = create_session_token(
+            request.app["session_key"], user, expires_at, _init_data_chat_id(validated)
+        )
+        return json_response({
+            "success": True,
+            "token": token,
+            "expires_in": max(expires_at - int(time.time()), 0),
+        })
 
     except Exception as e:
-        logger.exception(f"Ошибка обработки репорта: {e}")
-        return web.json_response({"success": False, "error": "Внутренняя ошибка сервера"}, status=500)
+        logger.exception(f"Ошибка создания сессии: {e}")
+        return json_response({"success": False, "error": "Ошибка авторизации"}, status=500)
+
+
+def _int_param(data: dict, name: str, default=None):
+    """Целое из параметров запроса, ValueError при некорректном значении"""
+    value = data.get(name)
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool) or isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"{name}: ожидается целое число")
+    return int(value)
+
+
+async def _list_request_data(request) -> dict:
+    """Параметры списка: строка запроса для GET, JSON-тело для POST.
+
+    chat_id, limit (1..100) и offset приводятся к int; ValueError, если
+    они не числа или тело не JSON-объект.
+    """
+    if request.method == "GET":
+        data = dict(request.query)
+        data["include_stats"] = data.get("include_stats") in ("1", "true")
+    else:
+        data = await request.json()
+        if not isinstance(data, dict):
+            raise ValueError("Ожидается JSON-объект")
+    data["chat_id"] = _int_param(data, "chat_id")
+    data["limit"] = max(1, min(_int_param(data, "limit", 20), 100))
+    data["offset"] = max(0, _int_param(data, "offset", 0))
+    return data
 
-    finally:
-        for temp_path in temp_files:
-            try:
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-            except Exception as e:
-                logger.warning(f"Не удалось удалить временный файл {temp_path}: {e}")
+
+def _list_etag(scope: str, scope_id: int, version: int, params: dict) -> str:
+    """Сильный ETag страницы списка: версия списка и параметры запроса"""
+    digest = hashlib.sha256(
+        json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+    return f'"{scope}{scope_id}-v{version}-{digest}"'
+
+
+def _etag_matches(request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in tags or "*" in tags
+
+
+def _etag_headers(etag: str) -> dict:
+    # Клиент хранит ответ у себя и каждый раз переспрашивает сервер
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
 
 
 async def api_get_user_reports(request):
-    """Получить репорты текущего пользователя"""
+    """Получить репорты текущего пользователя.
+
+    Ответ помечается ETag по версии списков пользователя; при совпадении
+    If-None-Match возвращается 304 без выборки репортов.
+    """
     try:
-        data = await request.json()
-        init_data = data.get("init_data", "")
-        chat_id = data.get("chat_id")
-        limit = min(int(data.get("limit", 20)), 100)
-        offset = int(data.get("offset", 0))
+        try:
+            data = await _list_request_data(request)
+        except ValueError:
+            return json_response({"success": False, "error": "Invalid parameters"}, status=400)
+        chat_id = data["chat_id"]
+        limit = data["limit"]
+        offset = data["offset"]
+        cursor = data.get("cursor")
 
-        validated = validate_init_data(init_data, _get_token(request))
-        if not validated:
-            return web.json_response({"success": False, "error": "Unauthorized"}, status=401)
+        user = request.get("user")
+        if not user:
+            return json_response({"success": False, "error": "Unauthorized"}, status=401)
 
-        user_data = validated.get("user", {})
-        user_id = user_data.get("id")
+        user_id = user.get("id")
 
         if not user_id:
-            return web.json_response({"success": False, "error": "User not found"}, status=400)
+            return json_response({"success": False, "error": "User not found"}, status=400)
 
         repo = _get_repo(request)
-        reports = await repo.get_by_user(user_id, chat_id, limit=limit + 1, offset=offset)
-
-        has_more = len(reports) > limit
-        if has_more:
-            reports = reports[:limit]
+        # Версия читается до выборки: запись между ними даст лишний промах, но не устаревший ответ
+        etag = _list_etag("user", user_id, await repo.get_list_version("user", user_id), {
+            "chat_id": chat_id, "limit": limit, "offset": offset, "cursor": cursor,
+        })
+        if _etag_matches(request, etag):
+            return web.Response(status=304, headers=_etag_headers(etag))
 
-        reports_data = [r.to_dict() for r in reports]
+        try:
+            page = await repo.get_by_user_json(
+                user_id, chat_id, limit=limit, offset=offset, cursor=cursor,
+                summary_chars=LIST_DESCRIPTION_CHARS
+            )
+        except ValueError:
+            return json_response({"success": False, "error": "Invalid cursor"}, status=400)
 
-        return web.json_response({"success": True, "reports": reports_data, "has_more": has_more})
+        return json_response_with_raw({
+            "success": True,
+            "has_more": page.has_more,
+            "next_cursor": page.next_cursor,
+        }, {"reports": page.reports_json}, headers=_etag_headers(etag))
 
     except Exception as e:
         logger.exception(f"Ошибка получения репортов: {e}")
-        return web.json_response({"success": False, "error": "Ошибка загрузки репортов"}, status=500)
+        return json_response({"success": False, "error": "Ошибка загрузки репортов"}, status=500)
 
 
 async def api_get_chat_reports(request):
-    """Получить репорты чата (только для админов)"""
+    """Получить репорты чата (только для админов), с ETag по версии чата"""
     try:
-        data = await request.json()
-        init_data = data.get("init_data", "")
-        chat_id = data.get("chat_id")
-        limit = min(int(data.get("limit", 20)), 100)
-        offset = int(data.get("offset", 0))
+        try:
+            data = await _list_request_data(request)
+        except ValueError:
+            return json_response({"success": False, "error": "Invalid parameters"}, status=400)
+        chat_id = data["chat_id"]
+        limit = data["limit"]
+        offset = data["offset"]
+        cursor = data.get("cursor")
 
-        validated = validate_init_data(init_data, _get_token(request))
-        if not validated:
-            return web.json_response({"success": False, "error": "Unauthorized"}, status=401)
+        user = request.get("user")
+        if not user:
+            return json_response({"success": False, "error": "Unauthorized"}, status=401)
 
-        user_data = validated.get("user", {})
-        user_id = user_data.get("id")
+        user_id = user.get("id")
 
         if not user_id or not chat_id:
-            return web.json_response({"success": False, "error": "Missing parameters"}, status=400)
+            return json_response({"success": False, "error": "Missing parameters"}, status=400)
 
-        bot = _get_bot(request)
-        if not await _check_admin(bot, chat_id, user_id):
-            return web.json_response({"success": False, "error": "Admin access required"}, status=403)
+        if not await _check_admin(request, chat_id, user_id):
+            return json_response({"success": False, "error": "Admin access required"}, status=403)
 
         repo = _get_repo(request)
         status_filter = data.get("status")
         include_stats = data.get("include_stats", False)
 
-        reports = await repo.get_by_chat(chat_id, status_filter, limit=limit + 1, offset=offset)
-
-        has_more = len(reports) > limit
-        if has_more:
-            reports = reports[:limit]
+        etag = _list_etag("chat", chat_id, await repo.get_list_version("chat", chat_id), {
+            "limit": limit, "offset": offset, "cursor": cursor,
+            "status": status_filter, "include_stats": bool(include_stats),
+        })
+        if _etag_matches(request, etag):
+            return web.Response(status=304, headers=_etag_headers(etag))
 
-        reports_data = [r.to_dict(include_admin_fields=True) for r in reports]
+        try:
+            page = await repo.get_by_chat_json(
+                chat_id, status_filter, limit=limit, offset=offset, cursor=cursor,
+                include_admin_fields=True, summary_chars=LIST_DESCRIPTION_CHARS
+            )
+        except ValueError:
+            return json_response({"success": False, "error": "Invalid cursor"}, status=400)
 
-        response = {"success": True, "reports": reports_data, "has_more": has_more}
+        response = {
+            "success": True,
+            "has_more": page.has_more,
+            "next_cursor": page.next_cursor,
+        }
 
         if include_stats:
             response["stats"] = await repo.get_stats(chat_id)
 
-        return web.json_response(response)
+        return json_response_with_raw(response, {"reports": page.reports_json}, headers=_etag_headers(etag))
 
     except Exception as e:
         logger.exception(f"Ошибка получения репортов чата: {e}")
-        return web.json_response({"success": False, "error": "Ошибка загрузки репортов"}, status=500)
+        return json_response({"success": False, "error": "Ошибка загрузки репортов"}, status=500)
 
 
 async def api_search_reports(request):
     """Поиск репортов в чате (только для админов)"""
     try:
         data = await request.json()
-        init_data = data.get("init_data", "")
         chat_id = data.get("chat_id")
         query = data.get("query", "").strip()
+        limit = min(int(data.get("limit", 50)), 100)
+        offset = int(data.get("offset", 0))
 
-        validated = validate_init_data(init_data, _get_token(request))
-        if not validated:
-            return web.json_response({"success": False, "error": "Unauthorized"}, status=401)
+        user = request.get("user")
+        if not user:
+            return json_response({"success": False, "error": "Unauthorized"}, status=401)
 
-        user_data = validated.get("user", {})
-        user_id = user_data.get("id")
+        user_id = user.get("id")
 
         if not user_id or not chat_id or not query:
-            return web.json_response({"success": False, "error": "Missing parameters"}, status=400)
+            return json_response({"success": False, "error": "Missing parameters"}, status=400)
 
-        bot = _get_bot(request)
-        if not await _check_admin(bot, chat_id, user_id):
-            return web.json_response({"success": False, "error": "Admin access required"}, status=403)
+        if not await _check_admin(request, chat_id, user_id):
+            return json_response({"success": False, "error": "Admin access required"}, status=403)
 
         repo = _get_repo(request)
-        reports = await repo.search(chat_id, query)
-
-        reports_data = [r.to_dict(include_admin_fields=True) for r in reports]
+        page = await repo.search_json(
+            chat_id, query, limit=limit, offset=offset, summary_chars=LIST_DESCRIPTION_CHARS
+        )
 
-        return web.json_response({"success": True, "reports": reports_data})
+        return json_response_with_raw(
+            {"success": True, "has_more": page.has_more}, {"reports": page.reports_json}
+        )
 
     except Exception as e:
         logger.exception(f"Ошибка поиска: {e}")
-        return web.json_response({"success": False, "error": "Ошибка поиска"}, status=500)
+        return json_response({"success": False, "error": "Ошибка поиска"}, status=500)
 
 
 async def api_export_csv(request):
-    """Экспорт репортов в CSV (только для админов)"""
+    """Потоковый экспорт репортов в CSV (только для админов)"""
+    response = None
     try:
         data = await request.json()
-        init_data = data.get("init_data", "")
         chat_id = data.get("chat_id")
 
-        validated = validate_init_data(init_data, _get_token(request))
-        if not validated:
-            return web.json_response({"success": False, "error": "Unauthorized"}, status=401)
+        user = request.get("user")
+        if not user:
+            return json_response({"success": False, "error": "Unauthorized"}, status=401)
 
-        user_data = validated.get("user", {})
-        user_id = user_data.get("id")
+        user_id = user.get("id")
 
         if not user_id or not chat_id:
-            return web.json_response({"success": False, "error": "Missing parameters"}, status=400)
+            return json_response({"success": False, "error": "Missing parameters"}, status=400)
 
-        bot = _get_bot(request)
-        if not await _check_admin(bot, chat_id, user_id):
-            return web.json_response({"success": False, "error": "Admin access required"}, status=403)
+        if not await _check_admin(request, chat_id, user_id):
+            return json_response({"success": False, "error": "Admin access required"}, status=403)
 
         repo = _get_repo(request)
-        reports = await repo.export_chat_reports(chat_id)
-
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow([
-            "ID", "Номер", "Логин", "Платформа", "Версия",
-            "Время ошибки", "Сервер", "Абонент/Заявка",
-            "Описание", "Tracking ID", "Статус", "Дата создания",
-            "Username", "User ID",
-        ])
-        for r in reports:
-            writer.writerow([
-                r.id, r.report_number, r.user_login, r.platform,
-                r.platform_version, r.error_time, r.server,
-                r.subscriber_info, r.description, r.tracking_id,
-                STATUS_LABELS.get(r.status, r.status),
-                r.created_at.isoformat() if r.created_at else "",
-                r.username or "", r.user_id,
-            ])
 
-        csv_content = output.getvalue()
-
-        return web.Response(
-            text=csv_content,
-            content_type="text/csv",
-            charset="utf-8",
-            headers={
-                "Content-Disposition": f'attachment; filename="reports_chat_{chat_id}.csv"'
-            }
-        )
+        response = web.StreamResponse(headers={
+            "Content-Type": "text/csv; charset=utf-8",
+            "Content-Disposition": f'attachment; filename="reports_chat_{chat_id}.csv"',
+        })
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+
+        # aclosing сразу возвращает соединение в пул, если клиент оборвал загрузку
+        batches = repo.iter_chat_reports(chat_id, batch_size=CSV_EXPORT_BATCH_SIZE)
+        async with aclosing(batches), aclosing(iter_csv_chunks(batches)) as chunks:
+            async for chunk in chunks:
+                await response.write(chunk)
+        await response.write_eof()
+        return response
 
     except Exception as e:
         logger.exception(f"Ошибка экспорта: {e}")
-        return web.json_response({"success": False, "error": "Ошибка экспорта"}, status=500)
+        if response is not None and response.prepared:
+            # Заголовки уже отправлены — обрываем передачу
+            raise
+        return json_response({"success": False, "error": "Ошибка экспорта"}, status=500)
 
 
 async def api_update_report(request):
     """Обновление репорта"""
     try:
         data = await request.json()
-        init_data = data.get("init_data", "")
         report_id = data.get("report_id")
 
-        validated = validate_init_data(init_data, _get_token(request))
-        if not validated:
-            return web.json_response({"success": False, "error": "Unauthorized"}, status=401)
+        user = request.get("user")
+        if not user:
+            return json_response({"success": False, "error": "Unauthorized"}, status=401)
 
-        user_data = validated.get("user", {})
-        user_id = user_data.get("id")
+        user_id = user.get("id")
 
         if not user_id or not report_id:
-            return web.json_response({"success": False, "error": "Missing parameters"}, status=400)
+            return json_response({"success": False, "error": "Missing parameters"}, status=400)
 
         bot = _get_bot(request)
         repo = _get_repo(request)
 
         report = await repo.get_by_id(report_id)
         if not report:
-            return web.json_response({"success": False, "error": "Report not found"}, status=404)
+            return json_response({"success": False, "error": "Report not found"}, status=404)
 
         is_owner = report.user_id == user_id
-        is_admin = await _check_admin(bot, report.chat_id, user_id)
+        is_admin = await _check_admin(request, report.chat_id, user_id)
 
         if not is_owner and not is_admin:
-            return web.json_response({"success": False, "error": "Permission denied"}, status=403)
+            return json_response({"success": False, "error": "Permission denied"}, status=403)
 
         if is_owner and not is_admin and report.status not in (None, "new", "revision"):
-            return web.json_response({
+            return json_response({
                 "success": False,
                 "error": "Редактирование заблокировано: статус заявки изменён"
             }, status=403)
@@ -704,148 +1055,237 @@ async def api_update_report(request):
             not admin_changing_status
         )
 
-        if update_fields:
-            if user_editing_revision:
-                update_fields["status"] = "new"
-                update_fields["status_comment"] = None
+        if not update_fields:
+            return json_response({"success": True, "report": report.to_dict(include_admin_fields=is_admin)})
 
-            await repo.update(report_id, **update_fields)
+        if user_editing_revision:
+            update_fields["status"] = "new"
+            update_fields["status_comment"] = None
 
-            updated_report = await repo.get_by_id(report_id)
-            if updated_report and updated_report.message_id:
-                try:
-                    new_text = format_final_report(updated_report, updated_report.username)
-
-                    if updated_report.media_type:
-                        await bot.edit_message_caption(
-                            chat_id=updated_report.chat_id,
-                            message_id=updated_report.message_id,
-                            caption=new_text,
-                            parse_mode="HTML"
-                        )
-                    else:
-                        await bot.edit_message_text(
-                            chat_id=updated_report.chat_id,
-                            message_id=updated_report.message_id,
-                            text=new_text,
-                            parse_mode="HTML"
-                        )
-                except Exception as e:
-                    logger.warning(f"Не удалось обновить сообщение в Telegram: {e}")
+        try:
+            updated_report = await repo.update_returning(
+                report_id, expected_updated_at=data.get("expected_updated_at"), **update_fields
+            )
+        except StaleReportError:
+            return json_response({
+                "success": False,
+                "error": "Заявка была изменена другим пользователем. Обновите данные и повторите.",
+                "conflict": True
+            }, status=409)
+
+        if not updated_report:
+            return json_response({"success": False, "error": "Report not found"}, status=404)
+
+        if updated_report.message_id:
+            request.app["edit_scheduler"].schedule(
+                updated_report.chat_id,
+                updated_report.message_id,
+                format_final_report(updated_report, updated_report.username),
+                is_caption=bool(updated_report.media_type),
+            )
 
-            new_status = update_fields.get("status")
-            if is_admin and new_status and new_status != old_status and updated_report.user_id:
-                await send_status_notification(bot, updated_report, new_status)
+        new_status = update_fields.get("status")
+        if is_admin and new_status and new_status != old_status and updated_report.user_id:
+            await send_status_notification(bot, updated_report, new_status)
 
-            if user_editing_revision and old_status_changed_by:
-                await send_revision_completed_notification(bot, updated_report, old_status_changed_by)
+        if user_editing_revision and old_status_changed_by:
+            await send_revision_completed_notification(bot, updated_report, old_status_changed_by)
 
-        return web.json_response({"success": True})
+        return json_response({
+            "success": True,
+            "report": updated_report.to_dict(include_admin_fields=is_admin)
+        })
 
     except Exception as e:
         logger.exception(f"Ошибка обновления репорта: {e}")
-        return web.json_response({"success": False, "error": "Ошибка обновления репорта"}, status=500)
+        return json_response({"success": False, "error": "Ошибка обновления репорта"}, status=500)
 
 
 async def api_check_admin(request):
     """Проверка прав админа"""
     try:
         data = await request.json()
-        init_data = data.get("init_data", "")
         chat_id = data.get("chat_id")
 
-        validated = validate_init_data(init_data, _get_token(request))
-        if not validated:
-            return web.json_response({"is_admin": False})
+        user = request.get("user")
+        if not user:
+            return json_response({"is_admin": False})
 
-        user_data = validated.get("user", {})
-        user_id = user_data.get("id")
+        user_id = user.get("id")
 
         if not user_id or not chat_id:
-            return web.json_response({"is_admin": False})
+            return json_response({"is_admin": False})
 
-        bot = _get_bot(request)
-        is_admin = await _check_admin(bot, chat_id, user_id)
-        return web.json_response({"is_admin": is_admin})
+        is_admin = await _check_admin(request, chat_id, user_id)
+        return json_response({"is_admin": is_admin})
 
     except Exception as e:
         logger.exception(f"Ошибка проверки админа: {e}")
-        return web.json_response({"is_admin": False})
+        return json_response({"is_admin": False})
 
 
 async def api_get_report(request):
     """Получить репорт по ID"""
     try:
         data = await request.json()
-        init_data = data.get("init_data", "")
         report_id = data.get("report_id")
 
-        validated = validate_init_data(init_data, _get_token(request))
-        if not validated:
-            return web.json_response({"success": False, "error": "Unauthorized"}, status=401)
+        user = request.get("user")
+        if not user:
+            return json_response({"success": False, "error": "Unauthorized"}, status=401)
 
-        user_data = validated.get("user", {})
-        user_id = user_data.get("id")
+        user_id = user.get("id")
 
-        bot = _get_bot(request)
         repo = _get_repo(request)
 
         report = await repo.get_by_id(report_id)
         if not report:
-            return web.json_response({"success": False, "error": "Report not found"}, status=404)
+            return json_response({"success": False, "error": "Report not found"}, status=404)
 
         is_owner = report.user_id == user_id
-        is_admin = await _check_admin(bot, report.chat_id, user_id)
+        is_admin = await _check_admin(request, report.chat_id, user_id)
 
         if not is_owner and not is_admin:
-            return web.json_response({"success": False, "error": "Access denied"}, status=403)
+            return json_response({"success": False, "error": "Access denied"}, status=403)
 
-        report_data = report.to_dict(include_admin_fields=True)
+        report_data = (await _reports_with_media(repo, [report], include_admin_fields=True))[0]
 
-        return web.json_response({"success": True, "report": report_data, "is_admin": is_admin})
+        return json_response({"success": True, "report": report_data, "is_admin": is_admin})
 
     except Exception as e:
         logger.exception(f"Ошибка получения репорта: {e}")
-        return web.json_response({"success": False, "error": "Ошибка загрузки репорта"}, status=500)
+        return json_response({"success": False, "error": "Ошибка загрузки репорта"}, status=500)
 
 
-def create_app() -> web.Application:
+async def api_get_reports(request):
+    """Получить несколько репортов по ID одним запросом.
+
+    Права админа проверяются один раз на чат, и только для чужих репортов.
+    Недоступные и несуществующие ID возвращаются в not_found без различия.
+    """
+    try:
+        data = await request.json()
+        report_ids = data.get("report_ids")
+
+        user = request.get("user")
+        if not user:
+            return json_response({"success": False, "error": "Unauthorized"}, status=401)
+
+        user_id = user.get("id")
+
+        if not isinstance(report_ids, list) or not report_ids:
+            return json_response({"success": False, "error": "Missing parameters"}, status=400)
+        if len(report_ids) > MAX_BATCH_REPORTS:
+            return json_response({"success": False, "error": "Too many reports"}, status=400)
+        try:
+            report_ids = [int(report_id) for report_id in report_ids]
+        except (TypeError, ValueError):
+            return json_response({"success": False, "error": "Invalid report_ids"}, status=400)
+
+        repo = _get_repo(request)
+        reports = await repo.get_many(report_ids)
+
+        admin_chats = {}
+        for chat_id in {r.chat_id for r in reports if r.user_id != user_id}:
+            admin_chats[chat_id] = await _check_admin(request, chat_id, user_id)
+
+        allowed = [r for r in reports if r.user_id == user_id or admin_chats.get(r.chat_id)]
+        allowed_ids = {r.id for r in allowed}
+        reports_data = await _reports_with_media(repo, allowed, include_admin_fields=True)
+
+        return json_response({
+            "success": True,
+            "reports": reports_data,
+            "not_found": [report_id for report_id in dict.fromkeys(report_ids) if report_id not in allowed_ids],
+        })
+
+    except Exception as e:
+        logger.exception(f"Ошибка получения репортов: {e}")
+        return json_response({"success": False, "error": "Ошибка загрузки репортов"}, status=500)
+
+
+def create_app(static_build_enabled: bool = False) -> web.Application:
     """Создание aiohttp приложения"""
     app = web.Application(
         client_max_size=500 * 1024 * 1024,
-        middlewares=[request_logging_middleware],
+        middlewares=[request_logging_middleware, auth_middleware],
+    )
+    app["static_build"] = static_build_enabled
+
+    app["admin_cache"] = AdminCache(
+        ttl=ADMIN_CACHE_TTL,
+        negative_ttl=ADMIN_CACHE_NEGATIVE_TTL,
+        max_size=ADMIN_CACHE_MAX_SIZE,
+    )
+    app["upload_store"] = UploadStore(UPLOAD_DIR, max_size=MAX_FILE_SIZE)
+    app["upload_admission"] = UploadAdmission(
+        max_concurrent=UPLOAD_MAX_CONCURRENT,
+        max_bytes=UPLOAD_MAX_INFLIGHT_MB * 1024 * 1024,
+        min_free_bytes=UPLOAD_MIN_FREE_DISK_MB * 1024 * 1024,
     )
 
     app.router.add_get("/health", health)
+    app.router.add_get("/metrics", metrics_handler)
     app.router.add_get("/", index)
 
+    app.router.add_post("/api/session", api_create_session)
     app.router.add_post("/api/report", handle_report)
+    app.router.add_post("/api/uploads", api_create_upload)
+    app.router.add_get("/api/uploads/{upload_id}", api_get_upload)
+    app.router.add_put("/api/uploads/{upload_id}", api_put_upload_chunk)
+    app.router.add_post("/api/uploads/{upload_id}/finalize", api_finalize_upload)
     app.router.add_post("/api/user-reports", api_get_user_reports)
+    app.router.add_get("/api/user-reports", api_get_user_reports)
     app.router.add_post("/api/chat-reports", api_get_chat_reports)
+    app.router.add_get("/api/chat-reports", api_get_chat_reports)
     app.router.add_post("/api/search-reports", api_search_reports)
     app.router.add_post("/api/export-csv", api_export_csv)
     app.router.add_post("/api/update-report", api_update_report)
     app.router.add_post("/api/get-report", api_get_report)
+    app.router.add_post("/api/get-reports", api_get_reports)
     app.router.add_post("/api/check-admin", api_check_admin)
 
+    if static_build_enabled:
+        app.router.add_get(f"/static/{static_build.DIST_NAME}/{{path:.+}}", static_asset)
     app.router.add_static("/static", STATIC_DIR)
 
     return app
 
 
+async def _flush_edits(app: web.Application) -> None:
+    await app["edit_scheduler"].flush()
+
+
 async def start_webapp(
     bot,
     report_repo,
     bot_token: str,
+    send_queue,
+    rate_limiter=None,
     host: str = "0.0.0.0",
     port: int = 8080
 ) -> web.AppRunner:
     """Запуск Web App сервера"""
-    app = create_app()
+    static_build_enabled = STATIC_BUILD
+    if static_build_enabled:
+        try:
+            loop = asyncio.get_running_loop()
+            manifest = await loop.run_in_executor(None, static_build.build)
+            logger.info(f"Статика собрана: {', '.join(manifest.values())}")
+        except OSError as e:
+            logger.error(f"Не удалось собрать статику, отдаю исходные файлы: {e}")
+            static_build_enabled = False
+    app = create_app(static_build_enabled)
 
     app["bot"] = bot
     app["report_repo"] = report_repo
     app["bot_token"] = bot_token
+    app["send_queue"] = send_queue
+    app["rate_limiter"] = rate_limiter
+    app["edit_scheduler"] = EditScheduler(bot, delay=EDIT_DEBOUNCE_SECONDS)
+    app.on_cleanup.append(_flush_edits)
+    app["webapp_secret"] = derive_webapp_secret(bot_token)
+    app["session_key"] = derive_session_key(bot_token)
 
     runner = web.AppRunner(app)
     await runner.setup()
@@ -0,0 +1,54 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+
+def derive_webapp_secret(bot_token: str) -> bytes:
+    """Секретный ключ для проверки подписи init_data"""
+    return hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+
+
+def derive_session_key(bot_token: str) -> bytes:
+    """Ключ подписи сессионных токенов"""
+    return hmac.new(b"WebAppSession", bot_token.encode(), hashlib.sha256).digest()
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(key: bytes, body: str) -> str:
+    return _b64encode(hmac.new(key, body.encode(), hashlib.sha256).digest())
+
+
+def create_session_token(
+    key: bytes, user: dict, expires_at: int, chat_id: int | None = None
+) -> str:
+    """Подписать токен сессии: base64(payload).base64(hmac)"""
+    payload = {"uid": user["id"], "exp": int(expires_at)}
+    if user.get("username"):
+        payload["un"] = user["username"]
+    if chat_id:
+        payload["cid"] = chat_id
+    body = _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+    return f"{body}.{_sign(key, body)}"
+
+
+def verify_session_token(key: bytes, token: str) -> dict | None:
+    """Проверить подпись и срок токена, вернуть payload"""
+    body, sep, signature = token.partition(".")
+    if not sep or not hmac.compare_digest(_sign(key, body), signature):
+        return None
+    try:
+        payload = json.loads(_b64decode(body))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(payload, dict) or payload.get("exp", 0) < time.time():
+        return None
+    return payload
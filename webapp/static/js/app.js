@@ -31,18 +31,24 @@
         let adminReports = [];
         let currentUserReportId = null;
         let currentAdminReportId = null;
+        // updated_at полного репорта, открытого в модалке: по нему сервер
+        // проверяет, что репорт не изменили с момента загрузки
+        let currentUserUpdatedAt = null;
+        let currentAdminUpdatedAt = null;
         let currentAdminFilter = '';
         let myReportsLoaded = false;
         let adminReportsLoaded = false;
 
         // Пагинация
         const PAGE_SIZE = 20;
-        let myReportsOffset = 0;
+        let myReportsCursor = null;
         let myReportsHasMore = false;
         let myReportsLoading = false;
-        let adminReportsOffset = 0;
+        let adminReportsCursor = null;
         let adminReportsHasMore = false;
         let adminReportsLoading = false;
+        let adminSearchQuery = '';
+        let adminSearchOffset = 0;
         let adminStats = { total: 0, new: 0, in_progress: 0, completed: 0 };
 
         const statusLabels = {
@@ -87,15 +93,157 @@
             }
         }
 
-        async function checkAdmin() {
-            try {
-                const response = await fetch('/api/check-admin', {
+        // ==================== СЕССИЯ ====================
+
+        // init_data проверяется один раз, дальше запросы идут с токеном сессии
+        let sessionToken = null;
+        let sessionExpiresAt = 0;
+        let sessionPromise = null;
+
+        function getSessionToken(forceRefresh = false) {
+            if (!forceRefresh && sessionToken && Date.now() < sessionExpiresAt) {
+                return Promise.resolve(sessionToken);
+            }
+            if (!sessionPromise) {
+                sessionPromise = fetch('/api/session', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        init_data: tg.initData,
-                        chat_id: chatId
+                    body: JSON.stringify({ init_data: tg.initData })
+                })
+                    .then(response => response.json())
+                    .then(result => {
+                        if (result.success) {
+                            sessionToken = result.token;
+                            sessionExpiresAt = Date.now() + Math.max(result.expires_in - 60, 0) * 1000;
+                        } else {
+                            sessionToken = null;
+                        }
+                        return sessionToken;
                     })
+                    .catch(() => null)
+                    .finally(() => { sessionPromise = null; });
+            }
+            return sessionPromise;
+        }
+
+        async function apiPost(url, body) {
+            const send = (token) => fetch(url, {
+                method: 'POST',
+                headers: token
+                    ? { 'Content-Type': 'application/json', 'Authorization': 'Bearer ' + token }
+                    : { 'Content-Type': 'application/json' },
+                body: JSON.stringify(token ? body : Object.assign({ init_data: tg.initData }, body))
+            });
+
+            let response = await send(await getSessionToken());
+            if (response.status === 401) {
+                response = await send(await getSessionToken(true));
+            }
+            return response;
+        }
+
+        // Ответы списков по ETag: url -> { etag, body }. Тело хранится текстом,
+        // чтобы правки объектов репортов на странице не попадали в кэш
+        const listCache = new Map();
+        const LIST_CACHE_SIZE = 50;
+
+        // GET списка с If-None-Match: при 304 берётся сохранённый ответ.
+        // Возвращает { status, result }
+        async function apiGetList(url, params) {
+            const query = new URLSearchParams();
+            Object.keys(params).forEach(function(key) {
+                const value = params[key];
+                if (value !== null && value !== undefined && value !== '' && value !== false) {
+                    query.append(key, value === true ? '1' : String(value));
+                }
+            });
+            const fullUrl = url + '?' + query.toString();
+
+            const token = await getSessionToken();
+            if (!token) {
+                const response = await apiPost(url, params);
+                return { status: response.status, result: await response.json() };
+            }
+
+            const cached = listCache.get(fullUrl);
+            const send = (token) => fetch(fullUrl, {
+                method: 'GET',
+                cache: 'no-store',
+                headers: Object.assign(
+                    { 'Authorization': 'Bearer ' + token },
+                    cached ? { 'If-None-Match': cached.etag } : {}
+                )
+            });
+
+            let response = await send(token);
+            if (response.status === 401) {
+                response = await send(await getSessionToken(true));
+            }
+
+            if (response.status === 304 && cached) {
+                listCache.delete(fullUrl);
+                listCache.set(fullUrl, cached);
+                return { status: 200, result: JSON.parse(cached.body) };
+            }
+
+            const body = await response.text();
+            const etag = response.headers.get('ETag');
+            if (response.ok && etag) {
+                listCache.delete(fullUrl);
+                listCache.set(fullUrl, { etag: etag, body: body });
+                if (listCache.size > LIST_CACHE_SIZE) {
+                    listCache.delete(listCache.keys().next().value);
+                }
+            }
+            return { status: response.status, result: JSON.parse(body) };
+        }
+
+        // Полные репорты для модалок: списки отдают только краткую форму
+        // (обрезанное описание, без вложений)
+        const reportDetails = new Map();
+
+        // Догрузить полные репорты одним запросом /api/get-reports
+        async function fetchReportDetails(reportIds) {
+            const missing = reportIds.filter(id => !reportDetails.has(id));
+            if (missing.length > 0) {
+                const response = await apiPost('/api/get-reports', { report_ids: missing });
+                const result = await response.json();
+                if (!result.success) {
+                    throw new Error(result.error || 'Ошибка загрузки');
+                }
+                result.reports.forEach(report => reportDetails.set(report.id, report));
+            }
+            return reportIds.map(id => reportDetails.get(id)).filter(Boolean);
+        }
+
+        // Полный репорт для карточки списка; устаревший по updated_at перезапрашивается
+        async function getReportDetails(summary) {
+            const cached = reportDetails.get(summary.id);
+            if (cached && cached.updated_at !== summary.updated_at) {
+                reportDetails.delete(summary.id);
+            }
+            const [report] = await fetchReportDetails([summary.id]);
+            return report;
+        }
+
+        // Открыть модалку с полным репортом, при ошибке — сообщение
+        async function loadReportForModal(summary) {
+            try {
+                const report = await getReportDetails(summary);
+                if (!report) {
+                    tg.showAlert('Репорт недоступен');
+                }
+                return report;
+            } catch (error) {
+                tg.showAlert('Ошибка загрузки репорта');
+                return null;
+            }
+        }
+
+        async function checkAdmin() {
+            try {
+                const response = await apiPost('/api/check-admin', {
+                    chat_id: chatId
                 });
                 const result = await response.json();
                 if (result.is_admin) {
@@ -335,146 +483,216 @@
             setUploadStage('', '');
         }
 
-        tg.MainButton.onClick(function() {
-            if (currentPage !== 'form') return;
+        const UPLOAD_MAX_RETRIES = 8;
 
-            if (!validateForm()) {
-                showError('Заполните все обязательные поля');
-                return;
-            }
-
-            tg.MainButton.showProgress();
-            tg.MainButton.disable();
+        function sleep(ms) {
+            return new Promise(resolve => setTimeout(resolve, ms));
+        }
 
-            const formData = new FormData();
-            formData.append('login', document.getElementById('login').value.trim());
-            formData.append('platform', document.getElementById('platform').value);
-            formData.append('version', document.getElementById('version').value.trim());
-            formData.append('error_time', document.getElementById('error_time').value);
-            formData.append('server', document.getElementById('server').value);
-            formData.append('subscriber', document.getElementById('subscriber').value.trim());
-            formData.append('description', document.getElementById('description').value.trim());
-            formData.append('init_data', tg.initData);
-
-            if (chatId) {
-                formData.append('chat_id', chatId);
+        function formatSpeed(bytesPerSecond) {
+            if (bytesPerSecond >= 1024 * 1024) {
+                return (bytesPerSecond / (1024 * 1024)).toFixed(1) + ' MB/s';
+            } else if (bytesPerSecond >= 1024) {
+                return (bytesPerSecond / 1024).toFixed(0) + ' KB/s';
             }
+            return bytesPerSecond.toFixed(0) + ' B/s';
+        }
 
-            uploadedFiles.forEach(function(file) {
-                formData.append('media', file);
-            });
-
-            if (uploadedFiles.length > 0) {
-                showUploadOverlay();
+        function formatEta(etaSeconds) {
+            if (etaSeconds >= 60) {
+                const mins = Math.floor(etaSeconds / 60);
+                const secs = etaSeconds % 60;
+                return mins + ' мин ' + secs + ' сек';
             }
+            return etaSeconds + ' сек';
+        }
 
-            const xhr = new XMLHttpRequest();
-
-            // Для расчёта скорости загрузки
-            let uploadStartTime = Date.now();
+        // Прогресс загрузки всех файлов со скоростью и оставшимся временем
+        function createProgressTracker(total) {
             let lastLoaded = 0;
-            let lastTime = uploadStartTime;
+            let lastTime = Date.now();
             let currentSpeed = 0;
 
-            xhr.upload.addEventListener('progress', function(e) {
-                if (e.lengthComputable) {
-                    const percent = (e.loaded / e.total) * 100;
-                    updateProgress(percent);
-
-                    // Расчёт скорости каждые 0.5 сек
-                    const now = Date.now();
-                    const timeDiff = (now - lastTime) / 1000;
-                    if (timeDiff >= 0.5) {
-                        const bytesDiff = e.loaded - lastLoaded;
-                        currentSpeed = bytesDiff / timeDiff;
-                        lastLoaded = e.loaded;
-                        lastTime = now;
-                    }
-
-                    // Форматирование скорости
-                    let speedText = '';
-                    if (currentSpeed > 0) {
-                        if (currentSpeed >= 1024 * 1024) {
-                            speedText = (currentSpeed / (1024 * 1024)).toFixed(1) + ' MB/s';
-                        } else if (currentSpeed >= 1024) {
-                            speedText = (currentSpeed / 1024).toFixed(0) + ' KB/s';
-                        } else {
-                            speedText = currentSpeed.toFixed(0) + ' B/s';
-                        }
-                    }
+            return function(loaded) {
+                updateProgress(total > 0 ? (loaded / total) * 100 : 100);
 
-                    // Расчёт оставшегося времени
-                    let etaText = '';
-                    if (currentSpeed > 0 && e.loaded < e.total) {
-                        const remaining = e.total - e.loaded;
-                        const etaSeconds = Math.round(remaining / currentSpeed);
-                        if (etaSeconds >= 60) {
-                            const mins = Math.floor(etaSeconds / 60);
-                            const secs = etaSeconds % 60;
-                            etaText = mins + ' мин ' + secs + ' сек';
-                        } else {
-                            etaText = etaSeconds + ' сек';
-                        }
-                    }
+                // Расчёт скорости каждые 0.5 сек
+                const now = Date.now();
+                const timeDiff = (now - lastTime) / 1000;
+                if (timeDiff >= 0.5) {
+                    currentSpeed = (loaded - lastLoaded) / timeDiff;
+                    lastLoaded = loaded;
+                    lastTime = now;
+                }
 
-                    // Обновление подсказки с прогрессом
-                    const loadedMB = (e.loaded / (1024 * 1024)).toFixed(1);
-                    const totalMB = (e.total / (1024 * 1024)).toFixed(1);
-                    let hint = loadedMB + ' / ' + totalMB + ' MB';
-                    if (speedText) hint += ' • ' + speedText;
-                    if (etaText) hint += ' • ~' + etaText;
-                    setUploadStage('Этап 1 из 2: Загрузка на сервер', hint);
-
-                    // Переход ко 2 этапу (отправка в Telegram)
-                    if (e.loaded >= e.total) {
-                        setUploadStage('Этап 2 из 2: Отправка в Telegram', 'Это может занять некоторое время для больших файлов...');
-                        document.getElementById('progress-bar-fill').classList.add('pulsing');
-                        document.getElementById('progress-text').textContent = 'Обработка...';
+                const loadedMB = (loaded / (1024 * 1024)).toFixed(1);
+                const totalMB = (total / (1024 * 1024)).toFixed(1);
+                let hint = loadedMB + ' / ' + totalMB + ' MB';
+                if (currentSpeed > 0) {
+                    hint += ' • ' + formatSpeed(currentSpeed);
+                    if (loaded < total) {
+                        hint += ' • ~' + formatEta(Math.round((total - loaded) / currentSpeed));
                     }
                 }
+                setUploadStage('Этап 1 из 2: Загрузка на сервер', hint);
+            };
+        }
+
+        async function uploadRequest(method, url, headers, body) {
+            const send = (token) => fetch(url, {
+                method: method,
+                headers: Object.assign({ 'Authorization': 'Bearer ' + token }, headers),
+                body: body
             });
 
-            xhr.addEventListener('load', function() {
-                hideUploadOverlay();
+            let response = await send(await getSessionToken());
+            if (response.status === 401) {
+                response = await send(await getSessionToken(true));
+            }
+            return response;
+        }
+
+        // Сервер перегружен загрузками (503): ждём, сколько он просит в Retry-After
+        async function retryWhileBusy(request) {
+            for (let attempt = 0; ; attempt++) {
+                const response = await request();
+                if (response.status !== 503 || attempt >= UPLOAD_MAX_RETRIES) {
+                    return response;
+                }
+                const seconds = parseInt(response.headers.get('Retry-After'), 10);
+                setUploadStage('Этап 1 из 2: Загрузка на сервер', 'Сервер занят, ждём очереди...');
+                await sleep((isNaN(seconds) ? 5 : seconds) * 1000);
+            }
+        }
 
-                if (xhr.status === 200) {
+        // Возобновляемая загрузка: файл уходит частями, после обрыва
+        // сервер сообщает принятое смещение и загрузка продолжается с него
+        async function uploadFileResumable(file, onProgress) {
+            const createResponse = await retryWhileBusy(() => apiPost('/api/uploads', {
+                filename: file.name,
+                content_type: file.type || 'application/octet-stream',
+                size: file.size
+            }));
+            const created = await createResponse.json();
+            if (!created.success) {
+                throw new Error(created.error || 'Ошибка загрузки');
+            }
+
+            const uploadUrl = '/api/uploads/' + created.upload_id;
+            let offset = created.offset;
+            let failures = 0;
+
+            while (offset < file.size) {
+                try {
+                    const response = await retryWhileBusy(() => uploadRequest('PUT', uploadUrl, {
+                        'Upload-Offset': String(offset),
+                        'Content-Type': 'application/octet-stream'
+                    }, file.slice(offset, offset + created.chunk_size)));
+                    const result = await response.json();
+
+                    if (response.ok || (response.status === 409 && typeof result.offset === 'number')) {
+                        offset = result.offset;
+                        failures = 0;
+                        onProgress(offset);
+                        continue;
+                    }
+                    if (response.status < 500) {
+                        throw Object.assign(new Error(result.error || 'Ошибка загрузки'), { fatal: true });
+                    }
+                    throw new Error(result.error || 'Ошибка сервера');
+                } catch (e) {
+                    failures++;
+                    if (e.fatal || failures > UPLOAD_MAX_RETRIES) throw e;
+                    setUploadStage('Этап 1 из 2: Загрузка на сервер', 'Нет связи, повтор через несколько секунд...');
+                    await sleep(Math.min(1000 * 2 ** failures, 15000));
                     try {
-                        const result = JSON.parse(xhr.responseText);
-                        if (result.success) {
-                            showSuccess();
-                            setTimeout(function() { tg.close(); }, 1500);
-                        } else {
-                            throw new Error(result.error || 'Unknown error');
-                        }
-                    } catch (e) {
-                        showError('Ошибка при отправке: ' + e.message);
-                        tg.MainButton.hideProgress();
-                        tg.MainButton.enable();
+                        const state = await (await uploadRequest('GET', uploadUrl, {})).json();
+                        if (state.success) offset = state.offset;
+                    } catch (ignored) {
+                        // Смещение уточним на следующей попытке
                     }
-                } else {
-                    showError('Ошибка сервера: ' + xhr.status);
-                    tg.MainButton.hideProgress();
-                    tg.MainButton.enable();
                 }
-            });
+            }
+
+            const finalizeResponse = await uploadRequest('POST', uploadUrl + '/finalize', {});
+            const finalized = await finalizeResponse.json();
+            if (!finalized.success) {
+                throw new Error(finalized.error || 'Ошибка загрузки');
+            }
+            return created.upload_id;
+        }
+
+        async function uploadAllFiles() {
+            const total = uploadedFiles.reduce((sum, file) => sum + file.size, 0);
+            const track = createProgressTracker(total);
+            const uploadIds = [];
+            let done = 0;
+
+            for (const file of uploadedFiles) {
+                uploadIds.push(await uploadFileResumable(file, loaded => track(done + loaded)));
+                done += file.size;
+            }
+            return uploadIds;
+        }
+
+        tg.MainButton.onClick(async function() {
+            if (currentPage !== 'form') return;
+
+            if (!validateForm()) {
+                showError('Заполните все обязательные поля');
+                return;
+            }
 
-            xhr.addEventListener('error', function() {
+            tg.MainButton.showProgress();
+            tg.MainButton.disable();
+
+            try {
+                let uploadIds = [];
+                if (uploadedFiles.length > 0) {
+                    showUploadOverlay();
+                    uploadIds = await uploadAllFiles();
+                    setUploadStage('Этап 2 из 2: Отправка репорта', 'Сохраняем репорт...');
+                    document.getElementById('progress-bar-fill').classList.add('pulsing');
+                    document.getElementById('progress-text').textContent = 'Обработка...';
+                }
+
+                const formData = new FormData();
+                formData.append('login', document.getElementById('login').value.trim());
+                formData.append('platform', document.getElementById('platform').value);
+                formData.append('version', document.getElementById('version').value.trim());
+                formData.append('error_time', document.getElementById('error_time').value);
+                formData.append('server', document.getElementById('server').value);
+                formData.append('subscriber', document.getElementById('subscriber').value.trim());
+                formData.append('description', document.getElementById('description').value.trim());
+                formData.append('init_data', tg.initData);
+
+                if (chatId) {
+                    formData.append('chat_id', chatId);
+                }
+
+                uploadIds.forEach(function(uploadId) {
+                    formData.append('upload_id', uploadId);
+                });
+
+                const response = await retryWhileBusy(() => uploadRequest('POST', '/api/report', {}, formData));
                 hideUploadOverlay();
-                showError('Ошибка сети');
-                tg.MainButton.hideProgress();
-                tg.MainButton.enable();
-            });
 
-            xhr.addEventListener('timeout', function() {
+                if (!response.ok) {
+                    throw new Error('Ошибка сервера: ' + response.status);
+                }
+                const result = await response.json();
+                if (!result.success) {
+                    throw new Error(result.error || 'Unknown error');
+                }
+
+                showSuccess();
+                setTimeout(function() { tg.close(); }, 1500);
+            } catch (e) {
                 hideUploadOverlay();
-                showError('Превышено время ожидания');
+                showError(e instanceof TypeError ? 'Ошибка сети' : 'Ошибка при отправке: ' + e.message);
                 tg.MainButton.hideProgress();
                 tg.MainButton.enable();
-            });
-
-            xhr.open('POST', '/api/report');
-            xhr.timeout = 300000;
-            xhr.send(formData);
+            }
         });
 
         // ==================== МОИ РЕПОРТЫ ====================
@@ -484,31 +702,24 @@
             myReportsLoading = true;
 
             if (!append) {
-                myReportsOffset = 0;
+                myReportsCursor = null;
                 myReports = [];
             }
 
             try {
-                const response = await fetch('/api/user-reports', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        init_data: tg.initData,
-                        chat_id: chatId,
-                        limit: PAGE_SIZE,
-                        offset: myReportsOffset
-                    })
+                const { result } = await apiGetList('/api/user-reports', {
+                    chat_id: chatId,
+                    limit: PAGE_SIZE,
+                    cursor: myReportsCursor
                 });
 
-                const result = await response.json();
-
                 document.getElementById('my-loading').style.display = 'none';
                 myReportsLoaded = true;
 
                 if (result.success) {
                     myReports = myReports.concat(result.reports);
                     myReportsHasMore = result.has_more;
-                    myReportsOffset += result.reports.length;
+                    myReportsCursor = result.next_cursor;
                     renderMyReports();
 
                     // Открытие конкретного репорта по deep link
@@ -552,7 +763,7 @@
                     </div>
                     <div class="report-info">${escapeHtml(report.platform)}${report.platform_version ? ' ' + escapeHtml(report.platform_version) : ''} • ${escapeHtml(report.server)}</div>
                     <div class="report-info">${formatDate(report.created_at)}</div>
-                    <div class="report-description">${escapeHtml(report.description || '')}</div>
+                    <div class="report-description">${escapeHtml(report.description || '')}${report.description_truncated ? '…' : ''}</div>
                     ${report.tracking_id ? `<div class="tracking-id">ID: ${escapeHtml(report.tracking_id)}</div>` : ''}
                 </div>
             `).join('');
@@ -585,10 +796,13 @@
             });
         });
 
-        function openUserReport(reportId) {
-            currentUserReportId = reportId;
-            const report = myReports.find(r => r.id === reportId);
+        async function openUserReport(reportId) {
+            const summary = myReports.find(r => r.id === reportId);
+            if (!summary) return;
+            const report = await loadReportForModal(summary);
             if (!report) return;
+            currentUserReportId = reportId;
+            currentUserUpdatedAt = report.updated_at;
 
             // Редактирование доступно только для статусов "new" и "revision"
             const isEditable = !report.status || report.status === 'new' || report.status === 'revision';
@@ -671,6 +885,7 @@
         function closeUserModal() {
             document.getElementById('user-modal').classList.remove('active');
             currentUserReportId = null;
+            currentUserUpdatedAt = null;
 
             const errorDiv = document.getElementById('user-modal-error');
             errorDiv.classList.remove('show');
@@ -686,34 +901,27 @@
             btn.textContent = 'Сохранение...';
 
             try {
-                const response = await fetch('/api/update-report', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        init_data: tg.initData,
-                        report_id: currentUserReportId,
-                        user_login: document.getElementById('user-detail-login').value,
-                        platform: currentUserPlatform,
-                        platform_version: document.getElementById('user-detail-version').value,
-                        error_time: document.getElementById('user-detail-time').value,
-                        server: currentUserServer,
-                        subscriber_info: document.getElementById('user-detail-subscriber').value,
-                        description: document.getElementById('user-detail-description').value
-                    })
+                const current = myReports.find(r => r.id === currentUserReportId);
+                const response = await apiPost('/api/update-report', {
+                    report_id: currentUserReportId,
+                    expected_updated_at: currentUserUpdatedAt,
+                    user_login: document.getElementById('user-detail-login').value,
+                    platform: currentUserPlatform,
+                    platform_version: document.getElementById('user-detail-version').value,
+                    error_time: document.getElementById('user-detail-time').value,
+                    server: currentUserServer,
+                    subscriber_info: document.getElementById('user-detail-subscriber').value,
+                    description: document.getElementById('user-detail-description').value
                 });
 
                 const result = await response.json();
 
                 if (result.success) {
-                    const report = myReports.find(r => r.id === currentUserReportId);
-                    if (report) {
-                        report.user_login = document.getElementById('user-detail-login').value;
-                        report.platform = currentUserPlatform;
-                        report.platform_version = document.getElementById('user-detail-version').value;
-                        report.error_time = document.getElementById('user-detail-time').value;
-                        report.server = currentUserServer;
-                        report.subscriber_info = document.getElementById('user-detail-subscriber').value;
-                        report.description = document.getElementById('user-detail-description').value;
+                    if (result.report) {
+                        reportDetails.set(result.report.id, result.report);
+                        if (current) {
+                            Object.assign(current, result.report, { description_truncated: false });
+                        }
                     }
                     renderMyReports();
                     closeUserModal();
@@ -751,30 +959,24 @@
             adminReportsLoading = true;
 
             if (!append) {
-                adminReportsOffset = 0;
+                adminSearchQuery = '';
+                adminReportsCursor = null;
                 adminReports = [];
                 document.getElementById('admin-report-list').innerHTML = '<div class="loading">Загрузка...</div>';
             }
 
             try {
                 const requestBody = {
-                    init_data: tg.initData,
                     chat_id: chatId,
                     limit: PAGE_SIZE,
-                    offset: adminReportsOffset,
+                    cursor: adminReportsCursor,
                     include_stats: !append
                 };
                 if (currentAdminFilter) {
                     requestBody.status = currentAdminFilter;
                 }
 
-                const response = await fetch('/api/chat-reports', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(requestBody)
-                });
-
-                const result = await response.json();
+                const { status, result } = await apiGetList('/api/chat-reports', requestBody);
 
                 document.getElementById('admin-loading').style.display = 'none';
                 adminReportsLoaded = true;
@@ -782,7 +984,7 @@
                 if (result.success) {
                     adminReports = adminReports.concat(result.reports);
                     adminReportsHasMore = result.has_more;
-                    adminReportsOffset += result.reports.length;
+                    adminReportsCursor = result.next_cursor;
 
                     if (result.stats) {
                         adminStats = result.stats;
@@ -803,7 +1005,7 @@
                         openReportId = null;
                         openAsAdmin = false;
                     }
-                } else if (response.status === 403) {
+                } else if (status === 403) {
                     document.getElementById('admin-report-list').innerHTML =
                         '<div class="empty-state"><div class="empty-state-icon">\uD83D\uDD12</div><p>Доступ запрещён</p></div>';
                 } else {
@@ -848,28 +1050,39 @@
                     <div class="report-user">@${escapeHtml(report.username || 'unknown')} • ${escapeHtml(report.user_login || '-')}</div>
                     <div class="report-info">${escapeHtml(report.platform)}${report.platform_version ? ' ' + escapeHtml(report.platform_version) : ''} • ${escapeHtml(report.server)}</div>
                     <div class="report-info">${formatDate(report.created_at)}</div>
-                    <div class="report-description">${escapeHtml(report.description || '')}</div>
+                    <div class="report-description">${escapeHtml(report.description || '')}${report.description_truncated ? '…' : ''}</div>
                     ${report.tracking_id ? `<div class="tracking-id">ID: ${escapeHtml(report.tracking_id)}</div>` : ''}
                 </div>
             `).join('');
 
             if (adminReportsHasMore) {
-                html += `<button class="load-more-btn" onclick="loadAdminReports(true)">Загрузить ещё</button>`;
+                html += `<button class="load-more-btn" onclick="loadMoreAdminReports()">Загрузить ещё</button>`;
             }
 
             list.innerHTML = html;
         }
 
+        function loadMoreAdminReports() {
+            if (adminSearchQuery) {
+                searchReports(true);
+            } else {
+                loadAdminReports(true);
+            }
+        }
+
         function toggleRevisionComment() {
             const status = document.getElementById('admin-detail-status').value;
             const commentRow = document.getElementById('revision-comment-row');
             commentRow.style.display = status === 'revision' ? 'block' : 'none';
         }
 
-        function openAdminReport(reportId) {
-            currentAdminReportId = reportId;
-            const report = adminReports.find(r => r.id === reportId);
+        async function openAdminReport(reportId) {
+            const summary = adminReports.find(r => r.id === reportId);
+            if (!summary) return;
+            const report = await loadReportForModal(summary);
             if (!report) return;
+            currentAdminReportId = reportId;
+            currentAdminUpdatedAt = report.updated_at;
 
             document.getElementById('admin-modal-title').textContent = `Репорт #${report.report_number}`;
             document.getElementById('admin-detail-user').textContent = report.username ? `@${report.username}` : 'Неизвестен';
@@ -894,6 +1107,7 @@
         function closeAdminModal() {
             document.getElementById('admin-modal').classList.remove('active');
             currentAdminReportId = null;
+            currentAdminUpdatedAt = null;
         }
 
         async function saveAdminReport() {
@@ -905,26 +1119,23 @@
 
             try {
                 const newStatus = document.getElementById('admin-detail-status').value;
-                const response = await fetch('/api/update-report', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        init_data: tg.initData,
-                        report_id: currentAdminReportId,
-                        status: newStatus,
-                        tracking_id: document.getElementById('admin-detail-tracking').value,
-                        status_comment: newStatus === 'revision' ? document.getElementById('admin-detail-comment').value : ''
-                    })
+                const current = adminReports.find(r => r.id === currentAdminReportId);
+                const response = await apiPost('/api/update-report', {
+                    report_id: currentAdminReportId,
+                    expected_updated_at: currentAdminUpdatedAt,
+                    status: newStatus,
+                    tracking_id: document.getElementById('admin-detail-tracking').value,
+                    status_comment: newStatus === 'revision' ? document.getElementById('admin-detail-comment').value : ''
                 });
 
                 const result = await response.json();
 
                 if (result.success) {
-                    const report = adminReports.find(r => r.id === currentAdminReportId);
-                    if (report) {
-                        report.status = newStatus;
-                        report.tracking_id = document.getElementById('admin-detail-tracking').value;
-                        report.status_comment = newStatus === 'revision' ? document.getElementById('admin-detail-comment').value : '';
+                    if (result.report) {
+                        reportDetails.set(result.report.id, result.report);
+                        if (current) {
+                            Object.assign(current, result.report, { description_truncated: false });
+                        }
                     }
                     closeAdminModal();
                     tg.showAlert('Изменения сохранены');
@@ -946,31 +1157,35 @@
 
         // ==================== ПОИСК И ЭКСПОРТ ====================
 
-        async function searchReports() {
-            const query = document.getElementById('admin-search-input').value.trim();
+        async function searchReports(append = false) {
+            const query = append ? adminSearchQuery : document.getElementById('admin-search-input').value.trim();
             if (!query) {
                 loadAdminReports(false);
                 return;
             }
 
             const list = document.getElementById('admin-report-list');
-            list.innerHTML = '<div class="loading">Поиск...</div>';
+            if (!append) {
+                adminSearchQuery = query;
+                adminSearchOffset = 0;
+                adminReports = [];
+                list.innerHTML = '<div class="loading">Поиск...</div>';
+            }
 
             try {
-                const response = await fetch('/api/search-reports', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        init_data: tg.initData,
-                        chat_id: chatId,
-                        query: query
-                    })
+                const response = await apiPost('/api/search-reports', {
+                    chat_id: chatId,
+                    query: query,
+                    limit: PAGE_SIZE,
+                    offset: adminSearchOffset
                 });
 
                 const result = await response.json();
 
                 if (result.success) {
-                    adminReports = result.reports;
+                    adminReports = adminReports.concat(result.reports);
+                    adminReportsHasMore = result.has_more;
+                    adminSearchOffset += result.reports.length;
                     renderAdminReports();
                 } else {
                     list.innerHTML = '<div class="error-message show">' + escapeHtml(result.error || 'Ошибка поиска') + '</div>';
@@ -982,13 +1197,8 @@
 
         async function exportCSV() {
             try {
-                const response = await fetch('/api/export-csv', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        init_data: tg.initData,
-                        chat_id: chatId
-                    })
+                const response = await apiPost('/api/export-csv', {
+                    chat_id: chatId
                 });
 
                 if (response.ok) {
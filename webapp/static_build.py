@@ -0,0 +1,122 @@
+"""Сборка статики Web App: минификация, отпечатки и предсжатие.
+
+JS и CSS минифицируются, получают в имени хэш содержимого
+(`app.<hash>.js`) и сохраняются рядом с `.gz` и `.br` версиями в
+`static/dist`. Ссылки в `index.html` переписываются на новые имена, поэтому
+ресурсы можно отдавать с `Cache-Control: immutable`: изменённый файл получит
+другое имя.
+
+Минификация JS — через rjsmin, сжатие brotli — через пакет brotli; оба
+необязательны: без rjsmin JS копируется как есть, без brotli `.br` не
+создаются.
+
+    python -m webapp.static_build
+"""
+import gzip
+import hashlib
+import json
+import logging
+import re
+import shutil
+from pathlib import Path
+from typing import Dict
+
+try:
+    import rjsmin
+except ImportError:  # pragma: no cover - зависит от окружения
+    rjsmin = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - зависит от окружения
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).parent / "static"
+DIST_NAME = "dist"
+ASSETS = ("css/style.css", "js/app.js")
+
+# Строки CSS копируются как есть, комментарии удаляются
+_CSS_SKIP_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/""", re.S)
+_CSS_TIGHT_RE = re.compile(r"\s*([{};,])\s*")
+
+
+def _tighten_css(chunk: str) -> str:
+    return _CSS_TIGHT_RE.sub(r"\1", re.sub(r"\s+", " ", chunk))
+
+
+def minify_css(text: str) -> str:
+    """Убрать комментарии и лишние пробелы, не трогая строки"""
+    parts = []
+    last = 0
+    for match in _CSS_SKIP_RE.finditer(text):
+        parts.append(_tighten_css(text[last:match.start()]))
+        if match.group(1):
+            parts.append(match.group(1))
+        last = match.end()
+    parts.append(_tighten_css(text[last:]))
+    return "".join(parts).replace(";}", "}").strip()
+
+
+def minify_js(text: str) -> str:
+    """Минифицировать JS, если установлен rjsmin"""
+    if rjsmin is None:
+        return text
+    return rjsmin.jsmin(text)
+
+
+def _write_compressed(path: Path, data: bytes) -> None:
+    """Сохранить файл вместе с .gz и .br версиями"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    # mtime=0 — одинаковый результат при повторной сборке
+    path.with_name(path.name + ".gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        path.with_name(path.name + ".br").write_bytes(brotli.compress(data, quality=11))
+
+
+def build(static_dir: Path = STATIC_DIR) -> Dict[str, str]:
+    """Собрать static/dist и вернуть манифест {исходный путь: собранный путь}"""
+    dist_dir = static_dir / DIST_NAME
+    tmp_dir = static_dir / f".{DIST_NAME}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    manifest = {}
+    for asset in ASSETS:
+        source = (static_dir / asset).read_text(encoding="utf-8")
+        minified = minify_css(source) if asset.endswith(".css") else minify_js(source)
+        data = minified.encode("utf-8")
+
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, suffix = asset.rsplit(".", 1)
+        built = f"{stem}.{digest}.{suffix}"
+        _write_compressed(tmp_dir / built, data)
+        manifest[asset] = built
+        logger.info(f"{asset}: {len(source)} → {len(data)} байт → {built}")
+
+    index = (static_dir / "index.html").read_text(encoding="utf-8")
+    for asset, built in manifest.items():
+        index = re.sub(
+            rf"/static/{re.escape(asset)}(\?[^\"']*)?",
+            f"/static/{DIST_NAME}/{built}",
+            index,
+        )
+    _write_compressed(tmp_dir / "index.html", index.encode("utf-8"))
+    (tmp_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    # Каталог подменяется целиком, чтобы не отдавать наполовину собранный
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    tmp_dir.rename(dist_dir)
+    return manifest
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    result = build()
+    if rjsmin is None:
+        print("rjsmin не установлен — JS не минифицирован (pip install rjsmin)")
+    if brotli is None:
+        print("brotli не установлен — .br не созданы (pip install brotli)")
+    for source_path, built_path in result.items():
+        print(f"{source_path} → {DIST_NAME}/{built_path}")
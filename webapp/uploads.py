@@ -0,0 +1,276 @@
+"""Возобновляемая загрузка файлов по частям.
+
+Состояние загрузки хранится на диске: `<id>.part` с уже принятыми байтами
+и `<id>.json` с метаданными. Текущее смещение — размер `.part`, поэтому
+после обрыва соединения или перезапуска сервера клиент узнаёт смещение
+и продолжает с последнего принятого байта.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import aiofiles
+
+from app.database.models import SpooledFile
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadError(Exception):
+    """Ошибка протокола загрузки; status — HTTP-код ответа"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class UploadOffsetMismatch(UploadError):
+    """Часть пришла не с того смещения, с которого ожидалась"""
+
+    def __init__(self, offset: int):
+        super().__init__("Неверное смещение", status=409)
+        self.offset = offset
+
+
+@dataclass
+class UploadState:
+    """Метаданные загрузки"""
+    id: str
+    user_id: int
+    filename: Optional[str]
+    content_type: str
+    size: int
+    created_at: float
+    sha256: Optional[str] = None
+    offset: int = 0
+
+    @property
+    def finalized(self) -> bool:
+        return self.sha256 is not None
+
+    def to_dict(self) -> dict:
+        """Сериализация в словарь для API"""
+        return {
+            "upload_id": self.id,
+            "size": self.size,
+            "offset": self.offset,
+            "finalized": self.finalized,
+        }
+
+
+class UploadStore:
+    """Каталог незавершённых и готовых загрузок"""
+
+    def __init__(self, root: Path, max_size: int, ttl: float = 86400):
+        self.root = root
+        self.max_size = max_size
+        self.ttl = ttl
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._last_cleanup = 0.0
+
+    def _part_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.part"
+
+    def _meta_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.json"
+
+    def _write_meta(self, state: UploadState) -> None:
+        data = asdict(state)
+        del data["offset"]
+        tmp_path = self._meta_path(state.id).with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self._meta_path(state.id))
+
+    def _read_meta(self, upload_id: str) -> Tuple[dict, int]:
+        with open(self._meta_path(upload_id), encoding="utf-8") as f:
+            data = json.load(f)
+        return data, self._part_path(upload_id).stat().st_size
+
+    def _start(self, state: UploadState) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._part_path(state.id).touch()
+        self._write_meta(state)
+
+    async def _run(self, func, *args):
+        """Файловые операции идут в пуле потоков, не блокируя цикл событий"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def create(self, user_id: int, filename: Optional[str], content_type: str, size: int) -> UploadState:
+        """Начать новую загрузку"""
+        if size <= 0:
+            raise UploadError("Пустой файл")
+        if size > self.max_size:
+            raise UploadError(f"Файл слишком большой (макс. {self.max_size // (1024 * 1024)}MB)", status=413)
+
+        await self._maybe_cleanup()
+
+        state = UploadState(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            filename=filename,
+            content_type=content_type or "application/octet-stream",
+            size=size,
+            created_at=time.time(),
+        )
+        await self._run(self._start, state)
+        return state
+
+    async def get(self, upload_id: str, user_id: int) -> UploadState:
+        """Загрузка пользователя с актуальным смещением"""
+        if not UPLOAD_ID_RE.match(upload_id or ""):
+            raise UploadError("Загрузка не найдена", status=404)
+        try:
+            data, offset = await self._run(self._read_meta, upload_id)
+        except FileNotFoundError:
+            raise UploadError("Загрузка не найдена", status=404)
+
+        state = UploadState(**data, offset=offset)
+        if state.user_id != user_id:
+            raise UploadError("Загрузка не найдена", status=404)
+        return state
+
+    async def append(self, state: UploadState, offset: int, chunks: AsyncIterator[bytes]) -> UploadState:
+        """Дописать часть, начинающуюся с offset.
+
+        Принятые байты сохраняются даже при обрыве посреди части:
+        следующее смещение клиент узнаёт из get().
+        """
+        if state.finalized:
+            raise UploadError("Загрузка уже завершена", status=409)
+
+        lock = self._locks.setdefault(state.id, asyncio.Lock())
+        if lock.locked():
+            raise UploadError("Часть уже загружается", status=409)
+
+        async with lock:
+            try:
+                part_path = self._part_path(state.id)
+                current = part_path.stat().st_size
+                if offset != current:
+                    raise UploadOffsetMismatch(current)
+
+                async with aiofiles.open(part_path, "ab") as f:
+                    try:
+                        async for chunk in chunks:
+                            if current + len(chunk) > state.size:
+                                raise UploadError("Данных больше, чем заявлено", status=413)
+                            await f.write(chunk)
+                            current += len(chunk)
+                    finally:
+                        await f.flush()
+                        await self._run(os.fsync, f.fileno())
+            finally:
+                self._locks.pop(state.id, None)
+
+        state.offset = current
+        return state
+
+    async def finalize(self, state: UploadState) -> UploadState:
+        """Проверить, что файл получен целиком, и посчитать SHA-256"""
+        if state.finalized:
+            return state
+        if state.offset != state.size:
+            raise UploadOffsetMismatch(state.offset)
+
+        state.sha256 = await self._run(_file_sha256, self._part_path(state.id))
+        await self._run(self._write_meta, state)
+        return state
+
+    async def claim(self, state: UploadState, dest_dir: Path) -> SpooledFile:
+        """Забрать готовый файл в каталог очереди отправки.
+
+        Файл забирается под блокировкой загрузки: из двух запросов с одним
+        upload_id файл получит только первый, второй — UploadError 409/404.
+        """
+        if not state.finalized:
+            raise UploadError("Загрузка не завершена")
+
+        lock = self._locks.setdefault(state.id, asyncio.Lock())
+        if lock.locked():
+            raise UploadError("Загрузка уже используется", status=409)
+
+        async with lock:
+            try:
+                suffix = Path(state.filename).suffix if state.filename else ""
+                dest = dest_dir / f"{state.id}{suffix}"
+                try:
+                    await self._run(self._move_out, state.id, dest)
+                except FileNotFoundError:
+                    raise UploadError("Загрузка не найдена", status=404)
+            finally:
+                self._locks.pop(state.id, None)
+        return SpooledFile(str(dest), state.filename, state.content_type, state.sha256, state.size)
+
+    async def release(self, state: UploadState, file: SpooledFile) -> None:
+        """Вернуть забранный файл, если репорт так и не был создан.
+
+        Клиент сможет отправить репорт с тем же upload_id ещё раз.
+        """
+        await self._run(self._move_back, state, Path(file.path))
+
+    def _move_out(self, upload_id: str, dest: Path) -> None:
+        part_path = self._part_path(upload_id)
+        if not part_path.exists():
+            raise FileNotFoundError(part_path)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        # Между файловыми системами move — это копирование
+        shutil.move(str(part_path), dest)
+        self._meta_path(upload_id).unlink(missing_ok=True)
+
+    def _move_back(self, state: UploadState, path: Path) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(path), self._part_path(state.id))
+        self._write_meta(state)
+
+    async def cleanup_expired(self) -> int:
+        """Удалить загрузки старше ttl"""
+        removed = await self._run(self._remove_expired)
+        if removed:
+            logger.info(f"Удалено просроченных загрузок: {removed}")
+        return removed
+
+    def _remove_expired(self) -> int:
+        if not self.root.exists():
+            return 0
+        removed = 0
+        deadline = time.time() - self.ttl
+        for meta_path in self.root.glob("*.json"):
+            part_path = self._part_path(meta_path.stem)
+            try:
+                last_activity = meta_path.stat().st_mtime
+                if part_path.exists():
+                    last_activity = max(last_activity, part_path.stat().st_mtime)
+                if last_activity >= deadline:
+                    continue
+                part_path.unlink(missing_ok=True)
+                meta_path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    async def _maybe_cleanup(self) -> None:
+        now = time.monotonic()
+        if now - self._last_cleanup >= 3600:
+            self._last_cleanup = now
+            await self.cleanup_expired()
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()